@@ -0,0 +1,64 @@
+"""
+Speicher-Prüfung: Ein Frame im eingeschwungenen Zustand darf (fast) keinen Speicher anfordern
+
+Misst mit tracemalloc die Updates von Spieler, Gegnern und Wolken über viele Frames:
+    - Spitze pro Frame: Maximal gleichzeitig belegter neuer Speicher während eines Frames
+    - Netto pro Frame: Speicher, der nach den Frames noch belegt ist (Zuwachs)
+Liegt ein Wert über dem Budget, endet das Skript mit Exit-Code 1 (z.B. für CI)
+
+Aufruf (aus dem Projekt-Ordner):
+    python -m benchmarks.allocations
+    python -m benchmarks.allocations --frames 5000
+"""
+import argparse
+import sys
+import tracemalloc
+
+from game import Game
+
+PEAK_BUDGET = 384       # Bytes pro Frame (Zahlen außerhalb des Caches von Python, z.B. Positionen als int)
+NET_BUDGET = 16         # Bytes pro Frame (Animationen werden nur beim ersten Wechsel der Aktion kopiert)
+
+
+def update_entities(game, frame):
+    """ Ein Frame ohne Rendern: Spieler läuft hin und her, Gegner und Wolken bewegen sich """
+    game.player.update(game.tilemap, (1 if (frame // 50) % 2 else -1, 0))
+    if game.enemy_batch is not None:
+        game.enemy_batch.update(game.tilemap)
+    else:
+        for enemy in game.enemies:
+            enemy.update(game.tilemap, (0, 0))
+    game.clouds.update()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--frames', type=int, default=2000, help='Anzahl gemessener Frames')
+    parser.add_argument('--warmup', type=int, default=300, help='Frames vor der Messung (Caches füllen, Animationen kopieren)')
+    args = parser.parse_args()
+
+    game = Game(headless=True, prefetch=False, seed=0)
+    for frame in range(args.warmup):
+        update_entities(game, frame)
+
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    peak = 0
+    for frame in range(args.warmup, args.warmup + args.frames):
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        update_entities(game, frame)
+        peak = max(peak, tracemalloc.get_traced_memory()[1] - before)
+    net = (tracemalloc.get_traced_memory()[0] - start) / args.frames
+    tracemalloc.stop()
+
+    print(f"{len(game.enemies)} Gegner, {len(game.clouds.clouds)} Wolken, {args.frames} Frames")
+    print(f"Spitze pro Frame: {peak:8} Bytes (Budget {PEAK_BUDGET})")
+    print(f"Netto pro Frame:  {net:8.1f} Bytes (Budget {NET_BUDGET})")
+    if peak > PEAK_BUDGET or net > NET_BUDGET:
+        print("Budget überschritten")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,35 @@
+"""
+Synthetische Karten für Benchmarks
+"""
+import json
+import os
+import random
+import tempfile
+
+
+def synthetic_map(num_tiles, seed=0):
+    """
+    Erzeugt eine Karte im JSON-Format mit num_tiles Kacheln
+    Breite Karte aus Gras (oben) und Stein (darunter) mit Löchern und etwas Dekoration
+    Die Breite wächst mit der Anzahl der Kacheln, damit große Karten nicht nur in die Tiefe gehen
+    """
+    rng = random.Random(seed)
+    width = max(100, int((num_tiles * 8) ** 0.5))
+    tilemap = {}
+    for i in range(num_tiles):
+        x, y = i % width, i // width
+        if y == 0:
+            # Oberste Reihe: Gras mit gelegentlichen Löchern, damit Gegner an Kanten umdrehen
+            tile_type = 'grass' if x % 37 else 'decor'
+        else:
+            tile_type = rng.choice(['stone', 'stone', 'stone', 'grass', 'decor'])
+        tilemap[str(x) + ';' + str(y)] = {'type': tile_type, 'variant': rng.randrange(4), 'pos': [x, y]}
+    return {'tilemap': tilemap, 'tile_size': 16}
+
+
+def write_synthetic_map(num_tiles, seed=0):
+    """ Schreibt eine synthetische Karte in eine temporäre Datei und gibt den Pfad zurück (Aufrufer löscht die Datei) """
+    fd, path = tempfile.mkstemp(suffix='.json', prefix=f'synthetic_{num_tiles}_')
+    with os.fdopen(fd, 'w') as f:
+        json.dump(synthetic_map(num_tiles, seed), f)
+    return path
@@ -0,0 +1,199 @@
+"""
+Determinismus-Prüfung: Verschiedene Wege durch die Simulation müssen exakt dasselbe Ergebnis liefern
+
+    - batch: EntityBatch.update gegen Enemy.update für jeden Gegner einzeln,
+             mit allen Gegnern wach und mit nur einem Teil wach (wie mit dem Aktivitäts-Bereich, siehe scripts/activity.py)
+    - replay: Aufnahme speichern (Game.quit) und abspielen, auch wenn das Spiel mit weniger als 0 Leben endet
+              (Fallschaden und Treffer im selben Tick)
+    - checkpoint: Nach dem Tod geht es am Checkpoint (eingesammeltes Herz, Game.save_checkpoint) exakt so weiter
+                  wie ohne Tod direkt vom Checkpoint aus
+Weicht ein Ergebnis ab, endet das Skript mit Exit-Code 1 (z.B. für CI)
+
+Aufruf (aus dem Projekt-Ordner):
+    python -m benchmarks.parity
+    python -m benchmarks.parity --ticks 2000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+
+from benchmarks.maps import write_synthetic_map
+from benchmarks.run import ground_positions
+from game import Game
+from scripts.batch import EntityBatch, NUMPY_AVAILABLE
+from scripts.entities import Enemy
+from scripts.replay import InputLog
+from scripts.rng import derive_seed
+
+AWAKE_RATIOS = [1.0, 0.7, 0.3]      # Anteil wacher Gegner pro Durchlauf der Batch-Prüfung
+ENEMY_COUNT = 300
+REPLAY_SEED = 1234
+CHECKPOINT_LIMIT = 6000             # So viele Ticks wird höchstens auf den ersten Checkpoint gewartet
+
+
+def enemy_state(enemy):
+    """ Alles, was Enemy.update verändert """
+    return (float(enemy.pos[0]), float(enemy.pos[1]), float(enemy.velocity[0]), float(enemy.velocity[1]), enemy.flip,
+            enemy.walking, enemy.draws, enemy.collisions, enemy.action, enemy.animation.frame)
+
+
+def run_enemies(game, positions, ticks, ratio, batch):
+    """
+    Berechne ticks Ticks für neue Gegner an positions (alle 20 Ticks wird ein anderer Anteil ratio geweckt)
+    batch: Mit EntityBatch statt Enemy.update
+    Gibt den Zustand aller Gegner pro Tick zurück
+    """
+    enemies = [Enemy(game, pos, (8, 15), seed=derive_seed(0, i)) for i, pos in enumerate(positions)]
+    enemy_batch = EntityBatch(game, enemies) if batch else None
+    rng = random.Random(1)
+    states = []
+    for tick in range(ticks):
+        if tick % 20 == 0:
+            active = enemies if ratio >= 1.0 else rng.sample(enemies, int(len(enemies) * ratio))
+        if enemy_batch is not None:
+            enemy_batch.update(game.tilemap, None if ratio >= 1.0 else active)
+            enemy_batch.write_back()
+        else:
+            for enemy in active:
+                enemy.update(game.tilemap, (0, 0))
+        states.append([enemy_state(enemy) for enemy in enemies])
+    return states
+
+
+def check_batch(game, ticks):
+    """ Batch gegen einzelne Updates - gibt die Anzahl abweichender Durchläufe zurück """
+    if not NUMPY_AVAILABLE:
+        print("batch: übersprungen (NumPy fehlt)")
+        return 0
+
+    path = write_synthetic_map(10_000)
+    try:
+        game.tilemap.load(path)
+    finally:
+        os.remove(path)
+    positions = ground_positions(game.tilemap, ENEMY_COUNT, random.Random(0))
+
+    failures = 0
+    for ratio in AWAKE_RATIOS:
+        single = run_enemies(game, positions, ticks, ratio, batch=False)
+        batched = run_enemies(game, positions, ticks, ratio, batch=True)
+        diverged = next((tick for tick, (a, b) in enumerate(zip(single, batched)) if a != b), None)
+        if diverged is None:
+            print(f"batch: {ratio:.0%} wach, {ticks} Ticks identisch")
+        else:
+            print(f"batch: {ratio:.0%} wach, weicht ab Tick {diverged} ab")
+            failures += 1
+    return failures
+
+
+def replay_inputs(tick):
+    """ Eingaben der aufgenommenen Läufe: nach rechts laufen und regelmäßig springen """
+    return {'left': False, 'right': True, 'jump': tick % 37 == 0}
+
+
+def run_replay(ticks, live, path, replay=None):
+    """
+    Nimm ticks Ticks mit live Leben zu Beginn in die Datei path auf (replay=None) oder spiele die Aufnahme replay ab
+    Gibt zurück, ob die Wiedergabe mit der Aufnahme übereinstimmt (bei der Aufnahme immer True)
+    """
+    game = Game(headless=True, prefetch=False, seed=REPLAY_SEED if replay is None else replay.seed)
+    game.live = live
+    if replay is None:
+        game.start_recording(path)
+        for tick in range(ticks):
+            game.step(replay_inputs(tick), render=False)
+        game.quit()
+        return True
+    game.start_replay(replay)
+    while not game.replay_done():
+        game.step(render=False)
+    print(f"replay: {ticks} Ticks, {game.live} Leben am Ende")
+    same = game.checksum() == replay.checksum
+    game.quit()     # Vergleicht und meldet das Ergebnis (Game.check_replay)
+    return same
+
+
+def check_replay(ticks):
+    """ Aufnahme und Wiedergabe - gibt die Anzahl abweichender Läufe zurück """
+    failures = 0
+    # Normaler Lauf und ein Lauf, der mit weniger als 0 Leben endet (noch bevor der Spieler wieder erscheint)
+    for run_ticks, live in [(ticks, 3), (15, -1)]:
+        fd, path = tempfile.mkstemp(suffix='.replay')
+        os.close(fd)
+        try:
+            run_replay(run_ticks, live, path)
+            failures += not run_replay(run_ticks, live, path, InputLog.load(path))
+        finally:
+            os.remove(path)
+    return failures
+
+
+def checkpoint_inputs(tick):
+    """ Eingaben der Checkpoint-Prüfung: hin und her laufen und regelmäßig springen (sammelt im ersten Level ein Herz ein) """
+    return {'right': (tick // 300) % 3 != 2, 'left': (tick // 300) % 3 == 2, 'jump': tick % 37 == 0}
+
+
+def play_checkpoint(ticks, die, batch):
+    """
+    Spiele bis zum ersten Checkpoint und von dort noch ticks Ticks weiter
+    die: Spieler stirbt direkt nach dem Checkpoint und erscheint dort wieder (respawn() in Game.step)
+    Gibt (Tick des Checkpoints, Prüfsumme am Ende) zurück - (None, None), wenn kein Checkpoint erreicht wurde
+    """
+    game = Game(headless=True, prefetch=False, batch=batch, activity=False, seed=REPLAY_SEED)
+    tick = 0
+    while game.checkpoint is None:
+        if tick >= CHECKPOINT_LIMIT:
+            return None, None
+        game.step(checkpoint_inputs(tick), render=False)
+        tick += 1
+    checkpoint_tick = tick
+
+    if die:
+        # Sterben und warten, bis der nächste Tick respawn() aufruft - dieser Tick bekommt dann die Eingaben nach dem Checkpoint
+        game.live = 0
+        game.step({}, render=False)
+        while game.dead + 1 <= 40:
+            game.step({}, render=False)
+
+    for tick in range(checkpoint_tick, checkpoint_tick + ticks):
+        game.step(checkpoint_inputs(tick), render=False)
+    return checkpoint_tick, game.checksum()
+
+
+def check_checkpoint(ticks):
+    """ respawn() am Checkpoint gegen ungestörtes Weiterspielen - gibt die Anzahl abweichender Läufe zurück """
+    failures = 0
+    for batch in [None, 0] if NUMPY_AVAILABLE else [None]:
+        name = 'Batch' if batch is not None else 'einzeln'
+        checkpoint_tick, expected = play_checkpoint(ticks, False, batch)
+        if checkpoint_tick is None:
+            print(f"checkpoint ({name}): kein Checkpoint in {CHECKPOINT_LIMIT} Ticks")
+            failures += 1
+            continue
+        checksum = play_checkpoint(ticks, True, batch)[1]
+        if checksum == expected:
+            print(f"checkpoint ({name}): Checkpoint bei Tick {checkpoint_tick}, nach Tod und {ticks} Ticks identisch")
+        else:
+            print(f"checkpoint ({name}): Checkpoint bei Tick {checkpoint_tick}, nach Tod weicht der Zustand ab")
+            failures += 1
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--ticks', type=int, default=600, help='Anzahl Ticks pro Prüfung')
+    args = parser.parse_args()
+
+    game = Game(headless=True, prefetch=False, seed=0)
+    failures = check_batch(game, args.ticks)
+    failures += check_replay(args.ticks)
+    failures += check_checkpoint(args.ticks)
+    if failures:
+        print(f"{failures} Prüfung(en) fehlgeschlagen")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
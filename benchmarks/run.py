@@ -0,0 +1,346 @@
+"""
+Benchmark-Suite für die Engine (Tilemap, Entitäten, Wolken)
+
+Misst jedes Subsystem einzeln auf allen Karten in data/maps und auf synthetischen Karten
+mit 10k/100k/1M Kacheln. Die Ergebnisse werden als JSON gespeichert, damit sie von Commit
+zu Commit verglichen werden können.
+
+Aufruf (aus dem Projekt-Ordner):
+    python -m benchmarks.run                                 # Alle Karten, Ergebnis in bench_results.json
+    python -m benchmarks.run --sizes 10000 --out neu.json    # Nur eine synthetische Größe
+    python -m benchmarks.run --compare alt.json neu.json     # Zwei Ergebnisse vergleichen
+"""
+import argparse
+import glob
+import itertools
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import pygame
+
+from benchmarks.maps import write_synthetic_map
+from game import Game
+from scripts.entities import Enemy, PhysicsEntity
+from scripts.mapformat import BINARY_EXTENSION
+from scripts.tilemap import CHUNK_SIZE
+from scripts.autosave import MapAutosave
+from scripts.batch import EntityBatch, NUMPY_AVAILABLE
+from scripts.clouds import Clouds
+from scripts.overview import MapOverview
+from scripts.present import Presenter, PRESENT_MODES
+
+MAP_GLOB = './data/maps/*.json'
+SYNTHETIC_SIZES = [10_000, 100_000, 1_000_000]
+
+
+def measure(func, calls, repeat=5):
+    """
+    Führe func in repeat Runden je calls-mal aus
+    Gibt Median und Minimum der Zeit pro Aufruf (Mikrosekunden) zurück
+    """
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(calls):
+            func()
+        samples.append((time.perf_counter() - start) / calls * 1e6)
+    return {'median_us': statistics.median(samples), 'min_us': min(samples), 'calls': calls, 'repeat': repeat}
+
+
+def map_bounds(tilemap):
+    """ Gibt die Grenzen der Karte in Pixeln zurück (min_x, min_y, max_x, max_y) """
+    chunk_px = CHUNK_SIZE * tilemap.tile_size
+    xs = [cx for cx, cy in tilemap.chunks]
+    ys = [cy for cx, cy in tilemap.chunks]
+    return min(xs) * chunk_px, min(ys) * chunk_px, (max(xs) + 1) * chunk_px, (max(ys) + 1) * chunk_px
+
+
+def ground_positions(tilemap, count, rng):
+    """ Suche count Positionen direkt über festem Boden (dort stehen Entitäten) """
+    tiles = [(x, y) for x, y, tile_type, variant in tilemap.iter_tiles() if tilemap.solid[tilemap.type_id(tile_type)] and not tilemap.cell(x, y - 1)]
+    return [(x * tilemap.tile_size + 4, y * tilemap.tile_size - 15) for x, y in rng.sample(tiles, min(count, len(tiles)))]
+
+
+def bench_map(game, name, path, heavy):
+    """
+    Messe alle Tilemap- und Entitäten-Benchmarks für die Karte in path
+    heavy: Große Karte -> weniger Wiederholungen für Messungen, die mit der Kartengröße wachsen
+    """
+    results = []
+    rng = random.Random(0)
+    tilemap = game.tilemap
+
+    def record(benchmark, timing):
+        results.append({'map': name, 'tiles': tilemap.tile_count, 'benchmark': benchmark, **timing})
+        print(f"  {benchmark:34}{timing['median_us']:12.2f} µs")
+
+    # Laden
+    print(f"{name}:")
+    record('tilemap.load', measure(lambda: tilemap.load(path), 1, 1 if heavy else 5))
+    print(f"  ({tilemap.tile_count} Kacheln, {len(tilemap.chunks)} Chunks)")
+
+    # Rendern: Kamera an zufälligen Positionen innerhalb der Karte
+    min_x, min_y, max_x, max_y = map_bounds(tilemap)
+    offsets = [(rng.randrange(min_x, max(min_x + 1, max_x - 320)), rng.randrange(min_y, max(min_y + 1, max_y - 240))) for _ in range(64)]
+    offset_iter = iter(offsets * 1000)
+    record('tilemap.render', measure(lambda: tilemap.render(game.display, next(offset_iter)), 50))
+
+    # Übersicht im Editor: Ganze Karte auf der ersten Stufe, auf der sie ins Display passt (siehe scripts/overview.py)
+    # build: Alle Stufen neu aufbauen, render: fertige Stufe zeichnen, edit: eine Kachel ändern und wieder zeichnen
+    overview = MapOverview(tilemap)
+    width, height = game.display.get_size()
+    level = next((level for level in range(overview.levels)
+                  if (max_x - min_x) * overview.scale(level) <= width and (max_y - min_y) * overview.scale(level) <= height), overview.levels - 1)
+    center = ((min_x + max_x) / 2, (min_y + max_y) / 2)
+    record('overview.build', measure(lambda: MapOverview(tilemap).render(game.display, center, level, budget=None), 1, 1 if heavy else 3))
+    overview.render(game.display, center, level, budget=None)
+    record('overview.render', measure(lambda: overview.render(game.display, center, level), 200))
+    edit_iter = itertools.cycle((x // tilemap.tile_size, y // tilemap.tile_size) for x, y in ground_positions(tilemap, 100, rng))
+    def edit_overview():
+        tile_pos = next(edit_iter)
+        if tilemap.cell(*tile_pos):
+            tilemap.remove_tile(tile_pos)
+        else:
+            tilemap.set_tile(tile_pos, 'stone', 0)
+        overview.render(game.display, center, level, budget=None)
+    record('overview.edit', measure(edit_overview, 20))
+    tilemap.load(path)
+
+    # Kollisionsabfragen
+    probes = [(rng.uniform(min_x, max_x), rng.uniform(min_y, max_y)) for _ in range(1000)]
+    probe_iter = iter(probes * 1000)
+    record('tilemap.physics_rects_around', measure(lambda: tilemap.physics_rects_around(next(probe_iter)), 1000))
+
+    # Physik der Entitäten: Gegner laufen auf dem Boden hin und her
+    entities = [Enemy(game, pos, (8, 15), seed=i) for i, pos in enumerate(ground_positions(tilemap, 100, rng))]
+    state = {'frame': 0}
+
+    def update_entities():
+        state['frame'] += 1
+        direction = 1 if (state['frame'] // 60) % 2 else -1
+        for entity in entities:
+            PhysicsEntity.update(entity, tilemap, (direction, 0))
+
+    timing = measure(update_entities, 20)
+    # Pro Entität umrechnen, damit Karten mit wenig Boden vergleichbar bleiben
+    for key in ('median_us', 'min_us'):
+        timing[key] /= max(1, len(entities))
+    record('physics_entity.update', timing)
+
+    # Dieselben Gegner als Batch (NumPy), ebenfalls pro Entität
+    if NUMPY_AVAILABLE and entities:
+        batch = EntityBatch(game, [Enemy(game, pos, (8, 15), seed=i) for i, pos in enumerate(ground_positions(tilemap, 1000, rng))])
+        timing = measure(lambda: batch.update(tilemap), 20)
+        for key in ('median_us', 'min_us'):
+            timing[key] /= len(batch.enemies)
+        record('enemy_batch.update', timing)
+
+    # Speichern im Editor: Kopie der Karte im Haupt-Thread (der Rest läuft im Hintergrund, siehe scripts/autosave.py)
+    autosave = MapAutosave(tilemap, path)
+    record('autosave.snapshot', measure(autosave.snapshot, 1, 1 if heavy else 5))
+    tilemap.edits = None
+
+    # Laden im Binär-Format
+    fd, binary_path = tempfile.mkstemp(suffix=BINARY_EXTENSION)
+    os.close(fd)
+    try:
+        tilemap.save(binary_path)
+        record('tilemap.load_binary', measure(lambda: tilemap.load(binary_path), 1, 1 if heavy else 5))
+    finally:
+        os.remove(binary_path)
+
+    # Suchen wie beim Laden eines Levels (Spawner, Herzen, Ziel-Flagge) über den Index der Tilemap
+    # Aufbau des Index einzeln gemessen, danach kostet jede Suche nur so viel wie die Anzahl der Treffer
+    record('tilemap.build_index', measure(tilemap.build_index, 1, 1 if heavy else 5))
+    queries = [('spawners', 0), ('spawners', 1), ('heart', 0), ('goal', 0)]
+    record('tilemap.extract', measure(lambda: tilemap.extract(queries, keep=True), 20))
+
+    # Autotile (verändert die Varianten -> vor jeder Variante und danach neu laden)
+    record('tilemap.autotile', measure(lambda: tilemap.autotile(vectorized=False), 1, 1 if heavy else 3))
+    if NUMPY_AVAILABLE:
+        tilemap.load(path)
+        record('tilemap.autotile.vectorized', measure(lambda: tilemap.autotile(vectorized=True), 1, 1 if heavy else 3))
+
+    # Autotiling beim Zeichnen im Editor: Eine Kachel setzen/löschen, nur die Kachel und ihre Nachbarn werden angepasst
+    edit_positions = [(x // tilemap.tile_size, y // tilemap.tile_size) for x, y in ground_positions(tilemap, 500, rng)]
+    edit_iter = itertools.cycle(edit_positions)
+    def edit():
+        tile_pos = next(edit_iter)
+        if tilemap.cell(*tile_pos):
+            tilemap.remove_tile(tile_pos, autotile=True)
+        else:
+            tilemap.set_tile(tile_pos, 'grass', 0, autotile=True)
+    record('tilemap.autotile_cells', measure(edit, 500, 5))
+
+    # Bereichs-Operationen (Editor, Level-Generatoren): 500x100 Kacheln rechts neben der Karte
+    # füllen, hin und her verschieben und per Flood-Fill abwechselnd in Stein/Gras umwandeln
+    min_x, min_y, max_x, max_y = map_bounds(tilemap)
+    rect = [max_x // tilemap.tile_size + 16, min_y // tilemap.tile_size, 500, 100]
+    record('tilemap.fill_rect', measure(lambda: tilemap.fill_rect(rect, 'stone', 0), 1, 5))
+    positions = itertools.cycle([(rect[0] + 20, rect[1] + 10), (rect[0], rect[1])])
+    def move():
+        pos = next(positions)
+        tilemap.move_rect(tuple(rect), pos)
+        rect[:2] = pos
+    record('tilemap.move_rect', measure(move, 1, 6))
+    tile_types = itertools.cycle(['grass', 'stone'])
+    record('tilemap.flood_fill', measure(lambda: tilemap.flood_fill((rect[0], rect[1]), next(tile_types), 0), 1, 6))
+    tilemap.load(path)
+
+    return results
+
+
+def bench_clouds(game):
+    """ Messe Update und Rendern der Wolken (unabhängig von der Karte), auch für einen dichten Himmel mit 1000 Wolken """
+    results = []
+    offset_iter = iter([(i, i // 2) for i in range(100000)])
+    many = Clouds(game.asset_manager.images('clouds'), count=1000)
+    many.render(game.display)       # Streifen der Bänder einmalig vorzeichnen (nicht mitmessen)
+    for benchmark, func in [('clouds.update', game.clouds.update), ('clouds.render', lambda: game.clouds.render(game.display, next(offset_iter))),
+                            ('clouds.update.1000', many.update), ('clouds.render.1000', lambda: many.render(game.display, next(offset_iter)))]:
+        timing = measure(func, 200)
+        results.append({'map': None, 'tiles': 0, 'benchmark': benchmark, **timing})
+        print(f"  {benchmark:34}{timing['median_us']:12.2f} µs")
+    return results
+
+
+def bench_frame(game):
+    """
+    Messe Zeichnen und Übergabe an das Fenster für ein ganzes Bild (Level 1, siehe Game.render und scripts/redraw.py)
+    full: Kachel-Ebene wird jedes Mal komplett neu gezeichnet und das ganze Bild vergrößert (wie ohne Zwischenspeicher)
+    idle: Kamera steht still, nur Wolken bewegen sich
+    pan: Kamera bewegt sich langsam (1 Pixel alle 2 Frames)
+    """
+    results = []
+
+    def present():
+        game.presenter.present(game.display, None if game.dirty.full else game.dirty.rects)
+
+    def full():
+        game.world_layer.offset = None
+        game.render()
+        present()
+
+    def idle():
+        game.clouds.update()
+        game.render()
+        present()
+
+    def pan():
+        game.scroll[0] += 0.5
+        game.prev_scroll[0] = game.scroll[0]
+        idle()
+
+    for benchmark, func in [('frame.full', full), ('frame.idle', idle), ('frame.pan', pan)]:
+        game.render()
+        timing = measure(func, 200)
+        results.append({'map': None, 'tiles': 0, 'benchmark': benchmark, **timing})
+        print(f"  {benchmark:34}{timing['median_us']:12.2f} µs")
+    return results
+
+
+def bench_present(game):
+    """
+    Messe das Vergrößern des ganzen Displays auf das Fenster für jede Art der Vergrößerung (siehe scripts/present.py)
+    present.allocate: Wie früher mit neuer Fläche pro Frame (pygame.transform.scale ohne Ziel), zum Vergleich
+    """
+    results = []
+
+    def record(benchmark, timing):
+        results.append({'map': None, 'tiles': 0, 'benchmark': benchmark, **timing})
+        print(f"  {benchmark:34}{timing['median_us']:12.2f} µs")
+
+    size = game.display.get_size()
+    # Alle Arten in einem 1280x720-Fenster (scaled bestimmt die Fenstergröße selbst), dazu integer in der Standard-Größe
+    sizes = [('integer', None)] + [(mode, None if mode == 'scaled' else (1280, 720)) for mode in PRESENT_MODES]
+    for mode, window_size in sizes:
+        presenter = Presenter(size, window_size, mode)
+        if presenter.mode != mode:
+            continue
+        width, height = presenter.screen.get_size()
+        record(f'present.{mode}.{width}x{height}', measure(lambda: presenter.present(game.display), 200))
+
+    screen = pygame.display.get_surface()
+    record('present.allocate', measure(lambda: screen.blit(pygame.transform.scale(game.display, screen.get_size()), (0, 0)), 200))
+
+    # Fenster wieder wie im Spiel
+    game.presenter = Presenter(size)
+    return results
+
+
+def metadata():
+    """ Informationen zur Umgebung, damit Ergebnisse zugeordnet werden können """
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'pygame': pygame.version.ver,
+        'platform': platform.platform(),
+    }
+
+
+def compare(old_path, new_path):
+    """ Vergleiche zwei Ergebnis-Dateien und gib die relative Änderung des Medians aus """
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+
+    old_results = {(r['map'], r['benchmark']): r for r in old['results']}
+    print(f"{old['meta']['commit']} -> {new['meta']['commit']}")
+    for r in new['results']:
+        key = (r['map'], r['benchmark'])
+        if key not in old_results:
+            continue
+        before = old_results[key]['median_us']
+        change = (r['median_us'] - before) / before * 100 if before else 0.0
+        print(f"{str(r['map']):24}{r['benchmark']:34}{before:12.2f} -> {r['median_us']:12.2f} µs ({change:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--out', default='bench_results.json', help='Ausgabe-Datei (JSON)')
+    parser.add_argument('--sizes', type=int, nargs='*', default=SYNTHETIC_SIZES, help='Größen der synthetischen Karten (Anzahl Kacheln)')
+    parser.add_argument('--no-maps', action='store_true', help='Karten aus data/maps überspringen')
+    parser.add_argument('--compare', nargs=2, metavar=('ALT', 'NEU'), help='Zwei Ergebnis-Dateien vergleichen')
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    # Fester Seed: Wolken und Gegner verhalten sich bei jedem Lauf gleich (vergleichbare Ergebnisse)
+    game = Game(headless=True, seed=0)
+    results = bench_clouds(game)
+    results += bench_frame(game)
+    results += bench_present(game)
+
+    if not args.no_maps:
+        for path in sorted(glob.glob(MAP_GLOB)):
+            results += bench_map(game, os.path.basename(path), path, heavy=False)
+
+    for size in args.sizes:
+        path = write_synthetic_map(size)
+        try:
+            results += bench_map(game, f'synthetic_{size}', path, heavy=size >= 100_000)
+        finally:
+            os.remove(path)
+
+    with open(args.out, 'w') as f:
+        json.dump({'meta': metadata(), 'results': results}, f, indent=1)
+    print(f"Ergebnisse gespeichert: {args.out}")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,114 @@
+"""
+Mikro-Benchmark: Speicher der Tilemap (Chunk-Arrays) gegen das alte Layout ("x;y"-String-Keys mit Dictionaries)
+
+Aufruf (aus dem Projekt-Ordner):
+    python -m benchmarks.tilemap_storage
+    python -m benchmarks.tilemap_storage --tiles 100000
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import time
+import tracemalloc
+
+import pygame
+
+from benchmarks.maps import write_synthetic_map
+from scripts.tilemap import Tilemap, NEIGHBOR_OFFSET, PHYSICS_TILES
+
+MAP_PATH = './data/maps/0.json'
+
+
+class LegacyTilemap:
+    """ Nachbau des alten Layouts: {"x;y": {'type', 'variant', 'pos'}} """
+    def __init__(self, data):
+        self.tile_size = data['tile_size']
+        self.tilemap = data['tilemap']
+
+    def physics_rects_around(self, pos):
+        rects = []
+        tiles_loc = (int(pos[0] // self.tile_size), int(pos[1] // self.tile_size))
+        for offset in NEIGHBOR_OFFSET:
+            check_loc = str(tiles_loc[0] + offset[0]) + ';' + str(tiles_loc[1] + offset[1])
+            if check_loc in self.tilemap:
+                tile = self.tilemap[check_loc]
+                if tile['type'] in PHYSICS_TILES:
+                    rects.append(pygame.Rect(tile['pos'][0] * self.tile_size, tile['pos'][1] * self.tile_size, self.tile_size, self.tile_size))
+        return rects
+
+    def solid_check(self, pos):
+        tile_loc = str(int(pos[0] // self.tile_size)) + ';' + str(int(pos[1] // self.tile_size))
+        if tile_loc in self.tilemap:
+            if self.tilemap[tile_loc]['type'] in PHYSICS_TILES:
+                return self.tilemap[tile_loc]
+
+
+def measure_memory(build):
+    """ Gibt das Objekt von build() und den Speicher zurück, den es nach dem Aufbau belegt (in Bytes) """
+    gc.collect()
+    tracemalloc.start()
+    obj = build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return obj, size
+
+
+def measure_time(func, probes, repeat=5):
+    """ Beste Laufzeit (Sekunden) für einen Aufruf von func für jede Position in probes """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for pos in probes:
+            func(pos)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--map', default=MAP_PATH, help='Karte im JSON-Format')
+    parser.add_argument('--tiles', type=int, default=0, help='Synthetische Karte mit dieser Anzahl Kacheln statt --map')
+    parser.add_argument('--probes', type=int, default=50000, help='Anzahl Abfragen pro Messung')
+    args = parser.parse_args()
+
+    if args.tiles:
+        path = write_synthetic_map(args.tiles)
+    else:
+        path = args.map
+    text = open(path).read()
+
+    legacy, legacy_mem = measure_memory(lambda: LegacyTilemap(json.loads(text)))
+
+    def load_tilemap():
+        tilemap = Tilemap(None)
+        tilemap.load(path)
+        return tilemap
+
+    tilemap, chunk_mem = measure_memory(load_tilemap)
+    if args.tiles:
+        os.remove(path)
+
+    # Abfrage-Positionen im Bereich der Karte
+    xs = [int(key.split(';')[0]) for key in legacy.tilemap]
+    ys = [int(key.split(';')[1]) for key in legacy.tilemap]
+    rng = random.Random(1)
+    bounds = (min(xs), max(xs), min(ys), max(ys))
+    probes = [(rng.uniform(bounds[0], bounds[1]) * 16, rng.uniform(bounds[2], bounds[3]) * 16) for _ in range(args.probes)]
+
+    print(f"Karte: {path if not args.tiles else 'synthetisch'} ({len(legacy.tilemap)} Kacheln, {len(tilemap.chunks)} Chunks)")
+    print(f"{'':24}{'alt':>14}{'chunks':>14}{'faktor':>10}")
+    rows = [
+        ('Speicher (KiB)', legacy_mem / 1024, chunk_mem / 1024),
+        ('Bytes pro Kachel', legacy_mem / len(legacy.tilemap), chunk_mem / len(legacy.tilemap)),
+        ('physics_rects_around (µs)', measure_time(legacy.physics_rects_around, probes) / len(probes) * 1e6, measure_time(tilemap.physics_rects_around, probes) / len(probes) * 1e6),
+        ('solid_check (µs)', measure_time(legacy.solid_check, probes) / len(probes) * 1e6, measure_time(tilemap.solid_check, probes) / len(probes) * 1e6),
+    ]
+    for name, old, new in rows:
+        print(f"{name:24}{old:14.2f}{new:14.2f}{old / new:9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
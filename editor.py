@@ -2,10 +2,13 @@ import sys
 
 import pygame
 
-from scripts.utils import load_images, load_image
+from scripts.assets import AssetManager
+from scripts.autosave import MapAutosave
+from scripts.overview import MapOverview
 from scripts.tilemap import Tilemap
+from scripts.present import Presenter
 
-RENDER_SCALE = 2.0
+UNIQUE_TILES = [('goal', 0), ('spawners', 0)]      # Kacheln, die es auf einer Karte nur einmal geben darf (Ziel-Flagge, Spieler-Spawner)
 
 class Editor:
     def __init__(self):
@@ -14,21 +17,22 @@ class Editor:
 
         # Erstelle Fenster
         pygame.display.set_caption("Map Editor")            # Fenstername festlegen
-        self.screen = pygame.display.set_mode((640, 480))   # Legt die Fenstergröße fest
         self.display = pygame.Surface((320, 240))           # Erstellt eine Fläche
+        self.presenter = Presenter(self.display.get_size()) # Erstellt das Fenster (640x480, siehe scripts/present.py)
 
         # Lege FPS fest
         self.clock = pygame.time.Clock()
 
         # Lade Assets (Bilder)
+        self.asset_manager = AssetManager()
         self.assets = {
-            'decor': load_images('tiles/decor'),
-            'grass': load_images('tiles/grass'),
-            'large_decor': load_images('tiles/large_decor'),
-            'stone': load_images('tiles/stone'),
-            'spawners': load_images('tiles/spawners'),
-            'goal': [load_images('tiles/goal')[0]], # Benutze nur die erste Flagge, ohne Fahne für den Editor / Zweite Flagge mit Fahne wird im Spiel verwendet, wenn Spiel gewonnen werden kann
-            'heart': load_images('tiles/heart'),
+            'decor': self.asset_manager.images('tiles/decor'),
+            'grass': self.asset_manager.images('tiles/grass'),
+            'large_decor': self.asset_manager.images('tiles/large_decor'),
+            'stone': self.asset_manager.images('tiles/stone'),
+            'spawners': self.asset_manager.images('tiles/spawners'),
+            'goal': [self.asset_manager.image('tiles/goal/0.png')], # Benutze nur die erste Flagge, ohne Fahne für den Editor / Zweite Flagge mit Fahne wird im Spiel verwendet, wenn Spiel gewonnen werden kann
+            'heart': self.asset_manager.images('tiles/heart'),
         }
 
         self.level = 10
@@ -37,11 +41,17 @@ class Editor:
         self.movement = [False, False, False, False]    # [hoch, runter, links, rechts]
         self.scroll = [0, 0]                            # [x, y]
 
+        self.map_path = f'./data/maps/{self.level}.json'
         self.tilemap = Tilemap(self, tile_size=16)
         try:
-            self.tilemap.load(f'./data/maps/{self.level}.json')
+            self.tilemap.load(self.map_path)
         except:
             print(FileNotFoundError("WARNUNG: Karte map.json nicht gefunden! - Starte mit leerer Karte"))
+
+        # Speichern im Hintergrund (alle 60 Sekunden und mit Taste O), Änderungen dazwischen im Journal (siehe scripts/autosave.py)
+        # Änderungen, die nach einem Absturz nur im Journal stehen, werden wiederhergestellt
+        self.autosave = MapAutosave(self.tilemap, self.map_path)
+        self.autosave.recover()
         
         self.tile_list = list(self.assets)
         self.tile_group = 0
@@ -50,72 +60,103 @@ class Editor:
         self.clicking = False
         self.right_clicking = False
         self.shift = False
-
-        self.num_goals = 0
-        self.num_player = 0
+        self.ctrl = False
+        self.live_autotile = True       # Gras und Stein beim Zeichnen automatisch anpassen (nur die Kachel und ihre Nachbarn)
+
+        # Auswahl (Strg + Linksklick ziehen) für die Bereichs-Operationen der Tilemap (Füllen, Löschen, Kopieren, Verschieben)
+        self.selection = None           # [Start-Kachel, End-Kachel] (beide gehören zur Auswahl)
+        self.selecting = False
+        self.clipboard = None           # Kopierter Bereich (Tilemap.copy_rect)
+
+        # Übersicht (Taste -: herauszoomen, Taste +: hineinzoomen, Linksklick: an diese Stelle springen), siehe scripts/overview.py
+        self.overview = MapOverview(self.tilemap)
+        self.zoom = None                # Stufe der Übersicht (None = normale Ansicht 1:1)
+
+    def selection_rect(self):
+        """ Auswahl als Bereich (x, y, w, h) in Kachel-Koordinaten (None, wenn nichts ausgewählt ist) """
+        if self.selection is None:
+            return None
+        (x0, y0), (x1, y1) = self.selection
+        return (min(x0, x1), min(y0, y1), abs(x1 - x0) + 1, abs(y1 - y0) + 1)
+
+    def unique_tile(self, tile_type, tile_variant):
+        """ Ziel-Flagge und Spieler-Spawner darf es nur einmal geben -> nicht flächig setzen """
+        if (tile_type, tile_variant) in UNIQUE_TILES:
+            print("WARNUNG: Ziel-Flagge und Spieler-Spawner können nur einzeln gesetzt werden")
+            return True
+        return False
 
     def run(self):
         # Hauptspiel-Schleife
         while True:
             self.display.fill((0, 0, 0))
 
-            # Bewegung der Kamera
-            self.scroll[0] += (self.movement[1] - self.movement[0]) * 2
-            self.scroll[1] += (self.movement[3] - self.movement[2]) * 2
+            # Bewegung der Kamera (in der Übersicht gleich schnell auf dem Bildschirm -> größere Schritte in der Welt)
+            speed = 2 if self.zoom is None else 2 / self.overview.scale(self.zoom)
+            self.scroll[0] += (self.movement[1] - self.movement[0]) * speed
+            self.scroll[1] += (self.movement[3] - self.movement[2]) * speed
             render_scroll = (int(self.scroll[0]), int(self.scroll[1]))
+            # Mitte der normalen Ansicht = Mitte der Übersicht
+            center = (self.scroll[0] + self.display.get_width() / 2, self.scroll[1] + self.display.get_height() / 2)
 
             # Aktuelle Kachel im Editor anzeigen (oben links)
             current_tile_img = self.assets[self.tile_list[self.tile_group]][self.tile_variant].copy()
             current_tile_img.set_alpha(150)
 
             # Maus Position
-            mpos = pygame.mouse.get_pos()
-            mpos = (mpos[0] / RENDER_SCALE, mpos[1] / RENDER_SCALE)
+            mpos = self.presenter.to_display(pygame.mouse.get_pos())
             
             # Maus Position in Kachel Position umwandeln
             tile_pos = (int(mpos[0] + self.scroll[0]) // self.tilemap.tile_size, int(mpos[1] + self.scroll[1]) // self.tilemap.tile_size)
             self.display.blit(current_tile_img, mpos)
 
+            # Auswahl folgt der Maus, solange gezogen wird
+            if self.selecting:
+                self.selection[1] = tile_pos
+
             # ================================================================================================
             # Zeichne Kacheln
             # Setze Kachel an Maus-Position (Links-Klick)
-            if self.clicking:
+            if self.clicking and self.zoom is None:
                 tile_type = self.tile_list[self.tile_group]
                 tile_variant = self.tile_variant
 
-                # Prüfe, ob Ziel-Flagge bereits gesetzt wurde
-                if tile_type == 'goal' and tile_variant == 0:
-                    if self.num_goals == 0:
-                        self.num_goals = 1
-                    else:
-                        # Wenn Ziel-Flagge bereits gesetzt wurde, dann entferne die Ziel-Flagge, um nur eine Ziel-Flagge zu haben
-                        self.num_goals = 0
-                        self.tilemap.extract([('goal', 0)], keep=False)
-
-                # Prüfe, ob Spieler-Spawner bereits gesetzt wurde
-                if tile_type == 'spawners' and tile_variant == 0:
-                    if self.num_player == 0:
-                        self.num_player = 1
-                    else:
-                        # Wenn Spieler-Spawner bereits gesetzt wurde, dann entferne den Spieler-Spawner, um nur einen Spieler-Spawner zu haben
-                        self.num_player = 0
-                        self.tilemap.extract([('spawners', 0)], keep=False)        
+                # Ziel-Flagge und Spieler-Spawner gibt es nur einmal: Vorhandene an anderer Stelle entfernen
+                # Die Suche geht über den Index der Tilemap und kostet nur so viel wie die Anzahl der Treffer
+                if (tile_type, tile_variant) in UNIQUE_TILES:
+                    for tile in self.tilemap.extract([(tile_type, tile_variant)], keep=True):
+                        pos = (tile['pos'][0] // self.tilemap.tile_size, tile['pos'][1] // self.tilemap.tile_size)
+                        if pos != tile_pos:
+                            self.tilemap.remove_tile(pos)
 
-                self.tilemap.tilemap[str(tile_pos[0]) + ';' + str(tile_pos[1])] = {'type': self.tile_list[self.tile_group], 'variant': self.tile_variant, 'pos': list(tile_pos)}
+                # Setze Kachel über die Tilemap, damit nur der betroffene Chunk neu gezeichnet wird
+                self.tilemap.set_tile(tile_pos, self.tile_list[self.tile_group], self.tile_variant, autotile=self.live_autotile)
                     
 
             # Lösche Kachel bei Rechtsklick
-            if self.right_clicking:
-                tile_loc = str(tile_pos[0]) + ';' + str(tile_pos[1])
-                if tile_loc in self.tilemap.tilemap:
-                    del self.tilemap.tilemap[tile_loc]
-
-            # Zeichne alle aktuellen Kacheln (Karte)
-            self.tilemap.render(self.display, offset=render_scroll)
+            if self.right_clicking and self.zoom is None:
+                self.tilemap.remove_tile(tile_pos, autotile=self.live_autotile)
+
+            if self.zoom is None:
+                # Zeichne alle aktuellen Kacheln (Karte)
+                self.tilemap.render(self.display, offset=render_scroll)
+            else:
+                # Zeichne die verkleinerte Karte und einen Rahmen um den Bereich der normalen Ansicht
+                size = self.display.get_size()
+                self.overview.render(self.display, center, self.zoom)
+                x, y = self.overview.to_screen(self.scroll, size, center, self.zoom)
+                scale = self.overview.scale(self.zoom)
+                pygame.draw.rect(self.display, (255, 255, 255), (x, y, max(1, size[0] * scale), max(1, size[1] * scale)), 1)
 
             # Zeichne aktuelle Kachel auf Display (oben links)
             self.display.blit(current_tile_img, (5, 5))
 
+            # Zeichne Rahmen um die Auswahl
+            rect = self.selection_rect()
+            if rect is not None and self.zoom is None:
+                size = self.tilemap.tile_size
+                pygame.draw.rect(self.display, (255, 255, 255), (rect[0] * size - render_scroll[0], rect[1] * size - render_scroll[1], rect[2] * size, rect[3] * size), 1)
+
 
             # ================================================================================================
             # Event-Handling (Eingaben von Tastatur, Maus, etc.)
@@ -123,13 +164,27 @@ class Editor:
             for event in pygame.event.get():
                 # Beende Editor mit Fenster schließen oder ESC-Taste
                 if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                    self.autosave.close()
                     pygame.quit()
                     sys.exit()
 
+                # Fenstergröße wurde verändert -> Zielbereich der Vergrößerung neu berechnen
+                if event.type == pygame.VIDEORESIZE:
+                    self.presenter.resize()
+
 
                 # Maus-Events drücken
                 if event.type == pygame.MOUSEBUTTONDOWN:
-                    if event.button == 1:
+                    if event.button == 1 and self.zoom is not None:
+                        # Linksklick in der Übersicht: Normale Ansicht an dieser Stelle (in der Mitte) öffnen
+                        world = self.overview.to_world(mpos, self.display.get_size(), center, self.zoom)
+                        self.scroll = [world[0] - self.display.get_width() / 2, world[1] - self.display.get_height() / 2]
+                        self.zoom = None
+                    elif event.button == 1 and self.ctrl:
+                        # Strg + Linksklick: Auswahl beginnen
+                        self.selection = [tile_pos, tile_pos]
+                        self.selecting = True
+                    elif event.button == 1:
                         # Linksklick drücken
                         self.clicking = True
                     if event.button == 3:
@@ -159,6 +214,7 @@ class Editor:
                     if event.button == 1:
                         # Linksklick loslassen
                         self.clicking = False
+                        self.selecting = False
                     if event.button == 3:
                         # Rechtsklick loslassen
                         self.right_clicking = False
@@ -181,12 +237,51 @@ class Editor:
                     if event.key == pygame.K_LSHIFT:
                         # Verändere die Variation der Kachel (Gras 1, Gras 2, ...)
                         self.shift = True
+                    if event.key == pygame.K_LCTRL:
+                        # Auswahl mit der Maus
+                        self.ctrl = True
                     if event.key == pygame.K_o:
-                        # Speichere die aktuelle Karte
-                        self.tilemap.save(f'./data/maps/{self.level}.json')
+                        # Speichere die aktuelle Karte (im Hintergrund, der Editor läuft weiter)
+                        self.autosave.request_save()
                     if event.key == pygame.K_t:
                         # Starte autotiling (automatisches Füllen der Kacheln)
                         self.tilemap.autotile()
+                    if event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                        # Herauszoomen (Übersicht, jede Stufe halbiert die Größe)
+                        self.zoom = 0 if self.zoom is None else min(self.zoom + 1, self.overview.levels - 1)
+                    if event.key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS) and self.zoom is not None:
+                        # Hineinzoomen (nach der ersten Stufe zurück zur normalen Ansicht)
+                        self.zoom = None if self.zoom == 0 else self.zoom - 1
+                    if event.key == pygame.K_l:
+                        # Autotiling beim Zeichnen ein-/ausschalten (aus: Variante mit Shift + Mausrad selbst wählen)
+                        self.live_autotile = not self.live_autotile
+                        print(f"Autotiling beim Zeichnen: {'an' if self.live_autotile else 'aus'}")
+
+                    # Bereichs-Operationen (alle Kacheln auf einmal, siehe Tilemap.fill_rect usw.), nicht in der Übersicht
+                    tile_type = self.tile_list[self.tile_group]
+                    rect = self.selection_rect() if self.zoom is None else None
+                    if event.key == pygame.K_f and rect is not None and not self.unique_tile(tile_type, self.tile_variant):
+                        # Auswahl mit der aktuellen Kachel füllen
+                        self.tilemap.fill_rect(rect, tile_type, self.tile_variant, autotile=self.live_autotile)
+                    if event.key in (pygame.K_DELETE, pygame.K_BACKSPACE) and rect is not None:
+                        # Auswahl leeren
+                        self.tilemap.clear_rect(rect, autotile=self.live_autotile)
+                    if event.key == pygame.K_c and rect is not None:
+                        # Auswahl kopieren
+                        self.clipboard = self.tilemap.copy_rect(rect)
+                    if event.key == pygame.K_v and self.clipboard is not None and self.zoom is None:
+                        # Kopie an der Maus-Position einfügen (mit Shift: leere Kacheln der Kopie überschreiben nichts)
+                        self.tilemap.paste(self.clipboard, tile_pos, transparent=self.shift, autotile=self.live_autotile)
+                    if event.key == pygame.K_m and rect is not None:
+                        # Auswahl an die Maus-Position verschieben
+                        self.tilemap.move_rect(rect, tile_pos, autotile=self.live_autotile)
+                        self.selection = [tile_pos, (tile_pos[0] + rect[2] - 1, tile_pos[1] + rect[3] - 1)]
+                    if event.key == pygame.K_b and self.zoom is None and not self.unique_tile(tile_type, self.tile_variant):
+                        # Zusammenhängende Fläche an der Maus-Position füllen
+                        self.tilemap.flood_fill(tile_pos, tile_type, self.tile_variant, autotile=self.live_autotile)
+                    if event.key == pygame.K_x:
+                        # Auswahl aufheben
+                        self.selection = None
 
                 # Taste loslassen
                 if event.type == pygame.KEYUP:
@@ -205,19 +300,24 @@ class Editor:
                     if event.key == pygame.K_LSHIFT:#
                         # Beende Veränderung der Variation der Kachel
                         self.shift = False
+                    if event.key == pygame.K_LCTRL:
+                        # Beende Auswahl mit der Maus
+                        self.ctrl = False
+
 
 
+            # Fällige Speicherungen im Hintergrund starten
+            self.autosave.update()
 
             # ================================================================================================
             # Zeichne Display auf Fenster
             # Vergrößere die Anzeige und zeichne sie auf das Fenster
             # Dadurch wird der Pixel-Effekt erzeugt, in dem alle Elemente vergrößert werden
-            # Vergrößere display auf die Größe von screen und zeichne es auf screen
-            # Von 320x240 -> 640x480
-            self.screen.blit(pygame.transform.scale(self.display, self.screen.get_size()), (0, 0))
+            # Vergrößere display auf die Größe des Fensters (z.B. von 320x240 -> 640x480)
+            self.presenter.present(self.display)
             
             # Update den Bildschirm (Zeige alle gezcihneten Elemente an) 
-            pygame.display.update()
+            self.presenter.flip()
             
             # Setze die FPS auf 60
             self.clock.tick(60)
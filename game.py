@@ -1,49 +1,105 @@
+import argparse
+import hashlib
+import os
+import random
+import struct
 import sys
+import time
 
 import pygame
 
-from scripts.utils import load_image, load_images, Animation, GoalFlag, LiveHeart, Heart
+from scripts.assets import AssetManager
+from scripts.mapformat import BINARY_EXTENSION
+from scripts.utils import GoalFlag, LiveHeart, Heart
 from scripts.tilemap import Tilemap
 from scripts.clouds import Clouds
 from scripts.entities import Player, Enemy
+from scripts.profiler import FrameProfiler
+from scripts.snapshot import LevelSnapshot
+from scripts.prefetch import LevelPrefetcher, PreparedLevel
+from scripts.batch import EntityBatch, MIN_BATCH_SIZE, NUMPY_AVAILABLE
+from scripts.spatial import SpatialHash
+from scripts.activity import ActivityScheduler
+from scripts.timestep import FixedTimestep
+from scripts.redraw import WorldLayer, Backdrop, DirtyRects
+from scripts.present import Presenter, PRESENT_MODES
+from scripts.replay import InputLog, INPUT_LEFT, INPUT_RIGHT, INPUT_JUMP, DIGEST_SIZE, encode_inputs, decode_inputs
+from scripts.rng import MASK64, derive_seed
 
 
 class Game:
-    def __init__(self):
+    def __init__(self, headless=False, atlas=False, stream=False, prefetch=True, batch=MIN_BATCH_SIZE, activity=True, window_size=None, present='integer',
+                 seed=None):
+        """
+        headless: Ohne sichtbares Fenster starten (SDL dummy-Treiber), z.B. für Tests, Bots und Benchmarks
+                  --> Spiel wird dann über step() gesteuert
+        atlas: Alle Kacheln und Animations-Bilder in einen Textur-Atlas packen
+        stream: Binär-Karten nicht komplett laden, sondern Chunks um Kamera und Entitäten nachladen (für sehr große Karten)
+        prefetch: Das nächste Level schon während des Spielens im Hintergrund laden
+        batch: Ab dieser Anzahl Gegner werden alle Gegner gemeinsam mit NumPy berechnet (scripts/batch.py), None = nie
+        activity: Nur Gegner in der Nähe der Kamera berechnen, alle anderen schlafen (scripts/activity.py)
+        window_size: Größe des Fensters (Breite, Höhe), None = doppelte Größe des Displays
+        present: Art der Vergrößerung auf das Fenster (siehe scripts/present.py)
+        seed: Startwert aller Zufallszahlen (Wolken, Gegner) - gleicher Seed + gleiche Eingaben = gleiches Spiel, None = zufällig
+        """
+        self.headless = headless
+        self.stream = stream
+        if headless:
+            os.environ['SDL_VIDEODRIVER'] = 'dummy'
+
         # Initialisiere Pygame
         pygame.init()
 
         # Erstelle Fenster
         pygame.display.set_caption("Jump N Run")            # Fenstername festlegen
-        self.screen = pygame.display.set_mode((640, 480))   # Legt die Fenstergröße fest
         self.display = pygame.Surface((320, 240))           # Erstellt eine Fläche
+        self.presenter = Presenter(self.display.get_size(), window_size, present)   # Erstellt das Fenster (Standard: 640x480)
+
+        # Kacheln werden in einer eigenen Ebene zwischengespeichert und beim Scrollen nur verschoben (siehe scripts/redraw.py)
+        self.world_layer = WorldLayer(self.display.get_size())
+        self.backdrop = Backdrop(self.display.get_size())     # Hintergrund, Wolken und Kacheln fertig zusammengesetzt
+        self.dirty = DirtyRects(self.display.get_size())    # Geänderte Bereiche des Displays (nur diese gehen an das Fenster)
 
-        # Lege FPS fest
+        # Lege FPS fest: Die Simulation läuft mit festen 60 Ticks pro Sekunde, gezeichnet wird so oft wie möglich (siehe run())
         self.clock = pygame.time.Clock()
+        self.timestep = FixedTimestep(tick_rate=60)
 
         # Bewegung des Bildschirms
         self.movement = [False, False]
+        self.jump_pressed = False       # Sprung-Taste seit dem letzten Tick gedrückt (wird im nächsten Tick ausgeführt)
+
+        # Aufnahme und Wiedergabe der Eingaben pro Tick (siehe scripts/replay.py)
+        # Auf 64 Bit begrenzen (so steht der Seed auch in der Aufnahme) - Wolken, Gegner und Datei sehen denselben Wert
+        self.seed = (seed if seed is not None else random.getrandbits(32)) & MASK64
+        self.recording = None           # InputLog, an das jeder Tick angehängt wird (None = keine Aufnahme)
+        self.record_path = None         # Datei, in die die Aufnahme beim Beenden geschrieben wird
+        self.replay = None              # InputLog, aus dem die Eingaben jedes Ticks kommen (None = Tastatur)
+
+        # Lade Assets (Bilder) - jedes Bild wird nur einmal geladen und von allen Objekten geteilt
+        self.asset_manager = AssetManager()
+        if atlas:
+            self.asset_manager.preload()
+            self.asset_manager.pack()
 
-        # Lade Assets (Bilder)
         self.assets = {
-            'decor': load_images('tiles/decor'),
-            'grass': load_images('tiles/grass'),
-            'large_decor': load_images('tiles/large_decor'),
-            'stone': load_images('tiles/stone'),
-            'player': load_image('entities/player.png'),
-            'background': load_image('background.png'),
-            'enemy/idle': Animation(load_images('entities/enemy/idle'), img_duration=6),
-            'enemy/run': Animation(load_images('entities/enemy/run'), img_duration=4),
-            'player/idle': Animation(load_images('entities/player/idle'), img_duration=6),
-            'player/run': Animation(load_images('entities/player/run'), img_duration=4),
-            'player/jump': Animation(load_images('entities/player/jump')),
-            'spawners': load_images('tiles/spawners'),
-            'goal': load_images('tiles/goal'),
-            'heart': load_images('tiles/heart'),
+            'decor': self.asset_manager.images('tiles/decor'),
+            'grass': self.asset_manager.images('tiles/grass'),
+            'large_decor': self.asset_manager.images('tiles/large_decor'),
+            'stone': self.asset_manager.images('tiles/stone'),
+            'player': self.asset_manager.image('entities/player.png'),
+            'background': self.asset_manager.image('background.png'),
+            'enemy/idle': self.asset_manager.animation('entities/enemy/idle', img_duration=6),
+            'enemy/run': self.asset_manager.animation('entities/enemy/run', img_duration=4),
+            'player/idle': self.asset_manager.animation('entities/player/idle', img_duration=6),
+            'player/run': self.asset_manager.animation('entities/player/run', img_duration=4),
+            'player/jump': self.asset_manager.animation('entities/player/jump'),
+            'spawners': self.asset_manager.images('tiles/spawners'),
+            'goal': self.asset_manager.images('tiles/goal'),
+            'heart': self.asset_manager.images('tiles/heart'),
         }
 
         # Initialisiere Wolken
-        self.clouds = Clouds(load_images('clouds'), count=16)
+        self.clouds = Clouds(self.asset_manager.images('clouds'), count=16, rng=random.Random(self.seed))
 
         # Initialisiere Tilemap
         self.tilemap = Tilemap(self, tile_size=16)
@@ -54,172 +110,604 @@ class Game:
         # Max Levvel
         self.max_level = 3
 
+        # Anzahl berechneter Ticks (Frames) seit Spielstart
+        self.ticks = 0
+
+        # Gegner als Batch berechnen (nur mit NumPy)
+        self.batch_size = batch if NUMPY_AVAILABLE else None
+        self.enemy_batch = None
+
+        # Raster für Überlappungs-Tests mit dem Spieler (siehe scripts/spatial.py)
+        self.enemy_grid = SpatialHash()         # Gegner (werden jeden Tick aktualisiert)
+        self.trigger_grid = SpatialHash()       # Herzen und Ziel-Flagge (bewegen sich nicht)
+
+        # Aktivitäts-Bereich um die Kamera (None = alle Gegner sind immer wach)
+        self.activity = ActivityScheduler() if activity else None
+        self.active_enemies = []
+
+        # Nächstes Level im Hintergrund laden (siehe scripts/prefetch.py)
+        self.prefetcher = LevelPrefetcher(self.prepare_level) if prefetch else None
+        self.transition_ms = 0.0        # Dauer des letzten Level-Wechsels
+
+        # Zeitmessung der einzelnen Phasen pro Frame (Overlay mit F3)
+        self.profiler = FrameProfiler()
+        self.profile_path = None        # Datei (.csv/.json), in die das Profil beim Beenden geschrieben wird
+
         # Lade Spiel/Level
         self.load_game(id=self.level)
 
 
-    def load_game(self, id=0):
-        """ Lade das Spiel/Level"""
-
-        self.tilemap.load(f'./data/maps/{id}.json')
+    def map_path(self, id):
+        """
+        Pfad der Karte zu Level id
+        Die Binär-Karte (.bmap, siehe scripts/mapformat.py) lädt deutlich schneller und wird verwendet,
+        wenn sie existiert und nicht älter als die JSON-Karte ist (der Editor speichert JSON)
+        """
+        json_path = f'./data/maps/{id}.json'
+        binary_path = f'./data/maps/{id}{BINARY_EXTENSION}'
+        if os.path.exists(binary_path) and (not os.path.exists(json_path) or os.path.getmtime(binary_path) >= os.path.getmtime(json_path)):
+            return binary_path
+        return json_path
+
+    def prepare_level(self, id):
+        """
+        Lade Level id in eine neue Karte und erzeuge alle Objekte (Spieler, Gegner, Herzen, Ziel-Flagge)
+        Der Zustand des Spiels wird nicht verändert -> kann im Hintergrund-Thread laufen (siehe scripts/prefetch.py)
+        Alle Objekte nehmen ihre Bilder aus self.assets (im Haupt-Thread geladen), der AssetManager lädt hier nichts nach
+        """
+        path = self.map_path(id)
+        tilemap = Tilemap(self, tile_size=16)
+        tilemap.load(path, stream=self.stream and path.endswith(BINARY_EXTENSION))
 
         # Spawner (Gengner und Spieler)
-        self.enemies = []
-        for spawner in self.tilemap.extract([('spawners', 0), ('spawners', 1)]):
+        player = None
+        enemies = []
+        for spawner in tilemap.extract([('spawners', 0), ('spawners', 1)]):
             if spawner['variant'] == 0:
                 # Initialisiere Spieler
-                self.player = Player(self, (50, 50), (8, 15))
+                player = Player(self, (50, 50), (8, 15))
                 # Wenn Spawner ein Spieler ist, dann setze die Position des Spielers auf die Position des Spawners
-                self.player.pos = spawner['pos']
+                player.pos = spawner['pos']
             else:
                 # Wenn Spawner ein Gegner ist, dann erstelle den Gegner an der Position des Spawners
-                enemy = Enemy(self, spawner['pos'], (8, 15))
-                self.enemies.append(enemy)
-
-        self.dead = 0   # 0 = Spieler lebt, 1 = Spieler ist tot
-
-        self.live = 3   # Anzahl der Leben
-
-        self.scroll = [0, 0]
+                # Jeder Gegner bekommt einen eigenen Zufallsstrom, abhängig von Seed, Level und Reihenfolge in der Karte
+                enemies.append(Enemy(self, spawner['pos'], (8, 15), seed=derive_seed(self.seed, id, len(enemies))))
 
         # Lade Ziel-Flagge
-        self.GoalFlag = GoalFlag(self)
-
-        # Lade Leben des Spielers
-        self.LiveHeart = LiveHeart(self)
+        goal = GoalFlag(self, tilemap)
 
         # Herzen in Umgebung (Leben)
-        self.hearts = []
-        for heart in self.tilemap.extract([('heart', 0)]):
-            heart = Heart(self, heart['pos'])
-            self.hearts.append(heart)
- 
-    def run(self):
-        """ Hauptspiel-Schleife """
-        while True:
-            # Erstelle Hintergrund
-            self.display.blit(self.assets['background'], (0, 0))
-
-            # Wenn Spieler tot ist, dann lade das Spiel neu
-            if self.dead:
-                self.dead += 1
-                if self.dead > 40:
-                    self.load_game(self.level)
+        hearts = [Heart(self, heart['pos']) for heart in tilemap.extract([('heart', 0)])]
 
-            # ================================================================================================
-            # Kamera Fokus auf den Spieler
-            # Spieler ist in der Mitte des Bildschirms -> Kamera bewegt sich entsprechend dem Spieler
-            self.scroll[0] += (self.player.rect().centerx - self.display.get_width() / 2 - self.scroll[0]) / 30
-            self.scroll[1] += (self.player.rect().centery - self.display.get_height() / 2 - self.scroll[1]) / 30
-            # Für die Anzeige auf dem Bildschirm (render) -> Runde die Float-Werte auf Int-Werte
-            render_scroll = (int(self.scroll[0]), int(self.scroll[1]))      # x, y
+        return PreparedLevel(id, tilemap, player, enemies, hearts, goal)
 
-            # ================================================================================================
-            # Update die Positionen der Elemente und zeichne sie auf die Oberfläche
-            # Wolke
-            self.clouds.update()
-            self.clouds.render(self.display, offset=render_scroll)
+    def load_game(self, id=0):
+        """
+        Lade das Spiel/Level
+        Wurde das Level bereits im Hintergrund geladen (prefetch), wird es nur noch eingesetzt
+        """
+        start = time.perf_counter()
+        level = self.prefetcher.take(id) if self.prefetcher is not None else self.prepare_level(id)
+
+        # Alte Karte schließen (beim Streaming läuft sonst deren Hintergrund-Thread weiter)
+        if self.tilemap is not level.tilemap:
+            self.tilemap.clear()
+        self.tilemap = level.tilemap
+        self.player = level.player
+        self.enemies = level.enemies
+        self.GoalFlag = level.goal
+        self.hearts = level.hearts
 
-            # Tilemap (Karte)
-            self.tilemap.render(self.display, offset=render_scroll)
+        self.dead = 0   # 0 = Spieler lebt, 1 = Spieler ist tot
 
-            # Leben des Spielers
-            self.LiveHeart.render(self.display, offset=render_scroll)
+        self.live = 3   # Anzahl der Leben
 
-            # Herzen
-            for heart in self.hearts:
-                heart.render(self.display, offset=render_scroll)
+        self.scroll = [0, 0]
+        self.prev_scroll = [0, 0]   # Kamera vor dem letzten Tick (für die Interpolation beim Zeichnen)
 
-            # Spieler
-            if not self.dead:
-                self.player.update(self.tilemap, (self.movement[1] - self.movement[0], 0))
-                self.player.render(self.display, offset=render_scroll)
+        # Lade Leben des Spielers
+        self.LiveHeart = LiveHeart(self)
 
-            # Gegner
-            for enemy in self.enemies.copy():
+        # Anfangszustand des Levels merken -> nach dem Tod wird das Level daraus wiederhergestellt (siehe respawn())
+        self.level_start = LevelSnapshot(self)
+        self.checkpoint = None
+        self.bind_objects()
+
+        # Dauer des Level-Wechsels (in ms) und nächstes Level schon im Hintergrund laden
+        self.transition_ms = (time.perf_counter() - start) * 1000
+        if self.prefetcher is not None and id + 1 <= self.max_level:
+            self.prefetcher.request(id + 1)
+
+    def bind_objects(self):
+        """
+        Baue Batch und Raster für die Objekte des Levels neu auf (nach dem Laden und nach respawn())
+        Die Gegner werden gemeinsam als Batch berechnet, wenn es genug Gegner gibt (sonst einzeln mit Enemy.update)
+        """
+        if self.batch_size is not None and len(self.enemies) >= self.batch_size:
+            self.enemy_batch = EntityBatch(self, self.enemies)
+        else:
+            self.enemy_batch = None
+
+        # Nach Laden und respawn() springen alle Objekte -> nicht zwischen alter und neuer Position interpolieren
+        self.prev_scroll = list(self.scroll)
+        self.player.prev_pos = list(self.player.pos)
+        if self.enemy_batch is None:
+            for enemy in self.enemies:
+                enemy.prev_pos = list(enemy.pos)
+
+        self.enemy_grid.clear()
+        self.update_enemy_grid(self.enemies)
+        if self.activity is not None:
+            self.activity.reset(self.enemies)
+        self.active_enemies = self.enemies
+
+        self.trigger_grid.clear()
+        for heart in self.hearts:
+            self.trigger_grid.move(heart, heart.rect)
+        self.trigger_grid.move(self.GoalFlag, self.GoalFlag.trigger_rect)
+
+    def update_enemy_grid(self, enemies):
+        """
+        Trage die neuen Positionen der Gegner in das Raster ein (nur Gegner, die andere Zellen berühren, verändern das Raster)
+        enemies: Gegner, die sich bewegt haben können (schlafende Gegner bewegen sich nicht)
+        """
+        if self.enemy_batch is not None:
+            for i in self.enemy_batch.changed_cells(self.enemy_grid.cell_size):
+                enemy = self.enemy_batch.enemies[i]
+                self.enemy_grid.move(enemy, enemy.rect())
+        else:
+            for enemy in enemies:
+                self.enemy_grid.move(enemy, enemy.rect())
+
+    def save_checkpoint(self):
+        """ Merke den aktuellen Zustand des Levels als Checkpoint - nach dem Tod geht es hier weiter statt am Level-Anfang """
+        if self.enemy_batch is not None:
+            self.enemy_batch.write_back()
+        self.checkpoint = LevelSnapshot(self)
+
+    def respawn(self):
+        """ Setze das Level nach dem Tod auf den letzten Checkpoint (bzw. den Anfang) zurück, ohne die Karte neu zu laden """
+        (self.checkpoint or self.level_start).restore(self)
+        self.bind_objects()
+ 
+    def handle_events(self):
+        """
+        Event-Handling (Eingaben von Tastatur, Maus, etc.)
+        Gibt False zurück, wenn das Spiel beendet werden soll
+        """
+        # Prüfe alle verfügbaren Events
+        for event in pygame.event.get():
+            # Beende das Spiel, wenn Fenster geschlossen oder ESC gedrückt wird
+            if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                return False
+
+            # Fenstergröße wurde verändert -> Zielbereich der Vergrößerung neu berechnen
+            if event.type == pygame.VIDEORESIZE:
+                self.presenter.resize()
+
+            # Verarbeite Spieler-Eingaben
+            if event.type == pygame.KEYDOWN:    # Taste gedrückt?
+                if event.key == pygame.K_F3:
+                    self.profiler.show = not self.profiler.show     # Performance-Overlay ein-/ausblenden
+                if event.key == pygame.K_a:
+                    self.movement[0] = True     # Bewegung nach links
+                if event.key == pygame.K_d:
+                    self.movement[1] = True     # Bewegung nach rechts
+                if event.key == pygame.K_w:
+                    self.jump_pressed = True    # Sprung im nächsten Tick (damit er in der Aufnahme zum richtigen Tick gehört)
+
+            if event.type == pygame.KEYUP:      # Taste losgelassen?
+                if event.key == pygame.K_a:
+                    self.movement[0] = False    # Beende Bewegung nach links
+                if event.key == pygame.K_d:
+                    self.movement[1] = False    # Beende Bewegung nach rechts
+
+        return True
+
+    def step(self, inputs=None, render=True):
+        """
+        Berechne einen Tick des Spiels (ohne Event-Handling, ohne FPS-Begrenzung, ohne Fenster-Ausgabe)
+        inputs: Eingaben für diesen Tick als Dictionary {'left': bool, 'right': bool, 'jump': bool}
+                None = Eingaben aus der Wiedergabe (self.replay) oder aus dem Event-Handling (self.movement, self.jump_pressed)
+        render: Zeichne das Bild auf self.display (False = nur Simulation, z.B. für Tests und Bots)
+        Gibt den Zustand des Spiels nach dem Tick zurück (siehe state())
+        """
+        # Eingaben dieses Ticks als Bitmaske (so werden sie auch aufgenommen)
+        if inputs is not None:
+            buttons = encode_inputs(inputs)
+        elif self.replay is not None:
+            buttons = self.replay.next()
+        else:
+            buttons = (INPUT_LEFT if self.movement[0] else 0) | (INPUT_RIGHT if self.movement[1] else 0) | (INPUT_JUMP if self.jump_pressed else 0)
+        self.jump_pressed = False
+        if self.recording is not None:
+            self.recording.record(buttons)
+
+        inputs = decode_inputs(buttons)
+        self.movement = [inputs['left'], inputs['right']]
+        if inputs['jump']:
+            self.player.jump()
+
+        # Wenn Spieler tot ist, dann setze das Level zurück (ohne die Karte neu zu laden)
+        if self.dead:
+            self.dead += 1
+            if self.dead > 40:
+                self.respawn()
+
+        self.profiler.count('ticks')
+
+        # ================================================================================================
+        # Kamera Fokus auf den Spieler
+        # Spieler ist in der Mitte des Bildschirms -> Kamera bewegt sich entsprechend dem Spieler
+        self.prev_scroll[0] = self.scroll[0]
+        self.prev_scroll[1] = self.scroll[1]
+        self.scroll[0] += (self.player.rect().centerx - self.display.get_width() / 2 - self.scroll[0]) / 30
+        self.scroll[1] += (self.player.rect().centery - self.display.get_height() / 2 - self.scroll[1]) / 30
+
+        camera = (self.scroll[0], self.scroll[1], self.display.get_width(), self.display.get_height())
+
+        # Aktivitäts-Bereich: Nur Gegner in der Nähe der Kamera sind wach, alle anderen schlafen (siehe scripts/activity.py)
+        if self.activity is not None:
+            self.active_enemies = self.activity.update(self.enemy_grid, camera, self.enemies)
+            self.profiler.count('active', self.activity.active_count)
+            self.profiler.count('sleeping', self.activity.sleeping_count)
+        else:
+            self.active_enemies = self.enemies
+            self.profiler.count('active', len(self.enemies))
+
+        # Streaming: Chunks um Kamera, Spieler und wache Gegner nachladen, weit entfernte Chunks entfernen
+        if self.tilemap.streamer is not None:
+            self.tilemap.update_streaming(camera, [self.player.pos] + [enemy.pos for enemy in self.active_enemies])
+
+        # ================================================================================================
+        # Update die Positionen der Elemente
+        # Wolke
+        self.clouds.update()
+        self.profiler.lap('clouds')
+
+        # Spieler
+        if not self.dead:
+            self.player.update(self.tilemap, (self.movement[1] - self.movement[0], 0))
+
+        # Wache Gegner (ab batch_size Gegnern alle gemeinsam, siehe scripts/batch.py)
+        if self.enemy_batch is not None:
+            self.enemy_batch.update(self.tilemap, None if self.activity is None else self.active_enemies)
+        else:
+            for enemy in self.active_enemies:
                 enemy.update(self.tilemap, (0, 0))
-                enemy.render(self.display, offset=render_scroll)
-            
-            # Check if Enemy is killed
-            for enemy in self.enemies.copy():
-                if enemy.killed():      # Prüft, ob Spieler den Gegner von oben getroffen hat (angesprungen)
-                    self.enemies.remove(enemy)
-
-            # Check if Enemy killed Player
-            # self.player.killed()    # Prüft, ob Gegner den Spieler getroffen hat (Seitlich berührt)
-            if self.player.killed() and self.player.invulnerable == 0:
-                self.live -= 1
-                self.player.invulnerable = 40   # Spieler ist für 40 Frames unverwundbar
-
-            # Spieler ist unverwundbar herunterzählen, dass Spieler wieder verwundbar ist
-            self.player.invulnerable = max(0, self.player.invulnerable - 1)
-
-            if self.live <= 0:
-                self.dead += 1
-
-            # Ziel-Flagge
-            # Wenn enemies leer ist, dann zeige die Flagge an
-            if not self.enemies:
-                self.GoalFlag.render(self.display, offset=render_scroll)
-
-            # Checke, ob der Spieler das Ziel erreicht hat 
-            if self.GoalFlag.check_finished() and not self.enemies:
-                print(f"Level {self.level + 1} beendet")
-                self.level += 1
+        self.profiler.lap('entities')
+
+        # ================================================================================================
+        # Überlappungen mit dem Spieler: Nur Objekte in seiner Nähe werden genau geprüft (Raster, siehe scripts/spatial.py)
+        self.update_enemy_grid(self.active_enemies)
+        player_rect = self.player.rect()
+
+        # Check if Enemy is killed
+        for enemy in self.enemy_grid.query(player_rect):
+            if enemy.killed(player_rect):      # Prüft, ob Spieler den Gegner von oben getroffen hat (angesprungen)
+                self.enemies.remove(enemy)
+                if enemy in self.active_enemies:
+                    self.active_enemies.remove(enemy)
+                self.enemy_grid.remove(enemy)
+                if self.enemy_batch is not None:
+                    self.enemy_batch.remove(enemy)
+
+        # Check if Enemy killed Player
+        # self.player.killed()    # Prüft, ob Gegner den Spieler getroffen hat (Seitlich berührt)
+        if self.player.killed(player_rect) and self.player.invulnerable == 0:
+            self.live -= 1
+            self.player.invulnerable = 40   # Spieler ist für 40 Frames unverwundbar
+
+        # Spieler ist unverwundbar herunterzählen, dass Spieler wieder verwundbar ist
+        self.player.invulnerable = max(0, self.player.invulnerable - 1)
+
+        if self.live <= 0:
+            self.dead += 1
+
+        # Herzen und Ziel-Flagge, die der Spieler berührt
+        finished = False
+        for trigger in self.trigger_grid.query(player_rect):
+            if trigger is self.GoalFlag:
+                # Checke, ob der Spieler das Ziel erreicht hat (Ziel-Flagge erst erreichbar, wenn alle Gegner besiegt sind)
+                finished = bool(trigger.check_finished(player_rect)) and not self.enemies
+            elif trigger.collect(player_rect):
+                self.hearts.remove(trigger)
+                self.trigger_grid.remove(trigger)
+                # Eingesammeltes Herz ist ein Checkpoint (nicht, wenn der Spieler im selben Tick stirbt - sonst stirbt er nach jedem respawn())
+                if self.live > 0 and not self.dead:
+                    self.save_checkpoint()
+        self.profiler.lap('kills')
+
+        if render:
+            self.render()
+
+        if finished:
+            print(f"Level {self.level + 1} beendet")
+            self.level += 1
+            if self.level <= self.max_level:
                 self.load_game(self.level)
+                print(f"Level-Wechsel in {self.transition_ms:.2f} ms")
+
+        self.ticks += 1
+        return self.state()
+
+    def render(self, alpha=1.0):
+        """
+        Zeichne alle Elemente des aktuellen Ticks auf die Oberfläche (display)
+        alpha: Zeitpunkt zwischen vorletztem (0) und letztem Tick (1) - Kamera, Spieler und Gegner werden dazwischen interpoliert
+        """
+        scroll_x = self.scroll[0]
+        scroll_y = self.scroll[1]
+        if alpha != 1.0:
+            scroll_x = self.prev_scroll[0] + (scroll_x - self.prev_scroll[0]) * alpha
+            scroll_y = self.prev_scroll[1] + (scroll_y - self.prev_scroll[1]) * alpha
+        # Für die Anzeige auf dem Bildschirm (render) -> Runde die Float-Werte auf Int-Werte
+        render_scroll = (int(scroll_x), int(scroll_y))      # x, y
+
+        # Tilemap (Karte): Zwischengespeicherte Ebene, beim Scrollen werden nur die neuen Streifen gezeichnet
+        layer = self.world_layer.update(self.tilemap, render_scroll)
+        if self.world_layer.changed or render_scroll != self.dirty.scroll:
+            self.backdrop.invalidate()
+        self.profiler.lap('tilemap')
+
+        # Hintergrund und Wolke hinter den Kacheln (siehe scripts/redraw.py)
+        # Ist alles neu, wird das ganze Bild übernommen, sonst nur die Bereiche, die sich geändert haben oder auf denen Sprites waren
+        changed = self.backdrop.update(self.assets['background'], self.clouds, layer, render_scroll)
+        if changed is None:
+            self.display.blit(self.backdrop.surf, (0, 0))
+            backdrop_blits = 1
+        else:
+            for rect in self.dirty.sprites + changed:
+                self.display.blit(self.backdrop.surf, rect, rect)
+            backdrop_blits = len(self.dirty.sprites) + len(changed)
+        self.profiler.lap('clouds')
+
+        # Sprites: Die gezeichneten Bereiche werden gesammelt (alte und neue Bereiche müssen an das Fenster)
+        sprite_rects = []
+
+        # Leben des Spielers
+        sprite_rects.append(self.LiveHeart.render(self.display, offset=render_scroll))
+
+        # Herzen
+        for heart in self.hearts:
+            sprite_rects.append(heart.render(self.display, offset=render_scroll))
+
+        # Spieler
+        if not self.dead:
+            sprite_rects.append(self.player.render(self.display, offset=render_scroll, alpha=alpha))
+
+        # Gegner
+        if self.enemy_batch is not None:
+            enemy_blits = self.enemy_batch.render(self.display, offset=render_scroll, alpha=alpha, rects=sprite_rects)
+        else:
+            for enemy in self.active_enemies:
+                sprite_rects.append(enemy.render(self.display, offset=render_scroll, alpha=alpha))
+            enemy_blits = len(self.active_enemies)
+
+        # Ziel-Flagge
+        # Wenn enemies leer ist, dann zeige die Flagge an
+        if not self.enemies:
+            sprite_rects.append(self.GoalFlag.render(self.display, offset=render_scroll))
+        self.profiler.lap('entities')
+
+        self.dirty.update(render_scroll, changed, sprite_rects)
+
+        # Zusammensetzen und Übernehmen des Hintergrunds, Leben, Herzen, Spieler, Gegner und Flagge (Kacheln in neuen Streifen zählt die Tilemap selbst)
+        self.profiler.count('blits', self.backdrop.blits + backdrop_blits + 1 + len(self.hearts) + (not self.dead) + enemy_blits + (not self.enemies))
+
+    def end_frame(self):
+        """ Übernehme die Zähler der Tilemap in das Profil und beende den Frame """
+        self.profiler.count('blits', self.tilemap.blits)
+        self.profiler.count('tiles', self.tilemap.tiles_drawn)
+        self.profiler.count('collision_rects', self.tilemap.rects_tested)
+        self.tilemap.blits = self.tilemap.tiles_drawn = self.tilemap.rects_tested = 0
+        self.profiler.end()
+
+    def quit(self):
+        """ Speichere Profil und Aufnahme (falls gewünscht) und beende pygame """
+        if self.profile_path:
+            self.profiler.dump(self.profile_path)
+        if self.recording is not None and self.record_path:
+            self.recording.checksum = self.checksum()
+            self.recording.save(self.record_path)
+            print(f"Aufnahme gespeichert: {self.record_path} ({len(self.recording)} Ticks, Seed {self.seed})")
+        if self.replay_done():
+            self.check_replay()
+        if self.prefetcher is not None:
+            self.prefetcher.discard()
+        pygame.quit()
+
+    def map_digest(self, level=0):
+        """ Prüfsumme der Karten aller Level ab level (Inhalt der Dateien, die map_path verwendet) """
+        digest = hashlib.blake2b(digest_size=DIGEST_SIZE)
+        for id in range(level, self.max_level + 1):
+            path = self.map_path(id)
+            if not os.path.exists(path):
+                continue
+            with open(path, 'rb') as f:
+                for block in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(block)
+        return digest.digest()
+
+    def checksum(self):
+        """ Prüfsumme des Zustands (Level, Leben, Positionen von Spieler und allen Gegnern) als 64-Bit-Zahl """
+        digest = hashlib.blake2b(struct.pack('<Hhdd', self.level, self.live, *self.player.pos), digest_size=8)
+        for enemy in self.enemies:
+            digest.update(struct.pack('<dd', *enemy.pos))
+        return int.from_bytes(digest.digest(), 'little')
+
+    def start_recording(self, path):
+        """ Nimm ab jetzt die Eingaben jedes Ticks auf, zusammen mit Seed und Einstellungen (beim Beenden in path speichern) """
+        self.recording = InputLog(self.seed, activity=self.activity is not None, level=self.level, maps=self.map_digest(self.level))
+        self.record_path = path
+
+    def start_replay(self, replay):
+        """
+        Spiele ab jetzt die Eingaben aus replay (InputLog) ab
+        Seed und Aktivitäts-Bereich müssen schon beim Erstellen des Spiels übernommen werden (siehe __main__),
+        das Start-Level wird hier geladen und die Karten werden mit der Aufnahme verglichen
+        """
+        if replay.seed != self.seed or replay.activity != (self.activity is not None):
+            raise ValueError("Seed und Aktivitäts-Bereich müssen wie in der Aufnahme gesetzt sein")
+        if replay.level != self.level:
+            self.level = replay.level
+            self.load_game(self.level)
+        if replay.maps != self.map_digest(self.level):
+            print("Warnung: Die Karten unterscheiden sich von der Aufnahme - der Spielverlauf kann abweichen")
+        self.replay = replay
+
+    def replay_done(self):
+        """ Wurden bei der Wiedergabe alle aufgenommenen Ticks abgespielt? """
+        return self.replay is not None and self.replay.done
+
+    def check_replay(self):
+        """ Vergleiche den Zustand nach der Wiedergabe mit der Prüfsumme aus der Aufnahme - gibt zurück, ob er gleich ist """
+        checksum = self.checksum()
+        if checksum == self.replay.checksum:
+            print(f"Wiedergabe stimmt mit der Aufnahme überein (Prüfsumme {checksum:016x})")
+            return True
+        print(f"Warnung: Wiedergabe weicht von der Aufnahme ab (Prüfsumme {checksum:016x} statt {self.replay.checksum:016x})")
+        return False
+
+    def state(self):
+        """ Gibt den aktuellen Zustand des Spiels zurück (z.B. für Tests und Bots) """
+        return {
+            'tick': self.ticks,
+            'level': self.level,
+            'live': self.live,
+            'dead': self.dead,
+            'player_pos': tuple(self.player.pos),
+            'enemies': len(self.enemies),
+            'hearts': len(self.hearts),
+            'finished': self.level > self.max_level,
+        }
+
+    def run(self, max_fps=0):
+        """
+        Hauptspiel-Schleife
+        Pro Frame werden so viele Ticks berechnet, wie seit dem letzten Frame Zeit vergangen ist (feste 60 Ticks pro Sekunde)
+        --> Auf langsamen Rechnern läuft das Spiel nicht in Zeitlupe, auf schnellen wird öfter (interpoliert) gezeichnet
+        max_fps: Höchstens so viele Bilder pro Sekunde zeichnen (0 = unbegrenzt)
+        """
+        state = self.state()
+        self.timestep.reset()
+        while True:
+            self.profiler.begin()
 
-            # Herzen
-            for heart in self.hearts:
-                if heart.collect():
-                    self.hearts.remove(heart)
+            if not self.handle_events():
+                break
+            self.profiler.lap('events')
 
-            # ================================================================================================
-            # Event-Handling (Eingaben von Tastatur, Maus, etc.)
-            # Prüfe alle verfügbaren Events
-            for event in pygame.event.get():
-                # Beende das Spiel, wenn Fenster geschlossen oder ESC gedrückt wird
-                if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
-                    pygame.quit()
-                    sys.exit()
-                
-                # Verarbeite Spieler-Eingaben
-                if event.type == pygame.KEYDOWN:    # Taste gedrückt?
-                    if event.key == pygame.K_a:
-                        self.movement[0] = True     # Bewegung nach links
-                    if event.key == pygame.K_d:
-                        self.movement[1] = True     # Bewegung nach rechts
-                    if event.key == pygame.K_w:
-                        self.player.jump()         # Sprung nach oben ist negative Geschwindigkeit in y-Richtung
-
-                if event.type == pygame.KEYUP:      # Taste losgelassen?
-                    if event.key == pygame.K_a:
-                        self.movement[0] = False    # Beende Bewegung nach links
-                    if event.key == pygame.K_d:
-                        self.movement[1] = False    # Beende Bewegung nach rechts
-                    
+            # Berechne alle fälligen Ticks und zeichne das Bild zwischen den letzten beiden Ticks auf display
+            for _ in range(self.timestep.advance()):
+                state = self.step(render=False)
+                if state['finished'] or self.replay_done():
+                    break
+            self.render(self.timestep.alpha)
 
             # ================================================================================================
             # Vergrößere die Anzeige und zeichne sie auf das Fenster
             # Dadurch wird der Pixel-Effekt erzeugt, in dem alle Elemente vergrößert werden
-            # Vergrößere display auf die Größe von screen und zeichne es auf screen
-            # Von 320x240 -> 640x480
-            self.screen.blit(pygame.transform.scale(self.display, self.screen.get_size()), (0, 0))
+            # Vergrößere display auf die Größe des Fensters (z.B. von 320x240 -> 640x480, siehe scripts/present.py)
+            # Nur die geänderten Bereiche (siehe scripts/redraw.py) - steht die Kamera still, sind das meist nur wenige Sprites
+            full = self.dirty.full or self.profiler.show
+            screen_rects = self.presenter.present(self.display, None if full else self.dirty.rects)
+            self.profiler.lap('upscale')
+
+            # Performance-Overlay direkt auf das Fenster (scharfe Schrift), zählt nicht zur Messung
+            if self.profiler.show:
+                self.profiler.render(self.presenter.screen)
+                self.profiler.skip()
+                # Nach dem Ausblenden muss das ganze Bild einmal neu an das Fenster
+                self.dirty.invalidate()
 
             # Update den Bildschirm (Zeige alle gezcihneten Elemente an) 
-            pygame.display.update()
+            self.presenter.flip(screen_rects)
+            self.profiler.lap('display')
             
-            # Setze die FPS auf 60
-            self.clock.tick(60)
+            # Begrenze die FPS (nur falls gewünscht, die Geschwindigkeit des Spiels hängt nicht davon ab)
+            self.clock.tick(max_fps)
+            self.profiler.lap('wait')
+            self.end_frame()
 
-            if self.level > self.max_level:
+            if state['finished']:
                 print("Spiel beendet - Alle Level geschafft")
-                pygame.quit()
-                sys.exit()
+                break
+            if self.replay_done():
+                print(f"Wiedergabe beendet - Zustand: {state}")
+                break
+
+        self.quit()
+        sys.exit()
+
+
+def window_size(text):
+    """ Fenstergröße aus der Kommandozeile, z.B. '1280x720' -> (1280, 720) """
+    try:
+        width, height = (int(value) for value in text.lower().split('x'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Ungültige Fenstergröße: {text} (Beispiel: 1280x720)")
+    return width, height
+
+
+def seed_value(text):
+    """ Seed aus der Kommandozeile (0 <= seed < 2^64, so wird er in der Aufnahme gespeichert) """
+    try:
+        seed = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Ungültiger Seed: {text} (ganze Zahl erwartet)")
+    if not 0 <= seed <= MASK64:
+        raise argparse.ArgumentTypeError(f"Ungültiger Seed: {text} (erlaubt: 0 bis {MASK64})")
+    return seed
 
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Jump N Run")
+    parser.add_argument('--headless', action='store_true', help='Ohne Fenster und ohne FPS-Begrenzung simulieren')
+    parser.add_argument('--ticks', type=int, default=10000, help='Anzahl Ticks im headless-Modus')
+    parser.add_argument('--render', action='store_true', help='Im headless-Modus trotzdem jedes Bild zeichnen')
+    parser.add_argument('--profile', metavar='DATEI', help='Zeitmessung pro Frame beim Beenden als .csv oder .json speichern')
+    parser.add_argument('--atlas', action='store_true', help='Bilder in einen Textur-Atlas packen')
+    parser.add_argument('--stream', action='store_true', help='Binär-Karten (.bmap) in Chunks um die Kamera nachladen')
+    parser.add_argument('--fps', type=int, default=0, help='Höchstens so viele Bilder pro Sekunde zeichnen (0 = unbegrenzt)')
+    parser.add_argument('--window', type=window_size, metavar='BxH', help='Fenstergröße, z.B. 1280x720 (Standard: 640x480)')
+    parser.add_argument('--scale-mode', choices=PRESENT_MODES, default='integer', help='Art der Vergrößerung auf das Fenster (integer, fit, stretch, scaled)')
+    parser.add_argument('--no-activity', action='store_true', help='Alle Gegner berechnen, auch weit außerhalb des Bildschirms')
+    parser.add_argument('--seed', type=seed_value, help='Startwert der Zufallszahlen (Standard: zufällig)')
+    parser.add_argument('--record', metavar='DATEI', help='Eingaben pro Tick und Seed beim Beenden als .replay speichern')
+    parser.add_argument('--replay', metavar='DATEI', help='Aufgenommene Eingaben abspielen (mit --headless so schnell wie möglich)')
+    args = parser.parse_args()
+
+    # Die Wiedergabe bringt ihren eigenen Seed und ihre Einstellungen mit
+    replay = InputLog.load(args.replay) if args.replay else None
+    seed = replay.seed if replay is not None else args.seed
+    activity = not args.no_activity
+    if replay is not None and replay.activity != activity:
+        print(f"Aktivitäts-Bereich wie in der Aufnahme: {'an' if replay.activity else 'aus'}")
+        activity = replay.activity
+
     # Initialisiere Spiel
-    game = Game()
-    
-    # Starte Spiel
-    game.run()
\ No newline at end of file
+    game = Game(headless=args.headless, atlas=args.atlas, stream=args.stream, activity=activity,
+                window_size=args.window, present=args.scale_mode, seed=seed)
+    game.profile_path = args.profile
+    if replay is not None:
+        game.start_replay(replay)
+    if args.record:
+        game.start_recording(args.record)
+
+    if args.headless:
+        # Simuliere so schnell wie möglich (ohne Eingaben oder mit der ganzen Wiedergabe) und gib die Ticks pro Sekunde aus
+        ticks = len(replay) if replay is not None else args.ticks
+        start = time.perf_counter()
+        for _ in range(ticks):
+            game.profiler.begin()
+            state = game.step(render=args.render)
+            game.end_frame()
+            if state['finished']:
+                break
+        duration = time.perf_counter() - start
+        print(f"{game.ticks} Ticks in {duration:.2f}s ({game.ticks / duration:.0f} Ticks/s) - Zustand: {state}")
+        game.quit()
+    else:
+        # Starte Spiel
+        game.run(max_fps=args.fps)
@@ -0,0 +1,50 @@
+class ActivityScheduler:
+    """
+    Aktivitäts-Bereich um die Kamera: Nur Gegner in der Nähe des sichtbaren Bereichs werden berechnet
+    Alle anderen Gegner schlafen (kein Update, kein Zeichnen, keine Zufallszahlen) und bleiben stehen, wo sie sind
+
+    - Gegner innerhalb von margin Pixeln um den sichtbaren Bereich wachen auf
+    - Wache Gegner schlafen erst wieder ein, wenn sie weiter als margin + hysteresis entfernt sind
+      --> Gegner an der Grenze wechseln nicht in jedem Frame zwischen wach und schlafend
+    Die Gegner werden über das Raster (scripts/spatial.py) gefunden -> der Aufwand hängt nur von den Gegnern in der Nähe ab
+    """
+    def __init__(self, margin=64, hysteresis=32):
+        """
+        margin: Abstand zum sichtbaren Bereich in Pixeln, ab dem Gegner aufwachen
+        hysteresis: Zusätzlicher Abstand, ab dem wache Gegner wieder einschlafen
+        """
+        self.margin = margin
+        self.hysteresis = hysteresis
+        self.order = {}             # Gegner -> Index in der Liste (wache Gegner werden in dieser Reihenfolge berechnet)
+        self.active = []            # Wache Gegner
+
+        # Zähler (z.B. für das Performance-Overlay)
+        self.active_count = 0
+        self.sleeping_count = 0
+
+    def reset(self, entities):
+        """ Neue Liste von Gegnern (nach dem Laden oder respawn()) - alle schlafen, bis update() aufgerufen wird """
+        self.order = {entity: i for i, entity in enumerate(entities)}
+        self.active = []
+
+    def update(self, grid, camera, entities):
+        """
+        Bestimme die wachen Gegner für diesen Frame
+        grid: Raster mit allen Gegnern (SpatialHash)
+        camera: Sichtbarer Bereich (x, y, w, h) in Pixeln
+        entities: Liste aller (lebenden) Gegner
+        Gibt die wachen Gegner in der Reihenfolge von entities zurück
+        """
+        wake = self.margin
+        sleep = self.margin + self.hysteresis
+        near = grid.query((camera[0] - wake, camera[1] - wake, camera[2] + 2 * wake, camera[3] + 2 * wake))
+        keep = set(grid.query((camera[0] - sleep, camera[1] - sleep, camera[2] + 2 * sleep, camera[3] + 2 * sleep)))
+
+        # Getötete Gegner stehen nicht mehr im Raster (nicht in keep) und fallen hier heraus
+        active = set(near)
+        active.update(self.active)
+        self.active = sorted((entity for entity in active if entity in keep), key=self.order.__getitem__)
+
+        self.active_count = len(self.active)
+        self.sleeping_count = len(entities) - self.active_count
+        return self.active
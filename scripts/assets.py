@@ -0,0 +1,115 @@
+import os
+import threading
+
+import pygame
+
+from scripts.utils import BASE_IMG_PATH, load_image, Animation
+
+ATLAS_WIDTH = 1024      # Breite der Textur-Atlanten in Pixeln
+
+
+class AssetError(Exception):
+    """ Bild kann hier nicht geladen werden """
+
+
+class AssetManager:
+    """
+    Zentrale Verwaltung aller Bilder
+    --> Jedes Bild wird genau einmal von der Festplatte geladen und in das Pixel-Format des Fensters umgewandelt
+        (convert()/convert_alpha()), damit beim Blitten keine Umwandlung mehr nötig ist
+
+    Spiel, Editor und alle Objekte (Flagge, Herzen, ...) teilen sich dieselben Bilder
+    Optional werden alle geladenen Bilder in einen Textur-Atlas gepackt (pack()), die Bilder sind dann Ausschnitte (subsurface) des Atlas
+
+    Bilder werden nur im Haupt-Thread geladen (convert() und die Caches sind nicht thread-sicher)
+    Andere Threads (z.B. scripts/prefetch.py) dürfen nur bereits geladene Bilder abfragen, sonst AssetError
+    """
+    def __init__(self):
+        self.image_cache = {}       # Pfad -> Bild
+        self.list_cache = {}        # Ordner -> Liste von Bildern (in der Reihenfolge der Dateinamen)
+        self.atlases = []           # Textur-Atlanten (nach pack())
+
+    def image(self, path):
+        """ Gibt das Bild path (relativ zu BASE_IMG_PATH) zurück, lädt es beim ersten Aufruf """
+        if path not in self.image_cache:
+            self.check_thread(path)
+            img = load_image(path)
+            # Umwandeln in das Pixel-Format des Fensters (nur möglich, wenn bereits ein Fenster existiert)
+            if pygame.display.get_surface() is not None:
+                img = img.convert_alpha() if img.get_flags() & pygame.SRCALPHA else img.convert()
+                img.set_colorkey((0, 0, 0))
+            self.image_cache[path] = img
+        return self.image_cache[path]
+
+    def check_thread(self, path):
+        """ path ist noch nicht geladen - Laden ist nur im Haupt-Thread erlaubt """
+        if threading.current_thread() is not threading.main_thread():
+            raise AssetError(f"{path} ist noch nicht geladen (Bilder werden nur im Haupt-Thread geladen)")
+
+    def images(self, path):
+        """
+        Gibt alle Bilder im Ordner path zurück (sortiert nach Dateinamen)
+        Es wird immer dieselbe Liste zurückgegeben -> alle Nutzer teilen sich die Bilder
+        """
+        if path not in self.list_cache:
+            self.check_thread(path)
+            self.list_cache[path] = [self.image(path + '/' + img_name) for img_name in sorted(os.listdir(BASE_IMG_PATH + path))]
+        return self.list_cache[path]
+
+    def animation(self, path, img_duration=5, loop=True):
+        """ Erzeuge eine Animation aus allen Bildern im Ordner path """
+        return Animation(self.images(path), img_duration=img_duration, loop=loop)
+
+    def preload(self, path=''):
+        """ Lade alle Bilder unterhalb des Ordners path (z.B. vor pack()) """
+        for root, dirs, files in os.walk(BASE_IMG_PATH + path):
+            folder = os.path.relpath(root, BASE_IMG_PATH).replace(os.sep, '/')
+            folder = '' if folder == '.' else folder + '/'
+            for name in files:
+                if name.endswith('.png'):
+                    self.image(folder + name)
+            # Ordner, die nur aus Bildern bestehen, werden auch als Liste geladen (wie für Kacheln und Animationen)
+            if folder and files and not dirs and all(name.endswith('.png') for name in files):
+                self.images(folder[:-1])
+
+    def pack(self, max_size=64):
+        """
+        Packe alle geladenen Bilder bis max_size Pixel (Kacheln und Animations-Bilder) in Textur-Atlanten
+        Die Bilder werden in allen Caches und Listen durch Ausschnitte (subsurface) des Atlas ersetzt
+        --> Muss aufgerufen werden, bevor Bilder an Objekte weitergegeben werden
+        Bilder mit Alpha-Kanal und ohne Alpha-Kanal kommen in getrennte Atlanten (unterschiedliches Pixel-Format)
+        """
+        groups = {}
+        for path, img in self.image_cache.items():
+            if img.get_width() <= max_size and img.get_height() <= max_size:
+                groups.setdefault(bool(img.get_flags() & pygame.SRCALPHA), []).append(path)
+
+        for alpha, paths in groups.items():
+            # Regal-Packverfahren: Sortiere nach Höhe und fülle Zeile für Zeile
+            paths.sort(key=lambda p: (-self.image_cache[p].get_height(), p))
+            places = {}
+            x = y = row_height = 0
+            for path in paths:
+                w, h = self.image_cache[path].get_size()
+                if x + w > ATLAS_WIDTH:
+                    x, y, row_height = 0, y + row_height, 0
+                places[path] = (x, y, w, h)
+                x += w
+                row_height = max(row_height, h)
+
+            atlas = pygame.Surface((ATLAS_WIDTH, y + row_height), pygame.SRCALPHA if alpha else 0)
+            if pygame.display.get_surface() is not None:
+                atlas = atlas.convert_alpha() if alpha else atlas.convert()
+            atlas.fill((0, 0, 0, 0) if alpha else (0, 0, 0))
+            for path, rect in places.items():
+                # Bilder mit Alpha-Kanal unverändert kopieren (nicht mit dem leeren Atlas mischen)
+                atlas.blit(self.image_cache[path], rect[:2], special_flags=pygame.BLEND_RGBA_MAX if alpha else 0)
+            atlas.set_colorkey((0, 0, 0))
+
+            for path, rect in places.items():
+                self.image_cache[path] = atlas.subsurface(rect)
+            self.atlases.append(atlas)
+
+        # Ersetze die Bilder auch in den bereits erzeugten Listen (gleiche Listen-Objekte, damit Animationen sie mitbekommen)
+        for folder, images in self.list_cache.items():
+            images[:] = [self.image_cache[folder + '/' + img_name] for img_name in sorted(os.listdir(BASE_IMG_PATH + folder))]
@@ -0,0 +1,203 @@
+import os
+import threading
+import time
+from array import array
+
+from scripts.mapformat import JOURNAL_EXTENSION, file_id, read_journal, write_journal
+from scripts.tilemap import VARIANT_BITS, VARIANT_MASK, write_tilemap
+
+PAUSE = 0.0002          # Pause des Hintergrund-Threads nach jedem Chunk in Sekunden (siehe MapAutosave.pause)
+
+
+class MapAutosave:
+    """
+    Speichert die Karte des Editors im Hintergrund, ohne die Bildrate zu stören
+
+    Vollständiges Speichern (auf Anfrage und alle interval Sekunden, wenn sich etwas geändert hat):
+        Im Haupt-Thread werden nur die Chunk-Arrays kopiert (schnell, ein memcpy pro Chunk)
+        Umwandeln in JSON und Schreiben passieren in einem Hintergrund-Thread, über eine temporäre Datei (atomic_write)
+    Journal (alle journal_interval Sekunden):
+        Nur die seitdem geänderten Zellen (Tilemap.take_edits) werden an das Journal neben der Karte angehängt (10 Byte pro Zelle)
+        Nach einem Absturz wird das Journal beim nächsten Start eingespielt (recover)
+
+    Das Journal gehört immer zu genau einem Stand der Karten-Datei (Größe und Änderungszeit im Header)
+    --> Nach dem vollständigen Speichern passt ein altes Journal nicht mehr zur Datei und wird ignoriert
+    """
+    def __init__(self, tilemap, path, interval=60.0, journal_interval=2.0):
+        """
+        tilemap: Karte des Editors (muss bereits geladen sein)
+        path: Datei der Karte (.json oder .bmap)
+        interval: Höchstens so viele Sekunden zwischen zwei vollständigen Speicherungen
+        journal_interval: Höchstens so viele Sekunden, bis eine Änderung im Journal steht
+        """
+        self.tilemap = tilemap
+        self.path = path
+        self.journal_path = path + JOURNAL_EXTENSION
+        self.interval = interval
+        self.journal_interval = journal_interval
+
+        self.base = file_id(path)           # Stand der Karten-Datei, zu dem das Journal gehört
+        self.journal_names = None           # Typ-Namen im Header des Journals (None = Journal wird beim nächsten Mal neu angelegt)
+        self.saved_revision = tilemap.revision         # Stand der Karte in der Datei
+        self.pending_revision = tilemap.revision       # Stand der Karte, der gerade im Hintergrund gespeichert wird
+        self.save_requested = False
+        self.journal_broken = False     # Letztes Schreiben fehlgeschlagen -> Journal ist unvollständig, nächstes Mal vollständig speichern
+        self.last_save = self.last_flush = time.perf_counter()
+
+        self.thread = None
+        self.result = None                  # Ergebnis des Hintergrund-Threads: (Art, Dauer in ms, Fehler oder None)
+        self.stats = {'save': 0, 'flush': 0, 'cells': 0}     # Anzahl Speicherungen, Journal-Einträge und geschriebene Zellen
+        self.last = None                    # (Art, Dauer in ms) der letzten Speicherung
+
+        # Änderungen ab jetzt aufzeichnen
+        tilemap.take_edits()
+
+    def recover(self):
+        """
+        Spiele das Journal ein, falls nach dem letzten vollständigen Speichern noch Änderungen übrig sind (z.B. nach einem Absturz)
+        Gibt die Anzahl der wiederhergestellten Zellen zurück
+        """
+        journal = read_journal(self.journal_path, self.base)
+        if journal is None or not journal[1]:
+            return 0
+        type_names, entries = journal
+        tilemap = self.tilemap
+        remap = tilemap.type_remap(type_names)
+        for x, y, value in entries:
+            if remap is not None and value:
+                value = (remap[value >> VARIANT_BITS] << VARIANT_BITS) | (value & VARIANT_MASK)
+            tilemap.write_cell(x, y, value)
+        tilemap.take_edits()
+
+        # Wiederhergestellten Stand bald vollständig speichern (danach wird das Journal nicht mehr gebraucht)
+        self.save_requested = True
+        print(f"Journal eingespielt: {len(entries)} Änderungen")
+        return len(entries)
+
+    def request_save(self):
+        """ Beim nächsten update() vollständig speichern (z.B. Taste im Editor) """
+        self.save_requested = True
+
+    @property
+    def busy(self):
+        """ Läuft gerade eine Speicherung im Hintergrund? """
+        return self.thread is not None and self.thread.is_alive()
+
+    def update(self, now=None):
+        """
+        Einmal pro Frame aufrufen: Startet fällige Speicherungen im Hintergrund (nie zwei gleichzeitig)
+        now: Aktuelle Zeit in Sekunden (None = time.perf_counter())
+        """
+        if self.busy:
+            return
+        if self.thread is not None:
+            self.finish()
+        if now is None:
+            now = time.perf_counter()
+
+        changed = self.tilemap.revision != self.saved_revision
+        if self.save_requested or (changed and now - self.last_save >= self.interval):
+            self.start_save(now)
+        elif changed and now - self.last_flush >= self.journal_interval:
+            self.start_flush(now)
+
+    def start_save(self, now):
+        """ Kopiere die Karte und schreibe sie im Hintergrund vollständig in die Datei """
+        tilemap = self.tilemap
+        self.save_requested = False
+        self.journal_broken = False
+        self.last_save = self.last_flush = now
+        self.pending_revision = tilemap.revision
+
+        # Änderungen seit dem letzten Journal zuerst anhängen: Alte Datei + Journal = neuer Stand, bis die neue Datei fertig ist
+        edits = tilemap.take_edits()
+        if not edits or self.journal_names != tilemap.type_names:
+            edits = None
+        self.start('save', self.save_worker, self.snapshot() + (edits,))
+
+    def snapshot(self):
+        """ Kopie der Karte für den Hintergrund-Thread: (Kachel-Größe, Typ-Namen, Chunks) - das ist alles, was im Haupt-Thread passiert """
+        tilemap = self.tilemap
+        return tilemap.tile_size, list(tilemap.type_names), {key: array('H', tilemap.peek_chunk(key)) for key in tilemap.chunk_keys()}
+
+    def start_flush(self, now):
+        """ Hänge die geänderten Zellen im Hintergrund an das Journal an """
+        tilemap = self.tilemap
+        self.last_flush = now
+        edits = tilemap.take_edits()
+        if edits is None or self.journal_broken or (self.journal_names is not None and self.journal_names != tilemap.type_names):
+            # Nicht alle Änderungen stehen in edits (oder es gibt neue Kachel-Typen) -> das Journal reicht nicht, vollständig speichern
+            self.start_save(now)
+            return
+        if not edits:
+            return
+        append = self.journal_names is not None
+        self.stats['cells'] += len(edits)
+        self.journal_names = list(tilemap.type_names)
+        self.start('flush', self.flush_worker, (list(tilemap.type_names), edits, append))
+
+    def start(self, kind, worker, args):
+        """ Starte worker(*args) im Hintergrund-Thread """
+        def run():
+            start = time.perf_counter()
+            try:
+                worker(*args)
+                error = None
+            except Exception as e:
+                error = e
+            self.result = (kind, (time.perf_counter() - start) * 1000, error)
+
+        self.result = None
+        self.thread = threading.Thread(target=run, name='MapAutosave', daemon=True)
+        self.thread.start()
+
+    def save_worker(self, tile_size, type_names, chunks, edits):
+        """ Hintergrund-Thread: Journal ergänzen, Karte schreiben, danach wird das Journal nicht mehr gebraucht """
+        if edits:
+            write_journal(self.journal_path, self.base, type_names, edits, append=True)
+        write_tilemap(self.path, tile_size, type_names, chunks, pause=self.pause)
+        self.base = file_id(self.path)
+        # Ein Absturz vor dem Löschen schadet nicht: Das Journal passt nicht mehr zur neuen Datei (file_id) und wird ignoriert
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+
+    def pause(self):
+        """
+        Hintergrund-Thread: Nach jedem Chunk kurz schlafen und dabei den GIL freigeben
+        Sonst muss der Haupt-Thread jedes Mal bis zu 5 ms (sys.getswitchinterval) warten, bis er wieder rechnen darf
+        """
+        time.sleep(PAUSE)
+
+    def flush_worker(self, type_names, edits, append):
+        """ Hintergrund-Thread: Geänderte Zellen an das Journal anhängen """
+        write_journal(self.journal_path, self.base, type_names, edits, append)
+
+    def finish(self):
+        """ Übernehme das Ergebnis des beendeten Hintergrund-Threads """
+        self.thread.join()
+        self.thread = None
+        kind, ms, error = self.result
+        if error is not None:
+            # Die alte Datei ist unverändert (atomic_write), die Karte im Speicher auch
+            # --> Nach journal_interval Sekunden wird wieder vollständig gespeichert
+            print(f"WARNUNG: Speichern fehlgeschlagen ({error})")
+            self.journal_names = None
+            self.journal_broken = True
+            self.saved_revision = -1
+            return
+        if kind == 'save':
+            # Neue Datei -> das nächste Journal beginnt mit einem neuen Header
+            self.journal_names = None
+            self.saved_revision = self.pending_revision
+            print("Karte gespeichert")
+        self.stats[kind] += 1
+        self.last = (kind, ms)
+
+    def close(self):
+        """ Warte auf eine laufende Speicherung und schreibe die letzten Änderungen (beim Beenden des Editors) """
+        if self.thread is not None:
+            self.finish()
+        if self.tilemap.revision != self.saved_revision:
+            self.start_flush(time.perf_counter())
+            if self.thread is not None:
+                self.finish()
@@ -0,0 +1,311 @@
+try:
+    import numpy as np
+except ImportError:
+    # NumPy ist optional - ohne NumPy werden die Gegner einzeln berechnet (Enemy.update)
+    np = None
+
+from scripts.entities import COLLISION_UP, COLLISION_DOWN, COLLISION_LEFT, COLLISION_RIGHT
+from scripts.rng import random_floats
+from scripts.tilemap import CHUNK_SHIFT, CHUNK_MASK, CHUNK_CELLS, NEIGHBOR_OFFSET, VARIANT_BITS
+
+NUMPY_AVAILABLE = np is not None
+
+ACTIONS = ['idle', 'run']       # Aktionen der Gegner (Index im Array action)
+COLLISION_FLAGS = {'up': COLLISION_UP, 'down': COLLISION_DOWN, 'left': COLLISION_LEFT, 'right': COLLISION_RIGHT}
+UNLOADED = -1                   # Index-Gitter: Chunk gibt es, er hat aber (noch) keine Zeile im Belegungsgitter
+MIN_BATCH_SIZE = 32             # Ab dieser Anzahl Gegner ist der Batch schneller als die einzelnen Updates
+
+class EntityBatch:
+    """
+    Berechnet die Physik und das Verhalten aller Gegner gemeinsam mit NumPy (statt Enemy.update für jeden Gegner einzeln)
+
+    Positionen, Geschwindigkeiten, Größen, Kollisionen, Laufrichtung und Animation aller Gegner liegen in Arrays
+    Die Kollisionen werden gegen ein Belegungsgitter (fest/nicht fest) geprüft, das aus den geladenen Chunks der Tilemap erzeugt wird
+    Das Ergebnis ist exakt dasselbe wie mit Enemy.update:
+        - Nachbar-Kacheln werden in derselben Reihenfolge wie in physics_rects_around geprüft (NEIGHBOR_OFFSET)
+        - Jeder Gegner zieht aus seinem eigenen Zufallsstrom (seed, draws, siehe scripts/rng.py) - hier für alle auf einmal
+
+    Die Gegner-Objekte bleiben erhalten: pos und velocity sind Ansichten (views) in die Arrays und immer aktuell
+    Alle anderen Werte (flip, walking, Zufallsstrom, Animation) werden nur mit write_back() in die Objekte geschrieben (z.B. vor Snapshots)
+    """
+    def __init__(self, game, enemies):
+        """
+        game: Referenz zum Spiel (für die Animationen)
+        enemies: Liste der Gegner, deren Zustand übernommen wird
+        """
+        self.game = game
+        self.enemies = list(enemies)
+        self.index = {enemy: i for i, enemy in enumerate(self.enemies)}
+        n = len(self.enemies)
+
+        self.pos = np.array([enemy.pos for enemy in self.enemies], dtype=np.float64).reshape(n, 2)
+        self.prev_pos = self.pos.copy()     # Positionen vor dem letzten Update (für die Interpolation beim Zeichnen)
+        self.velocity = np.array([enemy.velocity for enemy in self.enemies], dtype=np.float64).reshape(n, 2)
+        self.size = np.array([enemy.size for enemy in self.enemies], dtype=np.int64).reshape(n, 2)
+        self.anim_offset = np.array([enemy.anim_offset for enemy in self.enemies], dtype=np.int64).reshape(n, 2)
+        self.flip = np.array([enemy.flip for enemy in self.enemies], dtype=bool)
+        self.walking = np.array([enemy.walking for enemy in self.enemies], dtype=np.int64)
+        self.seed = np.array([enemy.seed for enemy in self.enemies], dtype=np.uint64)
+        self.draws = np.array([enemy.draws for enemy in self.enemies], dtype=np.uint64)
+        self.action = np.array([ACTIONS.index(enemy.action) for enemy in self.enemies], dtype=np.int64)
+        self.frame = np.array([enemy.animation.frame for enemy in self.enemies], dtype=np.int64)
+        self.alive = np.ones(n, dtype=bool)
+
+        # Kollisionen des letzten Updates (Gegner drehen an Wänden um)
+        flags = np.array([enemy.collisions for enemy in self.enemies], dtype=np.int64)
+        self.collisions = {direction: (flags & flag) != 0 for direction, flag in COLLISION_FLAGS.items()}
+
+        # Gegner-Objekte an die Arrays binden
+        for i, enemy in enumerate(self.enemies):
+            enemy.pos = self.pos[i]
+            enemy.velocity = self.velocity[i]
+
+        # Animationen pro Aktion: Länge (Anzahl Bilder * Dauer) und Wiederholung
+        self.animations = [game.assets['enemy/' + action] for action in ACTIONS]
+        self.anim_length = np.array([len(anim.images) * anim.img_duration for anim in self.animations], dtype=np.int64)
+        self.anim_loop = np.array([anim.loop for anim in self.animations], dtype=bool)
+
+        # Zellen eines Rasters (scripts/spatial.py), in denen die Gegner zuletzt standen (siehe changed_cells)
+        self.cell_bounds = np.full((n, 4), np.iinfo(np.int64).min, dtype=np.int64)
+
+        # Belegungsgitter (wird neu erzeugt, wenn sich die Karte ändert)
+        self.tilemap = None
+        self.revision = None
+
+    def remove(self, enemy):
+        """ Entferne den Gegner (z.B. wenn er getötet wurde) - die Arrays behalten ihre Größe, damit die Ansichten gültig bleiben """
+        self.alive[self.index[enemy]] = False
+
+    def build_grid(self, tilemap):
+        """
+        Erzeuge das Belegungsgitter aus der Tilemap: Pro geladenem Chunk eine Zeile mit CHUNK_CELLS Werten (True = feste Kachel)
+        Chunks werden über ein Index-Gitter gefunden (0 = leerer Chunk, UNLOADED = noch keine Zeile) -> lückenhafte Karten brauchen wenig Speicher
+        Beim Streaming bekommen nur die geladenen Chunks eine Zeile, weitere erst, wenn ein Gegner sie braucht (load_rows)
+        Entfernt der Streamer Chunks aus dem Speicher, werden auch deren Zeilen freigegeben (drop_rows) -> der Speicher bleibt begrenzt
+        """
+        self.solid = np.frombuffer(bytes(tilemap.solid), dtype=np.uint8).astype(bool)
+        keys = np.array(tilemap.chunk_keys(), dtype=np.int64).reshape(-1, 2)
+        if len(keys):
+            self.chunk_origin = (int(keys[:, 0].min()), int(keys[:, 1].min()))
+            self.chunk_index = np.zeros((int(keys[:, 1].max()) - self.chunk_origin[1] + 1, int(keys[:, 0].max()) - self.chunk_origin[0] + 1), dtype=np.int64)
+            self.chunk_index[keys[:, 1] - self.chunk_origin[1], keys[:, 0] - self.chunk_origin[0]] = UNLOADED
+        else:
+            self.chunk_origin = (0, 0)
+            self.chunk_index = np.zeros((1, 1), dtype=np.int64)
+
+        # Zeile 0 bleibt leer (Chunks ohne feste Kacheln und außerhalb der Karte)
+        self.cells = np.zeros((len(tilemap.chunks) + 1, CHUNK_CELLS), dtype=bool)
+        self.rows = {}                  # Chunk-Key -> Zeile in cells
+        self.free_rows = []             # Zeilen entfernter Chunks (werden wiederverwendet)
+        self.next_row = 1
+        for key, chunk in tilemap.chunks.items():
+            self.add_row(key, chunk)
+
+        self.tilemap = tilemap
+        self.revision = tilemap.revision
+        self.evictions = 0 if tilemap.streamer is None else tilemap.streamer.evictions
+
+    def add_row(self, key, chunk):
+        """ Trage den Chunk key (Zellen chunk) in das Belegungsgitter ein """
+        if self.free_rows:
+            row = self.free_rows.pop()
+        else:
+            row = self.next_row
+            self.next_row += 1
+            if row == len(self.cells):
+                self.cells = np.concatenate([self.cells, np.zeros_like(self.cells)])
+        self.cells[row] = self.solid[np.frombuffer(chunk, dtype=np.uint16) >> VARIANT_BITS]
+        self.rows[key] = row
+        self.chunk_index[key[1] - self.chunk_origin[1], key[0] - self.chunk_origin[0]] = row
+
+    def load_rows(self, cx, cy):
+        """
+        Trage die Chunks (Arrays von Chunk-Koordinaten relativ zu chunk_origin) ein, die noch keine Zeile haben
+        Noch nicht geladene Chunks werden sofort gelesen (Tilemap.get_chunk) - wie bei der Physik der einzelnen Gegner
+        """
+        for x, y in sorted(set(zip(cx.tolist(), cy.tolist()))):
+            key = (x + self.chunk_origin[0], y + self.chunk_origin[1])
+            chunk = self.tilemap.get_chunk(key)
+            if chunk is None:
+                self.chunk_index[y, x] = 0
+            else:
+                self.add_row(key, chunk)
+
+    def drop_rows(self):
+        """ Gib die Zeilen aller Chunks frei, die der Streamer aus dem Speicher entfernt hat """
+        chunks = self.tilemap.chunks
+        for key in [key for key in self.rows if key not in chunks]:
+            self.free_rows.append(self.rows.pop(key))
+            self.chunk_index[key[1] - self.chunk_origin[1], key[0] - self.chunk_origin[0]] = UNLOADED
+        self.evictions = self.tilemap.streamer.evictions
+
+    def solid_at(self, tile_x, tile_y, mask=None):
+        """
+        Welche Kacheln (Arrays von Kachel-Koordinaten) sind fest?
+        mask: Nur für diese Einträge fehlende Chunks laden (z.B. die berechneten Gegner), None = alle
+              Für alle anderen gelten Chunks ohne Zeile als leer
+        """
+        height, width = self.chunk_index.shape
+        cx = (tile_x >> CHUNK_SHIFT) - self.chunk_origin[0]
+        cy = (tile_y >> CHUNK_SHIFT) - self.chunk_origin[1]
+        inside = (cx >= 0) & (cx < width) & (cy >= 0) & (cy < height)
+        cx = np.where(inside, cx, 0)
+        cy = np.where(inside, cy, 0)
+        index = np.where(inside, self.chunk_index[cy, cx], 0)
+        missing = index == UNLOADED
+        if missing.any():
+            if mask is not None:
+                missing &= mask
+            if missing.any():
+                self.load_rows(cx[missing], cy[missing])
+                index = np.where(inside, self.chunk_index[cy, cx], 0)
+            index = np.maximum(index, 0)
+        return self.cells[index, ((tile_y & CHUNK_MASK) << CHUNK_SHIFT) | (tile_x & CHUNK_MASK)]
+
+    def collide(self, tilemap, axis, frame_movement, alive):
+        """
+        Bewege alle Gegner entlang der Achse axis (0 = x, 1 = y) und löse Kollisionen mit festen Kacheln auf
+        Wie PhysicsEntity.update: Nachbar-Kacheln nacheinander prüfen, das Rechteck der Entität wird nach jeder Kollision verschoben
+        Gibt die Kollisionen (negative Richtung, positive Richtung) zurück
+        """
+        tile_size = tilemap.tile_size
+        pos = self.pos[:, axis]
+        pos += np.where(alive, frame_movement, 0)
+
+        # Rechteck der Entität (pygame.Rect schneidet Nachkommastellen ab)
+        rect = [np.trunc(self.pos[:, 0]).astype(np.int64), np.trunc(self.pos[:, 1]).astype(np.int64)]
+        width, height = self.size[:, 0], self.size[:, 1]
+        tile_x = np.floor_divide(self.pos[:, 0], tile_size).astype(np.int64)
+        tile_y = np.floor_divide(self.pos[:, 1], tile_size).astype(np.int64)
+
+        negative = np.zeros(len(pos), dtype=bool)
+        positive = np.zeros(len(pos), dtype=bool)
+        for offset in NEIGHBOR_OFFSET:
+            x = tile_x + offset[0]
+            y = tile_y + offset[1]
+            solid = self.solid_at(x, y, alive) & alive
+            tilemap.rects_tested += int(solid.sum())
+
+            left = x * tile_size
+            top = y * tile_size
+            hit = solid & (rect[0] < left + tile_size) & (left < rect[0] + width) & (rect[1] < top + tile_size) & (top < rect[1] + height)
+            start = left if axis == 0 else top
+            size = width if axis == 0 else height
+
+            # Bewegung in positive Richtung (rechts/unten): Rechteck an die Kachel anlegen
+            hit_positive = hit & (frame_movement > 0)
+            rect[axis] = np.where(hit_positive, start - size, rect[axis])
+            positive |= hit_positive
+            # Bewegung in negative Richtung (links/oben)
+            hit_negative = hit & (frame_movement < 0)
+            rect[axis] = np.where(hit_negative, start + tile_size, rect[axis])
+            negative |= hit_negative
+
+            pos[hit] = rect[axis][hit]
+
+        return negative, positive
+
+    def update(self, tilemap, active=None):
+        """
+        Berechne einen Tick für alle Gegner (entspricht Enemy.update(tilemap, (0, 0)) für jeden Gegner)
+        active: Nur diese Gegner berechnen (z.B. die wachen Gegner, siehe scripts/activity.py), None = alle
+        """
+        if self.tilemap is not tilemap or self.revision != tilemap.revision:
+            self.build_grid(tilemap)
+        elif tilemap.streamer is not None and tilemap.streamer.evictions != self.evictions:
+            self.drop_rows()
+        self.prev_pos[:] = self.pos
+        alive = self.alive
+        if active is not None:
+            mask = np.zeros(len(alive), dtype=bool)
+            mask[[self.index[enemy] for enemy in active]] = True
+            alive = alive & mask
+
+        # ================================================================================================
+        # Verhalten: Gegner laufen eine zufällige Zeit hin und her und drehen an Kanten und Wänden um
+        walking = (self.walking > 0) & alive
+        probe_x = np.trunc(self.pos[:, 0]).astype(np.int64) + self.size[:, 0] // 2 + np.where(self.flip, -7, 7)
+        probe_y = self.pos[:, 1] + 23
+        ground = self.solid_at(np.floor_divide(probe_x, tilemap.tile_size), np.floor_divide(probe_y, tilemap.tile_size).astype(np.int64), alive)
+        wall = self.collisions['left'] | self.collisions['right']
+
+        moving = walking & ground & ~wall
+        movement = np.where(moving, np.where(self.flip, -0.5, 0.5), 0.0)
+        self.flip ^= walking & ~moving
+        self.walking = np.where(walking, np.maximum(0, self.walking - 1), self.walking)
+
+        # Stehende Gegner ziehen eine Zufallszahl, mit Wahrscheinlichkeit 0.01 eine zweite für die Dauer (wie Enemy.update)
+        standing = np.flatnonzero(~walking & alive)
+        start = standing[random_floats(self.seed[standing], self.draws[standing]) < 0.01]
+        self.draws[standing] += np.uint64(1)
+        self.walking[start] = 30 + (random_floats(self.seed[start], self.draws[start]) * 91).astype(np.int64)
+        self.draws[start] += np.uint64(1)
+
+        # ================================================================================================
+        # Physik: Erst x-Richtung, dann y-Richtung (wie PhysicsEntity.update)
+        # Schlafende Gegner behalten ihre Kollisionen aus dem letzten berechneten Tick (wie ein Enemy, dessen update() nicht läuft)
+        collisions = self.collisions
+        left, right = self.collide(tilemap, 0, movement + self.velocity[:, 0], alive)
+        up, down = self.collide(tilemap, 1, self.velocity[:, 1].copy(), alive)
+        for direction, flags in (('left', left), ('right', right), ('up', up), ('down', down)):
+            collisions[direction] = np.where(alive, flags, collisions[direction])
+
+        # Spiegel die Animation in Bewegungsrichtung
+        self.flip = np.where(movement > 0, False, np.where(movement < 0, True, self.flip))
+
+        # Gravitation (maximal 5), bei Kollision in y-Richtung zurücksetzen
+        vertical = self.collisions['up'] | self.collisions['down']
+        self.velocity[:, 1] = np.where(alive, np.where(vertical, 0, np.minimum(5, self.velocity[:, 1] + 0.1)), self.velocity[:, 1])
+
+        # ================================================================================================
+        # Animation weiterzählen, bei Wechsel der Aktion (run/idle) von vorne beginnen
+        length = self.anim_length[self.action]
+        frame = np.where(self.anim_loop[self.action], (self.frame + 1) % length, np.minimum(self.frame + 1, length - 1))
+        action = np.where(movement != 0, ACTIONS.index('run'), ACTIONS.index('idle'))
+        self.frame = np.where(alive, np.where(action != self.action, 0, frame), self.frame)
+        self.action = np.where(alive, action, self.action)
+
+    def changed_cells(self, cell_size):
+        """
+        Indizes der Gegner, deren Rechteck seit dem letzten Aufruf andere Zellen eines Rasters mit Zellgröße cell_size berührt
+        --> Nur diese Gegner müssen im Raster (SpatialHash) aktualisiert werden
+        """
+        x = np.trunc(self.pos[:, 0]).astype(np.int64)
+        y = np.trunc(self.pos[:, 1]).astype(np.int64)
+        bounds = np.stack([x // cell_size, y // cell_size, (x + self.size[:, 0] - 1) // cell_size, (y + self.size[:, 1] - 1) // cell_size], axis=1)
+        changed = self.alive & (bounds != self.cell_bounds).any(axis=1)
+        self.cell_bounds = bounds
+        return np.flatnonzero(changed)
+
+    def render(self, surf, offset=(0, 0), alpha=1.0, rects=None):
+        """
+        Zeichne alle Gegner, die im sichtbaren Bereich liegen
+        alpha: Position zwischen vorletztem (0) und letztem Tick (1), siehe scripts/timestep.py
+        rects: Liste, an die die gezeichneten Bereiche angehängt werden (None = nicht sammeln)
+        Gibt die Anzahl der gezeichneten Gegner zurück
+        """
+        pos = self.pos if alpha == 1.0 else self.prev_pos + (self.pos - self.prev_pos) * alpha
+        x = pos[:, 0] - offset[0] + self.anim_offset[:, 0]
+        y = pos[:, 1] - offset[1] + self.anim_offset[:, 1]
+        # Großzügiger Rand, damit auch teilweise sichtbare Gegner gezeichnet werden
+        margin = 64
+        visible = self.alive & (x > -margin) & (y > -margin) & (x < surf.get_width()) & (y < surf.get_height())
+
+        count = 0
+        for i in np.flatnonzero(visible):
+            animation = self.animations[self.action[i]]
+            rect = surf.blit(animation.variants[bool(self.flip[i])][int(self.frame[i] / animation.img_duration)], (x[i], y[i]))
+            if rects is not None:
+                rects.append(rect)
+            count += 1
+        return count
+
+    def write_back(self):
+        """ Schreibe den Zustand aus den Arrays in die Gegner-Objekte (flip, walking, Kollisionen, Animation) """
+        for i, enemy in enumerate(self.enemies):
+            enemy.flip = bool(self.flip[i])
+            enemy.walking = int(self.walking[i])
+            enemy.draws = int(self.draws[i])
+            enemy.collisions = sum(flag for direction, flag in COLLISION_FLAGS.items() if self.collisions[direction][i])
+            enemy.set_action(ACTIONS[self.action[i]])
+            enemy.animation.frame = int(self.frame[i])
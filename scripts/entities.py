@@ -1,12 +1,25 @@
-import random 
+import copy
 
 import pygame
 
+from scripts.rng import random_float
+
+# Kollisionen als Bit-Flags (ein int statt eines Dictionaries pro Update)
+COLLISION_UP = 1
+COLLISION_DOWN = 2
+COLLISION_LEFT = 4
+COLLISION_RIGHT = 8
+
 class PhysicsEntity:
     """ 
     Basisklasse für alle physikalischen Entitäten 
     Gibt den Entitäten die Möglichkeit Gravtitation zu spüren
+
+    __slots__: Feste Attribute (kein Dictionary pro Objekt) -> weniger Speicher und schnellerer Zugriff
+    Im Update werden keine neuen Objekte erzeugt (Rechteck und Kollisions-Rechtecke werden wiederverwendet)
     """
+    __slots__ = ('game', 'e_type', 'pos', 'prev_pos', 'size', 'velocity', 'collisions', 'action', 'anim_offset', 'flip', 'animation', 'animations', 'entity_rect')
+
     def __init__(self, game, e_type, pos, size):
         """
         game: Referenz zum Spiel
@@ -17,38 +30,75 @@ class PhysicsEntity:
         self.game = game
         self.e_type = e_type
         self.pos = list(pos)
+        self.prev_pos = list(pos)   # Position vor dem letzten Update (für die Interpolation beim Zeichnen)
         self.size = size
 
         self.velocity = [0, 0]  # Geschwindigkeit der Entität
-        self.collision = {'up': False, 'down': False, 'left': False, 'right': False}    # Check, falls in einer Richtung mit anderen Entitäten kollidiert wird
+        self.collisions = 0     # Kollisionen beim letzten Update (Bit-Flags COLLISION_UP, COLLISION_DOWN, ...)
+
+        # Rechteck um die Entität, wird bei jedem Aufruf von rect() wiederverwendet
+        self.entity_rect = pygame.Rect(self.pos[0], self.pos[1], self.size[0], self.size[1])
 
         self.action = ''
+        self.animations = {}            # Aktion -> eigene Kopie der Animation (wird bei jedem Wechsel wiederverwendet)
         self.anim_offset = (-3, -3)
         self.flip = False               # Spieler dreht sich nach links oder rechts abh. von der Bewegungsrichtung
         self.set_action('idle')         # Standard-Aktion: idle (Steht still)
     
     def rect(self):
-        """ Gibt das Rechteck um dem Objekt zurück """
-        return pygame.Rect(self.pos[0], self.pos[1], self.size[0], self.size[1])
+        """
+        Gibt das Rechteck um dem Objekt zurück
+        Es wird immer dasselbe Rechteck zurückgegeben (nur die Position wird aktualisiert)
+        --> Gilt nur bis zum nächsten Aufruf, zum Aufheben copy() verwenden
+        """
+        rect = self.entity_rect
+        # int() schneidet wie pygame.Rect(x, y, ...) die Nachkommastellen ab (Zuweisung an rect.x würde runden)
+        rect.x = int(self.pos[0])
+        rect.y = int(self.pos[1])
+        return rect
+
+    def copy(self):
+        """ Unabhängige Kopie der Entität mit demselben Zustand (z.B. für Snapshots, siehe scripts/snapshot.py) """
+        entity = copy.copy(self)
+        entity.pos = list(self.pos)
+        entity.prev_pos = list(self.prev_pos)
+        entity.velocity = list(self.velocity)
+        entity.entity_rect = self.entity_rect.copy()
+        entity.animations = {}
+        entity.animation = self.animation.copy()
+        entity.animation.frame = self.animation.frame
+        entity.animation.done = self.animation.done
+        return entity
     
     def set_action(self, action):
         """ Setze die Aktion der Entität """
         # Wenn Aktion der Entität sich ändert, dann setze Aktion neu und lade das zugehörige Bild (steht in assets)
         if self.action != action:
             self.action = action
-            self.animation = self.game.assets[self.e_type + '/' + self.action].copy()
+            # Jede Aktion bekommt nur einmal eine Kopie der Animation, danach wird sie zurückgesetzt und wiederverwendet
+            animation = self.animations.get(action)
+            if animation is None:
+                animation = self.animations[action] = self.game.assets[self.e_type + '/' + self.action].copy()
+            animation.frame = 0
+            animation.done = False
+            self.animation = animation
         
     def update(self, tilemap, movement):
         """ Update die Position der Entität und prüfe Kollisionen """
+        # Position vor dem Update merken (Interpolation beim Zeichnen, siehe render())
+        self.prev_pos[0] = self.pos[0]
+        self.prev_pos[1] = self.pos[1]
+
         # Setze die Überprüfungsvariable für Kollisionen zurück
-        self.collisions = {'up': False, 'down': False, 'left': False, 'right': False}
+        collisions = 0
 
         # Berechne die Bewegung der Entität (Ändere Position entsprechend der Geschwindigkeit)
-        frame_movement = (movement[0] + self.velocity[0], movement[1] + self.velocity[1])
+        movement_x = movement[0] + self.velocity[0]
+        movement_y = movement[1] + self.velocity[1]
 
         # ================================================================================================
         # Ändere die Position der Entität in x-Richtung (rechts/links)
-        self.pos[0] += frame_movement[0]
+        self.pos[0] += movement_x
         # Prüfe Kollisionen in x-Richtung
         entity_rect = self.rect()   # Rechteck um die Entität (Spieler)
         # Prüfe ob, um die Entität herum Kollisionen mit anderen Entitäten oder der Karte vorhanden sind
@@ -58,14 +108,14 @@ class PhysicsEntity:
             if entity_rect.colliderect(rect):
                 # Wenn Entität nach rechts bewegt und kollidiert, dann ändere Rechteck der Entität - Position rechts wird auf linke Position des kollidierten Rechtecks gesetzt 
                 # --> Dadurch kann Entität (Spieler oder Gegner) nicht durch Objekte laufen
-                if frame_movement[0] > 0:
+                if movement_x > 0:
                     entity_rect.right = rect.left
-                    self.collisions['right'] = True
+                    collisions |= COLLISION_RIGHT
                 # Wenn Entität nach links bewegt und kollidiert, dann ändere Rechteck der Entität - Position links wird auf rechte Position des kollidierten Rechtecks gesetzt 
                 # --> Dadurch kann Entität (Spieler oder Gegner) nicht durch Objekte laufen
-                if frame_movement[0] < 0:
+                if movement_x < 0:
                     entity_rect.left = rect.right
-                    self.collisions['left'] = True
+                    collisions |= COLLISION_LEFT
                 
                 # Setze die Position der Entität auf die neue Position von seinem Rechteck, dass um ihn liegt
                 self.pos[0] = entity_rect.x
@@ -73,7 +123,7 @@ class PhysicsEntity:
 
         # ================================================================================================
         # Ändere die Position der Entität in y-Richtung (oben/unten)
-        self.pos[1] += frame_movement[1]
+        self.pos[1] += movement_y
         # Prüfe Kollisionen in y-Richtung
         entity_rect = self.rect()   # Rechteck um die Entität (Spieler)
         # Prüfe ob, um die Entität herum Kollisionen mit anderen Entitäten oder der Karte vorhanden sind
@@ -83,14 +133,14 @@ class PhysicsEntity:
             if entity_rect.colliderect(rect):
                 # Wenn Entität nach unten bewegt und kollidiert, dann ändere Rechteck der Entität - Position unten wird auf obere Position des kollidierten Rechtecks gesetzt 
                 # --> Dadurch kann Entität (Spieler oder Gegner) nicht durch Objekte fallen
-                if frame_movement[1] > 0:
+                if movement_y > 0:
                     entity_rect.bottom = rect.top
-                    self.collisions['down'] = True
+                    collisions |= COLLISION_DOWN
                 # Wenn Entität nach oben bewegt und kollidiert, dann ändere Rechteck der Entität - Position oben wird auf untere Position des kollidierten Rechtecks gesetzt 
                 # --> Dadurch kann Entität (Spieler oder Gegner) nicht durch Objekte springen
-                if frame_movement[1] < 0:
+                if movement_y < 0:
                     entity_rect.top = rect.bottom
-                    self.collisions['up'] = True
+                    collisions |= COLLISION_UP
                 
                 # Setze die Position der Entität auf die neue Position von seinem Rechteck, dass um ihn liegt
                 self.pos[1] = entity_rect.y
@@ -108,26 +158,48 @@ class PhysicsEntity:
         self.velocity[1] = min(5, self.velocity[1] + 0.1)   # Maximale Geschwindigkeit in y-Richtung: 5
 
         # Setze Gravitation auf 0, wenn Kollision in y-Richtung (Entität steht auf dem Boden oder springt gegen Decke)
-        if self.collisions['down'] or self.collisions['up']:
+        self.collisions = collisions
+        if collisions & (COLLISION_DOWN | COLLISION_UP):
             self.velocity[1] = 0
 
         # ================================================================================================
         self.animation.update() 
 
-    def render(self, surf, offset=(0, 0)):
+    def render(self, surf, offset=(0, 0), alpha=1.0):
         """ 
         Zeichne die Entität auf Display 
         offset: Verschiebung der Entität (um, Kamera-Position) -> Spieler bewegt sich, Kamera folgt Spieler
+        alpha: Position zwischen vorletztem (0) und letztem Tick (1), siehe scripts/timestep.py
         flip die Animation (Bild des Spielers), wenn Spieler sich nach links bewegt (dass er in die Richtung schaut)
+        Gibt den gezeichneten Bereich zurück
         """
-        surf.blit(pygame.transform.flip(self.animation.img(), flip_x=self.flip, flip_y=False), (self.pos[0] - offset[0] + self.anim_offset[0], self.pos[1] - offset[1] + self.anim_offset[1]))
+        x = self.pos[0]
+        y = self.pos[1]
+        if alpha != 1.0:
+            x = self.prev_pos[0] + (x - self.prev_pos[0]) * alpha
+            y = self.prev_pos[1] + (y - self.prev_pos[1]) * alpha
+        # Gespiegelte Bilder sind in der Animation vorberechnet -> nur Nachschlagen und Zeichnen
+        return surf.blit(self.animation.img(self.flip), (x - offset[0] + self.anim_offset[0], y - offset[1] + self.anim_offset[1]))
 
 
 class Enemy(PhysicsEntity):
-    def __init__(self, game, pos, size):
+    __slots__ = ('walking', 'seed', 'draws')
+
+    def __init__(self, game, pos, size, seed=0):
+        """
+        seed: Eigener Zufallsstrom des Gegners (siehe scripts/rng.py) -> gleicher Seed, gleiches Verhalten
+        """
         super().__init__(game, 'enemy', pos, size)
 
         self.walking = 0        # Anzahl von Frames, die sich der Gegner bewegt
+        self.seed = seed
+        self.draws = 0          # Anzahl bereits gezogener Zufallszahlen (Position im Zufallsstrom)
+
+    def random(self):
+        """ Nächste Zufallszahl 0 <= x < 1 aus dem eigenen Zufallsstrom (unabhängig vom Modul random und von anderen Gegnern) """
+        value = random_float(self.seed, self.draws)
+        self.draws += 1
+        return value
 
     def update(self, tilemap, movement=(0, 0)):
         """ Update die Position und Aktion/Animation des Gegners """
@@ -135,7 +207,7 @@ class Enemy(PhysicsEntity):
             # Prüfe -7 Pixel links oder 7 Pixel rechts von der Mitte des Gegners, ob Kachel solide (Boden) ist
             if tilemap.solid_check((self.rect().centerx + (-7 if self.flip else 7), self.pos[1] + 23)):
                 # Wemm Gegner gegen Wand läuft, dann drehe ihn um
-                if (self.collisions['right'] or self.collisions['left']):
+                if self.collisions & (COLLISION_RIGHT | COLLISION_LEFT):
                     self.flip = not self.flip
                 else:
                     # Werde langsamer, wenn Gegner sich bewegt (Je nach Richtung)
@@ -145,9 +217,9 @@ class Enemy(PhysicsEntity):
                 self.flip = not self.flip
 
             self.walking = max(0, self.walking - 1)
-        elif random.random() < 0.01:
-            # Anzahl von Frames, die sich der Gegner bewegt
-            self.walking = random.randint(30, 120)
+        elif self.random() < 0.01:
+            # Anzahl von Frames, die sich der Gegner bewegt (30 bis 120)
+            self.walking = 30 + int(self.random() * 91)
 
         super().update(tilemap, movement)
 
@@ -156,14 +228,16 @@ class Enemy(PhysicsEntity):
         else:
             self.set_action('idle')
 
-    def killed(self):
+    def killed(self, player_rect=None):
         """
         Prüfe, ob Gegner getötet wurde (Spieler ist auf Gegner gesprungen)
+        player_rect: Rechteck des Spielers (wird sonst neu berechnet)
         
         True: Gegner wurde getötet
         False: Gegner lebt
         """
-        player_rect = self.game.player.rect()
+        if player_rect is None:
+            player_rect = self.game.player.rect()
         enemy_rect = self.rect()
 
         # Prüfe, ob Spieler auf Gegner gesprungen ist
@@ -173,6 +247,8 @@ class Enemy(PhysicsEntity):
 
 
 class Player(PhysicsEntity):
+    __slots__ = ('air_time', 'jumps', 'invulnerable')
+
     def __init__(self, game, pos, size):
         super().__init__(game, 'player', pos, size)
         self.air_time = 0
@@ -185,7 +261,7 @@ class Player(PhysicsEntity):
         super().update(tilemap, movement)
 
         self.air_time += 1
-        if self.collisions['down']:
+        if self.collisions & COLLISION_DOWN:
             # Verliere ein Leben, wenn Spieler zu hoch springt und auf den Boden fällt
             if self.air_time > 95:
                 self.game.live -= 1
@@ -214,11 +290,15 @@ class Player(PhysicsEntity):
             self.jumps -= 1             # Spieler kann nur einmal springen
             self.air_time = 5           # Animation 'jump' wird angezeigt
 
-    def killed(self):
-        """ Prüfe, ob Spieler getötet wurde (Enemy ist in Spieler gelaufen) """
-        player_rect = self.game.player.rect()
+    def killed(self, player_rect=None):
+        """
+        Prüfe, ob Spieler getötet wurde (Enemy ist in Spieler gelaufen)
+        Es werden nur Gegner in der Nähe des Spielers geprüft (Raster game.enemy_grid, siehe scripts/spatial.py)
+        """
+        if player_rect is None:
+            player_rect = self.rect()
 
-        for enemy in self.game.enemies:
+        for enemy in self.game.enemy_grid.query(player_rect):
             enemy_rect = enemy.rect()
             if player_rect.colliderect(enemy_rect):
                 return True
@@ -0,0 +1,261 @@
+"""
+Kompaktes Binär-Format für Karten (.bmap)
+
+Aufbau der Datei (alle Zahlen little-endian):
+    Header          magic b'JNRM', Version, Chunk-Größe (als Shift), Kachel-Größe, Anzahl Typen, Anzahl Chunks
+    String-Tabelle  Namen der Kachel-Typen (Typ-Id 1, 2, ...): Länge (1 Byte) + UTF-8
+    Verzeichnis     Pro Chunk: chunk_x, chunk_y, Offset der Daten in der Datei (64 Bit, Version 1: 32 Bit), Anzahl Kacheln
+    Daten           Pro Chunk CHUNK_CELLS Zellen zu je 2 Byte: (Typ-Id << 8) | Variante, 0 = leer
+
+Die Chunk-Daten haben genau das Speicher-Layout der Tilemap (array('H')) und werden per mmap gelesen,
+ohne für einzelne Kacheln Python-Objekte zu erzeugen.
+
+Journal (.journal neben der Karte, siehe scripts/autosave.py):
+    Header          magic b'JNRJ', Version, Größe und Änderungszeit (ns) der Karten-Datei, auf die es sich bezieht, Anzahl Typen
+    String-Tabelle  Wie oben
+    Einträge        Pro geänderter Zelle: x, y, Zellen-Wert (0 = gelöscht) - wird nur angehängt
+
+Alle Dateien werden erst vollständig in eine temporäre Datei geschrieben und dann umbenannt (atomic_write)
+--> Ein Absturz während des Speicherns lässt immer die alte oder die neue Datei zurück, nie eine halbe
+
+Umwandeln (verlustfrei, in beide Richtungen):
+    python -m scripts.mapformat data/maps/0.json data/maps/0.bmap
+    python -m scripts.mapformat data/maps/0.bmap data/maps/0.json
+"""
+import mmap
+import os
+import shutil
+import struct
+import sys
+import tempfile
+from array import array
+from contextlib import contextmanager
+
+BINARY_EXTENSION = '.bmap'
+MAGIC = b'JNRM'
+VERSION = 2
+
+HEADER = struct.Struct('<4sHHHHI')      # magic, Version, Chunk-Shift, Kachel-Größe, Anzahl Typen, Anzahl Chunks
+DIRECTORY_ENTRY = struct.Struct('<iiQI')    # chunk_x, chunk_y, Offset, Anzahl Kacheln
+# Verzeichnis-Einträge aller lesbaren Versionen (Version 1: Offset mit 32 Bit -> Dateien bis 4 GiB)
+DIRECTORY_ENTRIES = {1: struct.Struct('<iiII'), VERSION: DIRECTORY_ENTRY}
+
+JOURNAL_EXTENSION = '.journal'
+JOURNAL_MAGIC = b'JNRJ'
+JOURNAL_VERSION = 1
+JOURNAL_HEADER = struct.Struct('<4sHqqH')   # magic, Version, Größe der Karte, Änderungszeit der Karte (ns), Anzahl Typen
+JOURNAL_ENTRY = struct.Struct('<iiH')       # x, y, Zellen-Wert
+
+
+class MapFileError(Exception):
+    """ Datei ist keine gültige Karte im Binär-Format """
+
+
+@contextmanager
+def atomic_write(path, mode='wb'):
+    """
+    Öffnet eine temporäre Datei neben path zum Schreiben, die erst am Ende (wenn kein Fehler aufgetreten ist) path ersetzt
+    os.replace ist atomar --> andere Programme und ein Neustart nach einem Absturz sehen nur die alte oder die neue Datei
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, mode) as f:
+            yield f
+            # Erst auf die Festplatte schreiben, dann umbenennen - sonst kann nach einem Stromausfall eine leere Datei übrig bleiben
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp legt die Datei nur für den eigenen Benutzer lesbar an -> Rechte der alten Datei übernehmen
+        if os.path.exists(path):
+            shutil.copymode(path, tmp_path)
+        else:
+            os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def pack_type_names(type_names):
+    """ String-Tabelle der Typ-Namen (Index 0 = leer, wird nicht gespeichert): Länge (1 Byte) + UTF-8 pro Name """
+    names = [name.encode('utf-8') for name in type_names[1:]]
+    return b''.join(bytes([len(name)]) + name for name in names)
+
+
+def unpack_type_names(data, pos, count):
+    """ Lese count Typ-Namen ab Position pos - gibt (type_names, Position nach der Tabelle) zurück """
+    type_names = [None]
+    for _ in range(count):
+        length = data[pos]
+        type_names.append(bytes(data[pos + 1:pos + 1 + length]).decode('utf-8'))
+        pos += 1 + length
+    return type_names, pos
+
+
+def write_map(path, tile_size, chunk_shift, type_names, chunks, pause=None):
+    """
+    Schreibe eine Karte im Binär-Format
+    type_names: Liste der Typ-Namen, Index = Typ-Id (Index 0 = leer, wird nicht gespeichert)
+    chunks: (chunk_x, chunk_y) -> array('H') mit 2^(2*chunk_shift) Zellen
+    pause: Wird nach jedem Chunk aufgerufen (siehe scripts/autosave.py)
+    """
+    cells = 1 << (2 * chunk_shift)
+    table = pack_type_names(type_names)
+
+    # Reihenfolge der Chunks beibehalten -> Kacheln (z.B. Spawner) werden nach dem Laden in derselben Reihenfolge gefunden
+    keys = list(chunks)
+    data_start = HEADER.size + len(table) + DIRECTORY_ENTRY.size * len(keys)
+    # Chunk-Daten auf 2 Byte ausrichten, damit sie direkt als array('H') gelesen werden können
+    data_start += data_start % 2
+
+    with atomic_write(path) as f:
+        f.write(HEADER.pack(MAGIC, VERSION, chunk_shift, tile_size, len(type_names) - 1, len(keys)))
+        f.write(table)
+        for i, key in enumerate(keys):
+            f.write(DIRECTORY_ENTRY.pack(key[0], key[1], data_start + i * cells * 2, cells - chunks[key].count(0)))
+        f.write(bytes(data_start - f.tell()))
+        for key in keys:
+            chunk = chunks[key]
+            if sys.byteorder == 'big':
+                chunk = array('H', chunk)
+                chunk.byteswap()
+            f.write(chunk.tobytes())
+            if pause is not None:
+                pause()
+
+
+def file_id(path):
+    """ Größe und Änderungszeit (ns) der Datei path - (-1, -1), wenn es sie nicht gibt """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return (-1, -1)
+    return (stat.st_size, stat.st_mtime_ns)
+
+
+def write_journal(path, base, type_names, edits, append):
+    """
+    Schreibe geänderte Zellen in das Journal path
+    base: file_id der Karten-Datei, zu der das Journal gehört
+    edits: (x, y) -> Zellen-Wert
+    append: An ein bestehendes Journal anhängen (sonst neues Journal mit Header)
+    """
+    entries = b''.join(JOURNAL_ENTRY.pack(x, y, value) for (x, y), value in edits.items())
+    if not append:
+        with atomic_write(path) as f:
+            f.write(JOURNAL_HEADER.pack(JOURNAL_MAGIC, JOURNAL_VERSION, base[0], base[1], len(type_names) - 1))
+            f.write(pack_type_names(type_names))
+            f.write(entries)
+        return
+    with open(path, 'ab') as f:
+        f.write(entries)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def read_journal(path, base):
+    """
+    Lese das Journal path - gibt (type_names, [(x, y, Zellen-Wert), ...]) zurück
+    None, wenn es kein Journal gibt oder es nicht zur Karten-Datei mit file_id base gehört (Karte wurde danach komplett gespeichert)
+    Ein unvollständiger letzter Eintrag (Absturz beim Anhängen) wird ignoriert
+    """
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except FileNotFoundError:
+        return None
+    try:
+        magic, version, size, mtime, type_count = JOURNAL_HEADER.unpack_from(data, 0)
+        if magic != JOURNAL_MAGIC or version != JOURNAL_VERSION:
+            raise MapFileError(f"{path}: kein Journal (Version {JOURNAL_VERSION})")
+        type_names, pos = unpack_type_names(data, JOURNAL_HEADER.size, type_count)
+    except (struct.error, IndexError):
+        raise MapFileError(f"{path}: Header unvollständig")
+    if (size, mtime) != tuple(base):
+        return None
+    count = (len(data) - pos) // JOURNAL_ENTRY.size
+    return type_names, [JOURNAL_ENTRY.unpack_from(data, pos + i * JOURNAL_ENTRY.size) for i in range(count)]
+
+
+class MapFile:
+    """
+    Geöffnete Karte im Binär-Format (per mmap)
+    Header, Typ-Namen und Verzeichnis werden sofort gelesen, die Chunk-Daten erst mit chunk()
+    """
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'rb')
+        try:
+            self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Leere Datei kann nicht gemappt werden
+            self.file.close()
+            raise MapFileError(f"{path}: leere Datei")
+
+        try:
+            magic, version, self.chunk_shift, self.tile_size, type_count, chunk_count = HEADER.unpack_from(self.data, 0)
+        except struct.error:
+            self.close()
+            raise MapFileError(f"{path}: Header unvollständig")
+        if magic != MAGIC or version not in DIRECTORY_ENTRIES:
+            self.close()
+            raise MapFileError(f"{path}: keine Karte im Binär-Format (Version {', '.join(map(str, DIRECTORY_ENTRIES))})")
+        self.cells = 1 << (2 * self.chunk_shift)
+
+        # String-Tabelle: Typ-Namen
+        self.type_names, pos = unpack_type_names(self.data, HEADER.size, type_count)
+
+        # Verzeichnis: (chunk_x, chunk_y) -> (Offset, Anzahl Kacheln)
+        entry = DIRECTORY_ENTRIES[version]
+        self.directory = {}
+        for _ in range(chunk_count):
+            cx, cy, offset, count = entry.unpack_from(self.data, pos)
+            self.directory[(cx, cy)] = (offset, count)
+            pos += entry.size
+
+    def chunk(self, key):
+        """ Lese die Zellen des Chunks key als array('H') (None, wenn der Chunk nicht in der Datei ist) """
+        if key not in self.directory:
+            return None
+        offset = self.directory[key][0]
+        chunk = array('H')
+        chunk.frombytes(self.data[offset:offset + self.cells * 2])
+        if sys.byteorder == 'big':
+            chunk.byteswap()
+        return chunk
+
+    def tile_count(self):
+        """ Anzahl aller Kacheln in der Datei """
+        return sum(count for offset, count in self.directory.values())
+
+    def close(self):
+        self.data.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def convert(src, dst):
+    """ Wandle eine Karte zwischen JSON und Binär-Format um (Richtung über die Dateiendungen) und prüfe, dass nichts verloren geht """
+    from scripts.tilemap import Tilemap
+
+    tilemap = Tilemap(None)
+    tilemap.load(src)
+    tilemap.save(dst)
+
+    check = Tilemap(None)
+    check.load(dst)
+    if check.tile_size != tilemap.tile_size or sorted(check.iter_tiles()) != sorted(tilemap.iter_tiles()):
+        raise MapFileError(f"Umwandlung {src} -> {dst} ist nicht verlustfrei")
+    print(f"{src} -> {dst}: {tilemap.tile_count} Kacheln")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        print(__doc__)
+        sys.exit(1)
+    convert(sys.argv[1], sys.argv[2])
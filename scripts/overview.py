@@ -0,0 +1,134 @@
+import time
+
+import pygame
+
+MIP_TILE = 128          # Größe (Pixel) der vorgerenderten Flächen auf allen Stufen
+MIP_LEVELS = 8          # Anzahl der Stufen (Stufe 0: ein Chunk pro Fläche, jede weitere Stufe halbiert die Größe)
+BUILD_BUDGET = 0.008    # Höchstens so viele Sekunden pro Frame für neue Flächen (der Rest folgt in den nächsten Frames)
+PENDING = object()      # Fläche noch nicht fertig (Zeit-Budget aufgebraucht)
+
+
+class MapOverview:
+    """
+    Verkleinerte Ansicht der ganzen Karte (Übersicht im Editor) aus vorgerenderten Stufen (mip levels)
+
+    Stufe 0: Jeder Chunk wird einmal auf MIP_TILE x MIP_TILE Pixel verkleinert (aus der Fläche von Tilemap.bake_chunk)
+    Stufe n: Jede Fläche fasst 2x2 Flächen der Stufe n - 1 zusammen, also 2^n x 2^n Chunks
+    --> Egal wie weit herausgezoomt wird, pro Frame werden nur die wenigen Flächen geblittet, die das Display bedecken
+
+    Ändert sich die Karte, werden nur die betroffenen Flächen (und die darüber liegenden Stufen) verworfen (Tilemap.take_dirty_chunks)
+    und beim nächsten Zeichnen neu erstellt. Fehlende Flächen werden mit einem Zeit-Budget pro Frame nachgebaut
+    """
+    def __init__(self, tilemap, levels=MIP_LEVELS):
+        """
+        tilemap: Karte, die angezeigt wird
+        levels: Anzahl der Stufen
+        """
+        self.tilemap = tilemap
+        self.levels = levels
+        self.mips = None                                # Pro Stufe: (x, y) -> Fläche (None = leer), wird beim ersten update() aufgebaut
+        self.occupied = None                            # Pro Stufe: Flächen, auf denen Kacheln liegen können (alle anderen sind leer)
+        self.scratch = pygame.Surface((2 * MIP_TILE, 2 * MIP_TILE))    # 2x2 Flächen einer Stufe vor dem Verkleinern
+        self.built = 0                                  # Anzahl neu erstellter Flächen beim letzten render()
+
+    def scale(self, level):
+        """ Verkleinerung der Stufe level (z.B. 0.5 = halbe Größe) """
+        return MIP_TILE / (self.tilemap.chunk_px() << level)
+
+    def update(self):
+        """ Verwerfe die Flächen aller Stufen, deren Chunks sich seit dem letzten Aufruf verändert haben """
+        dirty = self.tilemap.take_dirty_chunks()
+        if dirty is None or self.mips is None:
+            # Erster Aufruf oder ganze Karte ersetzt (neu geladen) -> alles verwerfen
+            self.mips = [{} for _ in range(self.levels)]
+            self.occupied = [set() for _ in range(self.levels)]
+            # Ein Chunk ist auch rechts und unterhalb zu sehen, wenn seine Kacheln hineinragen (siehe Tilemap.bake_chunk)
+            dirty = set()
+            for cx, cy in self.tilemap.chunk_keys():
+                dirty.update([(cx, cy), (cx + 1, cy), (cx, cy + 1), (cx + 1, cy + 1)])
+
+        for cx, cy in dirty:
+            for level in range(self.levels):
+                key = (cx >> level, cy >> level)
+                self.mips[level].pop(key, None)
+                # Flächen werden hier nie wieder als leer markiert -> schlimmstenfalls wird eine leere Fläche erstellt
+                self.occupied[level].add(key)
+
+    def mip(self, level, key, deadline=None, store=True):
+        """
+        Gibt die Fläche key der Stufe level zurück (None = leer, PENDING = Zeit-Budget aufgebraucht)
+        deadline: Spätestens zu dieser Zeit (time.perf_counter) keine neuen Flächen mehr beginnen (None = kein Limit)
+        store: Fläche behalten (False = nur zurückgeben)
+        """
+        if key not in self.occupied[level]:
+            return None
+        surf = self.mips[level].get(key, PENDING)
+        if surf is not PENDING:
+            return surf
+        if deadline is not None and store and time.perf_counter() > deadline:
+            return PENDING
+
+        if level == 0:
+            tilemap = self.tilemap
+            # Schon für render() vorgerenderte Chunks wiederverwenden, sonst nur für die Übersicht zeichnen (nicht im Cache behalten)
+            chunk_surf = tilemap.chunk_cache[key] if key in tilemap.chunk_cache else tilemap.bake_chunk(key, store=False)
+            surf = None if chunk_surf is None else pygame.transform.smoothscale(chunk_surf, (MIP_TILE, MIP_TILE))
+        else:
+            # Stufe 0 wird für höhere Stufen nur kurz erstellt (eine Fläche pro Chunk würde bei großen Karten viel Speicher belegen)
+            children = []
+            for dy in (0, 1):
+                for dx in (0, 1):
+                    child = self.mip(level - 1, ((key[0] << 1) | dx, (key[1] << 1) | dy), deadline, level > 1)
+                    if child is PENDING:
+                        return PENDING
+                    children.append((child, dx, dy))
+
+            if all(child is None for child, dx, dy in children):
+                surf = None
+            else:
+                # 2x2 Flächen nebeneinander zeichnen und auf einmal verkleinern
+                scratch = self.scratch
+                scratch.fill((0, 0, 0))
+                for child, dx, dy in children:
+                    if child is not None:
+                        scratch.blit(child, (dx * MIP_TILE, dy * MIP_TILE))
+                surf = pygame.transform.smoothscale(scratch, (MIP_TILE, MIP_TILE))
+
+        self.built += 1
+        if store:
+            self.mips[level][key] = surf
+        return surf
+
+    def render(self, surf, center, level, budget=BUILD_BUDGET):
+        """
+        Zeichne die Karte verkleinert (Stufe level) auf surf, die Welt-Position center (Pixel) liegt in der Mitte
+        budget: Zeit in Sekunden für neue Flächen (None = alle sofort erstellen), fehlende Flächen bleiben schwarz
+        Gibt zurück, ob alle sichtbaren Flächen fertig sind
+        """
+        self.update()
+        self.built = 0
+        deadline = None if budget is None else time.perf_counter() + budget
+
+        # Linke obere Ecke des Displays in Pixeln der Stufe
+        scale = self.scale(level)
+        left = int(center[0] * scale) - surf.get_width() // 2
+        top = int(center[1] * scale) - surf.get_height() // 2
+        complete = True
+        for my in range(top // MIP_TILE, (top + surf.get_height()) // MIP_TILE + 1):
+            for mx in range(left // MIP_TILE, (left + surf.get_width()) // MIP_TILE + 1):
+                mip = self.mip(level, (mx, my), deadline)
+                if mip is PENDING:
+                    complete = False
+                elif mip is not None:
+                    surf.blit(mip, (mx * MIP_TILE - left, my * MIP_TILE - top))
+        return complete
+
+    def to_world(self, pos, size, center, level):
+        """ Rechne eine Position pos auf dem Display (Größe size) der Übersicht in eine Welt-Position (Pixel) um """
+        scale = self.scale(level)
+        return (center[0] + (pos[0] - size[0] // 2) / scale, center[1] + (pos[1] - size[1] // 2) / scale)
+
+    def to_screen(self, pos, size, center, level):
+        """ Rechne eine Welt-Position pos (Pixel) in eine Position auf dem Display (Größe size) der Übersicht um """
+        scale = self.scale(level)
+        return ((pos[0] - center[0]) * scale + size[0] // 2, (pos[1] - center[1]) * scale + size[1] // 2)
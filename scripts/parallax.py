@@ -0,0 +1,120 @@
+from array import array
+
+import pygame
+
+
+class ParallaxBand:
+    """
+    Gruppe von Hintergrund-Elementen (z.B. Wolken) mit gleicher Tiefe und gleicher Geschwindigkeit
+
+    Alle Elemente werden einmalig auf einen Streifen gezeichnet, der sich in x- und y-Richtung wiederholt (wrap-around)
+    --> Pro Frame wird nur der passende Ausschnitt des Streifens geblittet (ein Blit pro Band, egal wie viele Elemente)
+    """
+    def __init__(self, depth, speed, elements):
+        """
+        depth: Tiefe (0 = bewegt sich nicht mit der Kamera, 1 = bewegt sich wie die Karte)
+        speed: Eigene Bewegung in Pixeln pro Tick nach rechts
+        elements: Liste von (Bild, x, y) - Position des Elements im Band (beliebig groß, wird wiederholt)
+        """
+        self.depth = depth
+        self.speed = speed
+        self.elements = elements
+        # Größtes Element: Elemente verschwinden ganz aus dem Bild, bevor sie auf der anderen Seite wieder erscheinen
+        self.max_size = (max((img.get_width() for img, x, y in elements), default=0),
+                         max((img.get_height() for img, x, y in elements), default=0))
+
+        self.size = None                # Größe der Fläche, für die der Streifen gebaut wurde
+        self.period = None              # Nach so vielen Pixeln (x, y) wiederholt sich das Band
+        self.strip = None               # Vorgezeichneter Streifen (period + size), siehe build()
+        self.rects = []                 # Bereiche der Elemente innerhalb einer Periode
+
+    def build(self, size):
+        """
+        Zeichne alle Elemente auf den Streifen für eine Fläche der Größe size
+        Der Streifen ist eine Periode plus eine Bildschirmbreite/-höhe groß
+        --> Jeder Ausschnitt der Größe size ab einer Position innerhalb der Periode liegt ganz im Streifen
+        """
+        width, height = size
+        period_x = width + self.max_size[0]
+        period_y = height + self.max_size[1]
+
+        # Schwarz ist, wie bei den Bildern (load_image), die transparente Farbe
+        # RLEACCEL: Der Streifen ändert sich nie -> transparente Bereiche werden beim Blitten übersprungen
+        strip = pygame.Surface((period_x + width, period_y + height))
+        strip.fill((0, 0, 0))
+        self.rects = []
+        for img, x, y in self.elements:
+            x = int(x % period_x)
+            y = int(y % period_y)
+            self.rects.append(pygame.Rect((x, y), img.get_size()))
+            # Elemente am Rand der Periode ragen in die nächste Periode hinein -> auch die Kopien zeichnen
+            for copy_x in (x - period_x, x, x + period_x):
+                for copy_y in (y - period_y, y, y + period_y):
+                    strip.blit(img, (copy_x, copy_y))
+        strip.set_colorkey((0, 0, 0), pygame.RLEACCEL)
+
+        self.size = size
+        self.period = (period_x, period_y)
+        self.strip = strip
+
+    def viewport(self, size, offset, shift):
+        """
+        Position (x, y) des sichtbaren Ausschnitts im Streifen
+        size: Größe der Fläche, offset: Kamera-Position, shift: Eigene Bewegung des Bands seit dem Start (in Pixeln)
+        """
+        if self.size != size:
+            self.build(size)
+        # Bildschirm-Position eines Elements: (x + shift - offset * depth) % period - max_size (wie vorher pro Wolke)
+        # --> Pixel X auf dem Bildschirm zeigt Pixel (X + max_size - shift + offset * depth) % period des Bands
+        return (int((self.max_size[0] - shift + offset[0] * self.depth) % self.period[0]),
+                int((self.max_size[1] + offset[1] * self.depth) % self.period[1]))
+
+    def screen_rects(self, view):
+        """ Bereiche der Elemente auf dem Bildschirm, wenn der Ausschnitt view (siehe viewport) gezeichnet wird """
+        width, height = self.size
+        period_x, period_y = self.period
+        bounds = pygame.Rect((0, 0), self.size)
+        rects = []
+        for rect in self.rects:
+            x = (rect.x - view[0]) % period_x
+            y = (rect.y - view[1]) % period_y
+            # Das Element kann auch am linken/oberen Rand hereinragen (Kopie eine Periode vorher)
+            for screen_x in (x, x - period_x):
+                for screen_y in (y, y - period_y):
+                    screen_rect = pygame.Rect(screen_x, screen_y, rect.w, rect.h).clip(bounds)
+                    if screen_rect.w and screen_rect.h:
+                        rects.append(screen_rect)
+        return rects
+
+
+class ParallaxLayer:
+    """
+    Hintergrund aus mehreren Bändern unterschiedlicher Tiefe (hinten -> vorne gezeichnet)
+
+    Die Bewegung aller Bänder steht in einem Array und wird in einer Schleife aktualisiert
+    Zeichnen kostet einen Blit pro Band - unabhängig von der Anzahl der Elemente
+    """
+    def __init__(self, bands):
+        """
+        bands: Liste von ParallaxBand (wird nach Tiefe sortiert)
+        """
+        self.bands = sorted(bands, key=lambda band: band.depth)
+        self.speeds = array('d', [band.speed for band in self.bands])
+        self.shifts = array('d', bytes(8 * len(self.bands)))    # Eigene Bewegung jedes Bands seit dem Start
+
+    def update(self):
+        """ Bewege alle Bänder um ihre Geschwindigkeit weiter """
+        shifts = self.shifts
+        speeds = self.speeds
+        for i in range(len(shifts)):
+            shifts[i] += speeds[i]
+
+    def viewports(self, size, offset=(0, 0)):
+        """ Sichtbare Ausschnitte aller Bänder für eine Fläche der Größe size und die Kamera-Position offset """
+        return [band.viewport(size, offset, shift) for band, shift in zip(self.bands, self.shifts)]
+
+    def render(self, surf, offset=(0, 0)):
+        """ Zeichne alle Bänder auf die Oberfläche (ein Blit pro Band) """
+        size = surf.get_size()
+        for band, view in zip(self.bands, self.viewports(size, offset)):
+            surf.blit(band.strip, (0, 0), (view, size))
@@ -0,0 +1,79 @@
+import threading
+import time
+
+
+class PreparedLevel:
+    """ Fertig geladenes Level: Karte und alle Objekte, bereit zum Einsetzen in das Spiel (Game.load_game) """
+    def __init__(self, id, tilemap, player, enemies, hearts, goal):
+        self.id = id
+        self.tilemap = tilemap
+        self.player = player
+        self.enemies = enemies
+        self.hearts = hearts
+        self.goal = goal
+
+
+class LevelPrefetcher:
+    """
+    Lädt das nächste Level in einem Hintergrund-Thread, während das aktuelle Level gespielt wird
+    --> Beim Level-Wechsel muss nur noch das fertige Level eingesetzt werden (kein Laden, kein JSON-Parsen)
+
+    Ist das Level beim Wechsel noch nicht fertig, wird auf den Thread gewartet
+    Wurde das Level nicht angefragt (oder ist das Laden fehlgeschlagen), wird es sofort geladen
+    """
+    def __init__(self, prepare):
+        """
+        prepare: Funktion, die ein Level lädt: prepare(id) -> PreparedLevel (darf den Zustand des Spiels nicht verändern)
+        """
+        self.prepare = prepare
+        self.id = None                  # Angefragtes Level
+        self.thread = None
+        self.result = None
+
+        # Statistik der Level-Wechsel: 'ready' = Level war fertig, 'waited' = auf den Thread gewartet, 'loaded' = sofort geladen
+        self.stats = {'ready': 0, 'waited': 0, 'loaded': 0}
+        self.last = None                # (Level, Dauer in ms, Art) des letzten Wechsels
+
+    def request(self, id):
+        """ Starte das Laden von Level id im Hintergrund """
+        if self.id == id:
+            return
+        self.discard()
+        self.id = id
+        self.thread = threading.Thread(target=self.worker, args=(id,), name='LevelPrefetcher', daemon=True)
+        self.thread.start()
+
+    def worker(self, id):
+        """ Hintergrund-Thread: Lade das Level """
+        try:
+            self.result = self.prepare(id)
+        except Exception:
+            # Fehler werden beim synchronen Laden in take() erneut ausgelöst und dort sichtbar
+            self.result = None
+
+    def take(self, id):
+        """ Gibt das fertige Level id zurück - wartet auf den Hintergrund-Thread oder lädt das Level sofort """
+        start = time.perf_counter()
+        level = None
+        how = 'loaded'
+        if self.id == id:
+            how = 'waited' if self.thread.is_alive() else 'ready'
+            self.thread.join()
+            level = self.result
+            self.id = self.thread = self.result = None
+        if level is None:
+            how = 'loaded'
+            level = self.prepare(id)
+
+        self.stats[how] += 1
+        self.last = (id, (time.perf_counter() - start) * 1000, how)
+        return level
+
+    def discard(self):
+        """ Verwerfe ein angefragtes Level, das nicht mehr gebraucht wird """
+        if self.thread is not None:
+            self.thread.join()
+            if self.result is not None:
+                # Karte schließen (beim Streaming läuft sonst deren Hintergrund-Thread weiter)
+                self.result.tilemap.clear()
+        self.id = self.thread = self.result = None
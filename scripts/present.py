@@ -0,0 +1,107 @@
+import pygame
+
+# Arten, das Display (niedrige Auflösung) auf das Fenster zu bringen
+#   integer: Größter ganzzahliger Faktor, der ins Fenster passt, mit schwarzem Rand (scharfe, gleich große Pixel)
+#   fit:     Größter (auch krummer) Faktor mit gleichem Seitenverhältnis, mit schwarzem Rand
+#   stretch: Auf das ganze Fenster strecken (Seitenverhältnis kann sich ändern)
+#   scaled:  SDL vergrößert selbst (pygame.SCALED, meist auf der Grafikkarte) - das Display wird nur 1:1 kopiert
+PRESENT_MODES = ['integer', 'fit', 'stretch', 'scaled']
+
+
+class Presenter:
+    """
+    Bringt das Display (z.B. 320x240) vergrößert auf das Fenster
+
+    Die Zielfläche im Fenster (subsurface) wird nur beim Erstellen und bei Größenänderungen angelegt
+    --> pygame.transform.scale schreibt jeden Frame direkt in das Fenster, es wird keine neue Fläche erzeugt
+    Bei ganzzahligen Faktoren können auch nur einzelne Bereiche vergrößert werden (siehe present(..., rects))
+    """
+    def __init__(self, size, window_size=None, mode='integer'):
+        """
+        size: Größe des Displays (Breite, Höhe)
+        window_size: Größe des Fensters (None = doppelte Größe des Displays)
+        mode: Art der Vergrößerung (siehe PRESENT_MODES)
+        """
+        if mode not in PRESENT_MODES:
+            raise ValueError(f"Unbekannte Vergrößerung: {mode} (erlaubt: {', '.join(PRESENT_MODES)})")
+        self.size = size
+        self.mode = mode
+        if window_size is None:
+            window_size = (size[0] * 2, size[1] * 2)
+
+        if mode == 'scaled':
+            # SDL wählt die Fenstergröße selbst (ganzzahliges Vielfaches), das Fenster hat intern die Größe des Displays
+            try:
+                self.screen = pygame.display.set_mode(size, pygame.SCALED)
+            except pygame.error as e:
+                # Nicht jeder Treiber hat einen passenden Renderer -> selbst vergrößern
+                print(f"WARNUNG: pygame.SCALED nicht verfügbar ({e}) - verwende 'integer'")
+                self.mode = 'integer'
+        if self.mode != 'scaled':
+            self.screen = pygame.display.set_mode(window_size, pygame.RESIZABLE)
+        self.resize()
+
+    def resize(self):
+        """ Zielbereich neu berechnen (nach dem Erstellen und wenn sich die Fenstergröße geändert hat) """
+        self.screen = pygame.display.get_surface()
+        width, height = self.screen.get_size()
+        if self.mode == 'scaled':
+            scale_x = scale_y = 1
+        elif self.mode == 'integer':
+            scale_x = scale_y = max(1, min(width // self.size[0], height // self.size[1]))
+        elif self.mode == 'fit':
+            scale_x = scale_y = min(width / self.size[0], height / self.size[1])
+        else:
+            scale_x = width / self.size[0]
+            scale_y = height / self.size[1]
+
+        target_size = (min(width, int(self.size[0] * scale_x)), min(height, int(self.size[1] * scale_y)))
+        self.target = pygame.Rect(((width - target_size[0]) // 2, (height - target_size[1]) // 2), target_size)
+        self.target_surf = self.screen.subsurface(self.target)
+        self.scale = (scale_x, scale_y)
+        # Nur bei ganzzahligen Faktoren passen vergrößerte Teil-Bereiche genau aneinander
+        self.partial = scale_x == scale_y and scale_x == int(scale_x)
+
+        # Rand um das Bild einmalig schwarz füllen
+        self.screen.fill((0, 0, 0))
+        self.full = True                # Nächstes present() muss das ganze Fenster übergeben
+
+    def present(self, display, rects=None):
+        """
+        Vergrößere display in das Fenster
+        rects: Nur diese Bereiche des Displays (None = alles)
+        Gibt die veränderten Bereiche des Fensters zurück (für flip), None = ganzes Fenster
+        """
+        if rects is None or not self.partial or self.full:
+            if self.mode == 'scaled':
+                self.screen.blit(display, (0, 0))
+            else:
+                pygame.transform.scale(display, self.target.size, self.target_surf)
+            self.full = False
+            return None
+
+        scale = int(self.scale[0])
+        bounds = display.get_rect()
+        screen_rects = []
+        for rect in rects:
+            rect = rect.clip(bounds)
+            if not rect.w or not rect.h:
+                continue
+            target = pygame.Rect(self.target.x + rect.x * scale, self.target.y + rect.y * scale, rect.w * scale, rect.h * scale)
+            if scale == 1:
+                self.screen.blit(display, target, rect)
+            else:
+                pygame.transform.scale(display.subsurface(rect), target.size, self.screen.subsurface(target))
+            screen_rects.append(target)
+        return screen_rects
+
+    def flip(self, screen_rects=None):
+        """ Zeige die veränderten Bereiche screen_rects (Ergebnis von present) im Fenster an """
+        if screen_rects is None:
+            pygame.display.update()
+        elif screen_rects:
+            pygame.display.update(screen_rects)
+
+    def to_display(self, pos):
+        """ Rechne eine Position im Fenster (z.B. Maus) in eine Position auf dem Display um """
+        return ((pos[0] - self.target.x) / self.scale[0], (pos[1] - self.target.y) / self.scale[1])
@@ -0,0 +1,126 @@
+import csv
+import json
+import time
+from array import array
+
+import pygame
+
+# Phasen eines Frames in der Reihenfolge, in der sie in Game.run auftreten
+PHASES = ['clouds', 'tilemap', 'entities', 'kills', 'events', 'upscale', 'display', 'wait']
+# Zähler pro Frame
+COUNTERS = ['ticks', 'blits', 'tiles', 'collision_rects', 'active', 'sleeping']
+
+class FrameProfiler:
+    """
+    Misst die Dauer der einzelnen Phasen jedes Frames und zählt Blits, gezeichnete Kacheln und getestete Kollisions-Rechtecke
+
+    Die Werte der letzten size Frames werden in einem Ringpuffer fester Größe gespeichert (keine Allokationen pro Frame)
+    Ablauf pro Frame: begin() -> lap('phase') nach jeder Phase -> count('zähler', n) -> end()
+    """
+    def __init__(self, size=600):
+        """
+        size: Anzahl der Frames, die gespeichert werden (600 Frames = 10 Sekunden bei 60 FPS)
+        """
+        self.size = size
+        self.frames = 0                 # Anzahl aller aufgezeichneten Frames
+        self.show = False               # Overlay anzeigen?
+
+        # Ringpuffer: Eine Spalte pro Phase/Zähler
+        self.times = {phase: array('d', bytes(8 * size)) for phase in PHASES}
+        self.counts = {counter: array('q', bytes(8 * size)) for counter in COUNTERS}
+
+        # Werte des aktuellen Frames
+        self.current_times = dict.fromkeys(PHASES, 0.0)
+        self.current_counts = dict.fromkeys(COUNTERS, 0)
+        self.last = time.perf_counter()
+
+        self.font = None
+
+    def begin(self):
+        """ Starte einen neuen Frame """
+        for phase in PHASES:
+            self.current_times[phase] = 0.0
+        for counter in COUNTERS:
+            self.current_counts[counter] = 0
+        self.last = time.perf_counter()
+
+    def lap(self, phase):
+        """ Schreibe die Zeit seit dem letzten lap()/begin() der Phase phase zu """
+        now = time.perf_counter()
+        self.current_times[phase] += now - self.last
+        self.last = now
+
+    def skip(self):
+        """ Verwerfe die Zeit seit dem letzten lap()/begin() (z.B. Zeichnen des Overlays selbst) """
+        self.last = time.perf_counter()
+
+    def count(self, counter, n=1):
+        """ Erhöhe den Zähler counter des aktuellen Frames um n """
+        self.current_counts[counter] += n
+
+    def end(self):
+        """ Beende den Frame und schreibe die Werte in den Ringpuffer """
+        i = self.frames % self.size
+        for phase in PHASES:
+            self.times[phase][i] = self.current_times[phase]
+        for counter in COUNTERS:
+            self.counts[counter][i] = self.current_counts[counter]
+        self.frames += 1
+
+    def rows(self):
+        """ Gibt alle gespeicherten Frames in zeitlicher Reihenfolge als Dictionaries zurück (Zeiten in ms) """
+        n = min(self.frames, self.size)
+        rows = []
+        for frame in range(self.frames - n, self.frames):
+            i = frame % self.size
+            row = {'frame': frame}
+            for phase in PHASES:
+                row[phase + '_ms'] = self.times[phase][i] * 1000
+            for counter in COUNTERS:
+                row[counter] = self.counts[counter][i]
+            rows.append(row)
+        return rows
+
+    def averages(self, frames=60):
+        """ Durchschnitt der letzten frames Frames (Zeiten in ms) """
+        n = min(self.frames, self.size, frames)
+        if n == 0:
+            return {}
+        indices = [frame % self.size for frame in range(self.frames - n, self.frames)]
+        result = {}
+        for phase in PHASES:
+            result[phase] = sum(self.times[phase][i] for i in indices) / n * 1000
+        for counter in COUNTERS:
+            result[counter] = sum(self.counts[counter][i] for i in indices) / n
+        return result
+
+    def dump(self, path):
+        """ Speichere alle Frames im Ringpuffer als CSV oder JSON (abhängig von der Dateiendung) """
+        rows = self.rows()
+        if path.endswith('.json'):
+            with open(path, 'w') as f:
+                json.dump({'phases': PHASES, 'counters': COUNTERS, 'frames': rows}, f, indent=1)
+        else:
+            with open(path, 'w', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=['frame'] + [phase + '_ms' for phase in PHASES] + COUNTERS)
+                writer.writeheader()
+                writer.writerows(rows)
+        print(f"Profil gespeichert: {path}")
+
+    def render(self, surf):
+        """ Zeichne das Overlay mit den Durchschnittswerten der letzten Sekunde in die obere rechte Ecke """
+        if self.font is None:
+            self.font = pygame.font.Font(None, 18)
+
+        averages = self.averages()
+        if not averages:
+            return
+        frame_ms = sum(averages[phase] for phase in PHASES if phase != 'wait')
+        lines = [f"frame {frame_ms:5.2f} ms"]
+        lines += [f"{phase:9} {averages[phase]:5.2f} ms" for phase in PHASES]
+        lines += [f"{counter:9} {averages[counter]:6.0f}" for counter in COUNTERS]
+
+        x = surf.get_width() - 150
+        for i, line in enumerate(lines):
+            img = self.font.render(line, False, (255, 255, 255), (0, 0, 0))
+            surf.blit(img, (x, 4 + i * 14))
@@ -0,0 +1,177 @@
+import pygame
+
+
+class WorldLayer:
+    """
+    Zwischengespeicherte Ebene mit allen Kacheln des sichtbaren Bereichs (so groß wie das Display)
+
+    Bewegt sich die Kamera, wird die Ebene um die (ganzzahlige) Verschiebung verschoben (Surface.scroll)
+    und nur die neu sichtbaren Streifen am Rand werden aus den Chunks nachgezeichnet
+    --> Steht die Kamera still, wird keine einzige Kachel gezeichnet, nur die fertige Ebene geblittet
+    Ändert sich die Karte (Editor, Streaming), werden nur die geänderten Bereiche neu gezeichnet, die in der Ebene liegen (Tilemap.changed_rects)
+    --> Im Hintergrund nachgeladene Chunks außerhalb des Bildschirms kosten nichts. Neues Level: Die Ebene wird komplett neu gezeichnet
+    """
+    def __init__(self, size):
+        """
+        size: Größe der Ebene (Breite, Höhe) in Pixeln = Größe des Displays
+        """
+        # Schwarz ist, wie bei den vorgerenderten Chunks, die transparente Farbe
+        self.surf = pygame.Surface(size)
+        self.surf.set_colorkey((0, 0, 0))
+        self.tilemap = None
+        self.render_revision = None
+        self.offset = None
+        self.changed = True             # Hat sich die Ebene beim letzten update() verändert?
+
+    def update(self, tilemap, offset):
+        """
+        Bringe die Ebene auf die Kamera-Position offset (ganzzahlig) und gibt die Fläche zurück
+        """
+        surf = self.surf
+        width, height = surf.get_size()
+        self.changed = True
+        changed = []
+        if self.tilemap is tilemap and self.offset is not None and self.render_revision != tilemap.render_revision:
+            changed = tilemap.changed_rects(self.render_revision)
+        if self.tilemap is not tilemap or self.offset is None or changed is None:
+            self.redraw(tilemap, offset, (0, 0, width, height))
+        else:
+            dx = offset[0] - self.offset[0]
+            dy = offset[1] - self.offset[1]
+            if abs(dx) >= width or abs(dy) >= height:
+                self.redraw(tilemap, offset, (0, 0, width, height))
+            elif dx or dy:
+                # Inhalt verschieben (Kamera nach rechts -> Bild nach links) und die frei gewordenen Streifen nachzeichnen
+                surf.scroll(-dx, -dy)
+                if dx:
+                    self.redraw(tilemap, offset, (width - dx if dx > 0 else 0, 0, abs(dx), height))
+                if dy:
+                    self.redraw(tilemap, offset, (0, height - dy if dy > 0 else 0, width, abs(dy)))
+            else:
+                self.changed = False
+
+            # Geänderte Bereiche der Karte, soweit sie in der Ebene liegen
+            area = surf.get_rect()
+            for rect in changed:
+                rect = rect.move(-offset[0], -offset[1]).clip(area)
+                if rect.w and rect.h:
+                    self.redraw(tilemap, offset, rect)
+                    self.changed = True
+
+        self.tilemap = tilemap
+        self.render_revision = tilemap.render_revision
+        self.offset = offset
+        return surf
+
+    def redraw(self, tilemap, offset, area):
+        """ Zeichne den Bereich area (x, y, w, h) der Ebene neu """
+        surf = self.surf
+        surf.set_clip(area)
+        surf.fill((0, 0, 0))
+        tilemap.render(surf, offset, area)
+        surf.set_clip(None)
+
+
+class Backdrop:
+    """
+    Alles hinter den Sprites: Hintergrund-Bild, Wolken und Kachel-Ebene (WorldLayer), fertig zusammengesetzt
+
+    Mit dem fertigen Bild werden die alten Positionen der Sprites im Display überdeckt (statt alles neu zu zeichnen)
+    Steht die Kamera still, wird nur der Bereich neu zusammengesetzt, in dem sich Wolken-Bänder bewegt haben
+    """
+    def __init__(self, size):
+        """
+        size: Größe (Breite, Höhe) in Pixeln = Größe des Displays
+        """
+        self.surf = pygame.Surface(size)
+        self.views = None               # Ausschnitte der Wolken-Bänder beim letzten update() (None = nächstes Mal komplett neu)
+        self.blits = 0                  # Anzahl Blits beim letzten update()
+
+    def invalidate(self):
+        """ Beim nächsten update() alles neu zusammensetzen (z.B. Kamera oder Karte haben sich verändert) """
+        self.views = None
+
+    def update(self, background, parallax, layer, offset):
+        """
+        Setze Hintergrund, Wolken (ParallaxLayer, siehe scripts/parallax.py) und Kachel-Ebene (Fläche layer)
+        für die Kamera-Position offset zusammen
+        Gibt die neu zusammengesetzten Bereiche zurück - None, wenn alles neu ist
+        """
+        surf = self.surf
+        views = parallax.viewports(surf.get_size(), offset)
+        self.blits = 0
+        if self.views is None or len(views) != len(self.views):
+            self.compose(background, parallax, layer, offset)
+            self.views = views
+            return None
+
+        # Alte und neue Bereiche der Wolken aller Bänder, die sich (um mindestens einen Pixel) bewegt haben
+        changed = []
+        for band, old, new in zip(parallax.bands, self.views, views):
+            if old != new:
+                changed += band.screen_rects(old)
+                changed += band.screen_rects(new)
+        if changed:
+            # Einmal zusammensetzen, begrenzt auf den Bereich um alle Änderungen
+            surf.set_clip(changed[0].unionall(changed[1:]))
+            self.compose(background, parallax, layer, offset)
+            surf.set_clip(None)
+        self.views = views
+        return changed
+
+    def compose(self, background, parallax, layer, offset):
+        """ Zeichne Hintergrund, Wolken-Bänder und Kacheln (innerhalb des Clip-Bereichs) """
+        surf = self.surf
+        surf.blit(background, (0, 0))
+        parallax.render(surf, offset)
+        surf.blit(layer, (0, 0))
+        self.blits += 2 + len(parallax.bands)
+
+
+class DirtyRects:
+    """
+    Merkt sich, welche Bereiche des Displays sich seit dem letzten Frame geändert haben
+    --> Nur diese Bereiche müssen vergrößert und an das Fenster übergeben werden (pygame.display.update(rects))
+
+    Hat sich die Kamera bewegt, ist das ganze Bild neu
+    Sonst: Alte und neue Rechtecke aller Sprites (Spieler, Gegner, Herzen, ...) und die neu zusammengesetzten Bereiche dahinter
+    """
+    def __init__(self, size, full_ratio=0.5):
+        """
+        size: Größe des Displays (Breite, Höhe)
+        full_ratio: Ab diesem Anteil geänderter Fläche wird das ganze Bild übergeben (ein großes Rechteck ist billiger)
+        """
+        self.area = pygame.Rect((0, 0), size)
+        self.full_ratio = full_ratio
+        self.scroll = None              # Kamera-Position des letzten Frames (None = nächster Frame ist komplett neu)
+        self.sprites = []               # Rechtecke der Sprites im letzten Frame
+        self.rects = [self.area]        # Geänderte Bereiche des letzten Frames
+
+    def invalidate(self):
+        """ Der nächste Frame wird komplett übergeben (z.B. nach dem Einblenden eines Overlays) """
+        self.scroll = None
+
+    @property
+    def full(self):
+        """ Ist das ganze Bild neu? """
+        return bool(self.rects) and self.rects[0] is self.area
+
+    def update(self, scroll, backdrop, sprites):
+        """
+        Bestimme die geänderten Bereiche dieses Frames
+        scroll: Kamera-Position (ganzzahlig), mit der gezeichnet wurde
+        backdrop: Neu zusammengesetzte Bereiche hinter den Sprites (Backdrop.update, None = alles neu)
+        sprites: Rechtecke aller Sprites
+        Gibt die Liste der geänderten Bereiche zurück
+        """
+        full = scroll != self.scroll or backdrop is None
+        if not full:
+            rects = [rect for rect in self.sprites if rect.w and rect.h]
+            rects += [rect for rect in sprites if rect.w and rect.h]
+            rects += backdrop
+            full = sum(rect.w * rect.h for rect in rects) > self.full_ratio * self.area.w * self.area.h
+
+        self.rects = [self.area] if full else rects
+        self.scroll = scroll
+        self.sprites = sprites
+        return self.rects
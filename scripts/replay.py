@@ -0,0 +1,130 @@
+"""
+Aufnahme und Wiedergabe von Eingaben (.replay)
+
+Die Simulation ist deterministisch: Gleicher Seed + gleiche Eingaben pro Tick = exakt gleiches Spiel
+(Gegner ziehen aus eigenen Zufallsströmen, siehe scripts/rng.py, die Wolken aus einem Random mit dem Seed des Spiels)
+--> Es reicht, den Seed, die Einstellungen, die die Simulation verändern, und pro Tick die gedrückten Tasten zu speichern
+
+Aufbau der Datei (alle Zahlen little-endian):
+    Header      magic b'JNRI', Version, Seed, Anzahl Ticks, Flags (REPLAY_ACTIVITY), Start-Level,
+                Prüfsumme der Karten (Game.map_digest), Prüfsumme des Zustands am Ende (Game.checksum)
+    Eingaben    Pro Tick ein Byte (Bitmaske INPUT_LEFT | INPUT_RIGHT | INPUT_JUMP), mit zlib komprimiert
+
+Beim Abspielen werden die Einstellungen übernommen und die Karten verglichen (siehe Game.start_replay),
+am Ende wird der Zustand mit der Prüfsumme aus der Aufnahme verglichen (siehe Game.check_replay)
+
+Aufnehmen und Abspielen:
+    python game.py --seed 42 --record lauf.replay
+    python game.py --replay lauf.replay                        # Im Fenster, in Echtzeit
+    python game.py --replay lauf.replay --headless --profile lauf.csv   # Ohne Fenster, so schnell wie möglich
+"""
+import struct
+import zlib
+
+from scripts.mapformat import atomic_write
+
+REPLAY_EXTENSION = '.replay'
+REPLAY_MAGIC = b'JNRI'
+REPLAY_VERSION = 2
+REPLAY_PREFIX = struct.Struct('<4sH')           # magic, Version (gleich in allen Versionen)
+REPLAY_HEADER = struct.Struct('<4sHQIHH16sQ')   # magic, Version, Seed, Anzahl Ticks, Flags, Start-Level, Karten, Zustand
+DIGEST_SIZE = 16                                # Bytes der Prüfsumme der Karten
+
+# Flags im Header
+REPLAY_ACTIVITY = 1             # Aktivitäts-Bereich war an (siehe scripts/activity.py)
+
+# Eingaben eines Ticks als Bit-Flags
+INPUT_LEFT = 1
+INPUT_RIGHT = 2
+INPUT_JUMP = 4
+
+
+class ReplayError(Exception):
+    """ Datei ist keine gültige Aufnahme """
+
+
+def encode_inputs(inputs):
+    """ Eingaben {'left': bool, 'right': bool, 'jump': bool} (siehe Game.step) als Bitmaske """
+    return ((INPUT_LEFT if inputs.get('left', False) else 0)
+            | (INPUT_RIGHT if inputs.get('right', False) else 0)
+            | (INPUT_JUMP if inputs.get('jump', False) else 0))
+
+
+def decode_inputs(mask):
+    """ Bitmaske als Eingaben {'left': bool, 'right': bool, 'jump': bool} """
+    return {'left': bool(mask & INPUT_LEFT), 'right': bool(mask & INPUT_RIGHT), 'jump': bool(mask & INPUT_JUMP)}
+
+
+class InputLog:
+    """
+    Eingaben aller Ticks eines Spiels (ein Byte pro Tick), der Seed und die Einstellungen, mit denen das Spiel gestartet wurde
+    Aufnehmen: record() einmal pro Tick, am Ende checksum setzen und save()
+    Abspielen: InputLog.load(), dann next() einmal pro Tick, bis done
+    """
+    def __init__(self, seed, inputs=b'', activity=True, level=0, maps=bytes(DIGEST_SIZE), checksum=0):
+        """
+        seed: Seed des Spiels (Game.seed)
+        inputs: Bereits aufgenommene Eingaben (Bitmasken)
+        activity: War der Aktivitäts-Bereich an?
+        level: Level, in dem die Aufnahme beginnt
+        maps: Prüfsumme der Karten (Game.map_digest)
+        checksum: Prüfsumme des Zustands nach dem letzten Tick (Game.checksum)
+        """
+        self.seed = seed
+        self.inputs = bytearray(inputs)
+        self.activity = activity
+        self.level = level
+        self.maps = maps
+        self.checksum = checksum
+        self.pos = 0                    # Nächster Tick beim Abspielen
+
+    def __len__(self):
+        return len(self.inputs)
+
+    def record(self, mask):
+        """ Hänge die Eingaben (Bitmaske) eines Ticks an """
+        self.inputs.append(mask)
+
+    def next(self):
+        """ Eingaben (Bitmaske) des nächsten Ticks beim Abspielen (0, wenn die Aufnahme zu Ende ist) """
+        if self.pos >= len(self.inputs):
+            return 0
+        mask = self.inputs[self.pos]
+        self.pos += 1
+        return mask
+
+    @property
+    def done(self):
+        """ Wurden alle Ticks abgespielt? """
+        return self.pos >= len(self.inputs)
+
+    def save(self, path):
+        """ Schreibe die Aufnahme in die Datei path (über eine temporäre Datei, siehe atomic_write) """
+        with atomic_write(path) as f:
+            flags = REPLAY_ACTIVITY if self.activity else 0
+            f.write(REPLAY_HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, self.seed, len(self.inputs), flags, self.level,
+                                       self.maps, self.checksum))
+            f.write(zlib.compress(bytes(self.inputs)))
+
+    @classmethod
+    def load(cls, path):
+        """ Lese eine Aufnahme aus der Datei path """
+        with open(path, 'rb') as f:
+            data = f.read()
+        if len(data) < REPLAY_PREFIX.size:
+            raise ReplayError(f"{path}: Datei zu kurz")
+        magic, version = REPLAY_PREFIX.unpack_from(data)
+        if magic != REPLAY_MAGIC:
+            raise ReplayError(f"{path}: Keine Aufnahme (magic {magic!r})")
+        if version != REPLAY_VERSION:
+            raise ReplayError(f"{path}: Version {version} wird nicht unterstützt")
+        if len(data) < REPLAY_HEADER.size:
+            raise ReplayError(f"{path}: Datei zu kurz")
+        seed, ticks, flags, level, maps, checksum = REPLAY_HEADER.unpack_from(data)[2:]
+        try:
+            inputs = zlib.decompress(data[REPLAY_HEADER.size:])
+        except zlib.error as e:
+            raise ReplayError(f"{path}: Eingaben beschädigt ({e})")
+        if len(inputs) != ticks:
+            raise ReplayError(f"{path}: {len(inputs)} statt {ticks} Ticks")
+        return cls(seed, inputs, activity=bool(flags & REPLAY_ACTIVITY), level=level, maps=maps, checksum=checksum)
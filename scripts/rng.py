@@ -0,0 +1,43 @@
+try:
+    import numpy as np
+except ImportError:
+    # NumPy ist optional - nur für viele Zufallszahlen auf einmal (random_floats, z.B. in scripts/batch.py)
+    np = None
+
+# Zufallszahlen ohne gemeinsamen Zustand: Die n-te Zahl eines Stroms ist ein Hash aus (seed, n) - SplitMix64
+# --> Jeder Gegner hat seinen eigenen Strom (seed) und zählt nur mit, wie viele Zahlen er schon gezogen hat
+#     Reihenfolge der Gegner, schlafende Gegner (scripts/activity.py) oder der Batch (scripts/batch.py) ändern nichts am Ergebnis
+MASK64 = (1 << 64) - 1
+GOLDEN = 0x9E3779B97F4A7C15
+MIX1 = 0xBF58476D1CE4E5B9
+MIX2 = 0x94D049BB133111EB
+FLOAT_SCALE = 1.0 / (1 << 53)
+
+
+def mix64(x):
+    """ Vermische die Bits einer 64-Bit-Zahl (jede Änderung der Eingabe ändert etwa die Hälfte der Ausgabe-Bits) """
+    x = ((x ^ (x >> 30)) * MIX1) & MASK64
+    x = ((x ^ (x >> 27)) * MIX2) & MASK64
+    return x ^ (x >> 31)
+
+
+def derive_seed(seed, *keys):
+    """ Eigener Seed für einen Teil des Spiels, z.B. derive_seed(game.seed, level, nummer) für einen Gegner """
+    for key in keys:
+        seed = mix64((seed + (key + 1) * GOLDEN) & MASK64)
+    return seed
+
+
+def random_float(seed, counter):
+    """ Zufallszahl 0 <= x < 1: Die counter-te Zahl des Stroms seed """
+    return (mix64((seed + (counter + 1) * GOLDEN) & MASK64) >> 11) * FLOAT_SCALE
+
+
+def random_floats(seeds, counters):
+    """ Wie random_float für Arrays (np.uint64) von Seeds und Zählern - liefert exakt dieselben Zahlen """
+    with np.errstate(over='ignore'):
+        x = seeds + (counters + np.uint64(1)) * np.uint64(GOLDEN)
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(MIX1)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(MIX2)
+        x ^= x >> np.uint64(31)
+    return (x >> np.uint64(11)).astype(np.float64) * FLOAT_SCALE
@@ -0,0 +1,32 @@
+class LevelSnapshot:
+    """
+    Zustand eines Levels zu einem Zeitpunkt (Kacheln, Spieler, Gegner, Herzen, Leben, Kamera)
+
+    Wird einmal direkt nach dem Laden erstellt (Anfangszustand) und an jedem Checkpoint (eingesammeltes Herz, Game.save_checkpoint)
+    --> Nach dem Tod wird das Level aus dem Snapshot wiederhergestellt, ohne die Karte erneut zu laden (kein Festplattenzugriff)
+    Ein Snapshot kann beliebig oft wiederhergestellt werden, da dabei immer Kopien erzeugt werden
+    """
+    def __init__(self, game):
+        """ Speichere den aktuellen Zustand des Spiels game """
+        self.level = game.level
+        self.tilemap = game.tilemap
+        self.tiles = game.tilemap.snapshot()
+        self.player = game.player.copy()
+        self.enemies = [enemy.copy() for enemy in game.enemies]
+        self.hearts = list(game.hearts)         # Herzen verändern sich nicht, nur die Liste (eingesammelte werden entfernt)
+        self.goal = game.GoalFlag
+        self.live = game.live
+        self.scroll = list(game.scroll)
+
+    def restore(self, game):
+        """ Setze das Spiel game auf den gespeicherten Zustand zurück """
+        game.level = self.level
+        game.tilemap = self.tilemap
+        game.tilemap.restore(self.tiles)
+        game.player = self.player.copy()
+        game.enemies = [enemy.copy() for enemy in self.enemies]
+        game.hearts = list(self.hearts)
+        game.GoalFlag = self.goal
+        game.live = self.live
+        game.dead = 0
+        game.scroll = list(self.scroll)
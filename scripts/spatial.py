@@ -0,0 +1,76 @@
+class SpatialHash:
+    """
+    Gleichmäßiges Raster für Überlappungs-Tests (Broadphase)
+
+    Jedes Objekt wird in alle Zellen eingetragen, die sein Rechteck berührt
+    Eine Abfrage liefert nur die Objekte aus den Zellen, die das abgefragte Rechteck berührt
+    --> Statt jedes Objekt mit dem Spieler zu vergleichen, werden nur Objekte in seiner Nähe genau geprüft (colliderect)
+
+    Bewegte Objekte werden mit move() aktualisiert - nur wenn sich ihre Zellen ändern, wird das Raster verändert
+    """
+    def __init__(self, cell_size=32):
+        """
+        cell_size: Größe einer Zelle in Pixeln (etwas größer als die typischen Objekte)
+        """
+        self.cell_size = cell_size
+        self.cells = {}             # (cell_x, cell_y) -> {Objekt: None} (Dictionary statt Set -> feste Reihenfolge)
+        self.bounds = {}            # Objekt -> (x0, y0, x1, y1) Bereich der Zellen, in denen das Objekt steht
+
+    def cell_bounds(self, rect):
+        """ Bereich der Zellen (x0, y0, x1, y1), den das Rechteck rect (x, y, w, h) berührt """
+        cell_size = self.cell_size
+        return (int(rect[0] // cell_size), int(rect[1] // cell_size),
+                int((rect[0] + max(rect[2], 1) - 1) // cell_size), int((rect[1] + max(rect[3], 1) - 1) // cell_size))
+
+    def move(self, obj, rect):
+        """ Trage obj mit dem Rechteck rect ein oder aktualisiere seine Position """
+        bounds = self.cell_bounds(rect)
+        old = self.bounds.get(obj)
+        if old == bounds:
+            return
+        if old is not None:
+            self.remove(obj)
+
+        x0, y0, x1, y1 = bounds
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                self.cells.setdefault((cx, cy), {})[obj] = None
+        self.bounds[obj] = bounds
+
+    def remove(self, obj):
+        """ Entferne obj aus dem Raster (falls vorhanden) """
+        bounds = self.bounds.pop(obj, None)
+        if bounds is None:
+            return
+        x0, y0, x1, y1 = bounds
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                cell = self.cells[(cx, cy)]
+                del cell[obj]
+                if not cell:
+                    del self.cells[(cx, cy)]
+
+    def query(self, rect):
+        """
+        Gibt alle Objekte zurück, die in einer Zelle stehen, die das Rechteck rect berührt (jedes Objekt nur einmal)
+        Die Objekte können rect trotzdem verfehlen -> genauer Test (z.B. colliderect) durch den Aufrufer
+        """
+        x0, y0, x1, y1 = self.cell_bounds(rect)
+        if x0 == x1 and y0 == y1:
+            return list(self.cells.get((x0, y0), ()))
+
+        found = {}
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                cell = self.cells.get((cx, cy))
+                if cell:
+                    found.update(cell)
+        return list(found)
+
+    def clear(self):
+        """ Entferne alle Objekte """
+        self.cells = {}
+        self.bounds = {}
+
+    def __len__(self):
+        return len(self.bounds)
@@ -0,0 +1,155 @@
+import queue
+import threading
+from collections import OrderedDict
+
+class ChunkStreamer:
+    """
+    Lädt die Chunks einer Binär-Karte (scripts/mapformat.py) bei Bedarf nach und entfernt weit entfernte Chunks wieder
+
+    - Chunks um die Kamera und um aktive Entitäten werden von einem Hintergrund-Thread vorgeladen (update())
+    - Wird ein Chunk gebraucht, der noch nicht geladen ist (Physik, Rendern), wird er sofort gelesen (fault())
+      --> Physik-Abfragen sehen immer die echte Karte, egal wie weit der Hintergrund-Thread ist
+    - Sind mehr als budget Chunks geladen, werden die am längsten nicht benötigten Chunks entfernt (LRU)
+    - Veränderte Chunks (z.B. entfernte Spawner) werden nie entfernt, da die Änderung sonst verloren ginge
+    """
+    def __init__(self, tilemap, map_file, remap=None, budget=512, cache_budget=64, margin=1):
+        """
+        tilemap: Karte, in die die Chunks geladen werden (tilemap.chunks)
+        map_file: Geöffnete Binär-Karte (MapFile), bleibt geöffnet, bis close() aufgerufen wird
+        remap: Übersetzungstabelle der Typ-Ids (Tilemap.type_remap), None = keine Übersetzung
+        budget: Maximale Anzahl geladener Chunks
+        cache_budget: Maximale Anzahl vorgerenderter Chunk-Flächen
+        margin: Anzahl Chunks um Kamera und Entitäten, die zusätzlich geladen werden
+        """
+        self.tilemap = tilemap
+        self.map_file = map_file
+        self.remap = remap
+        self.budget = budget
+        self.cache_budget = cache_budget
+        self.margin = margin
+
+        self.directory = map_file.directory
+        self.lru = OrderedDict()        # Geladene Chunks aus der Datei, zuletzt benötigte am Ende
+        self.pinned = set()             # Veränderte Chunks (werden nicht entfernt)
+        self.pending = set()            # Chunks, die beim Hintergrund-Thread angefragt sind
+
+        # Zähler (z.B. für das Performance-Overlay)
+        self.loads = 0                  # Vom Hintergrund-Thread geladene Chunks
+        self.faults = 0                 # Sofort geladene Chunks (waren noch nicht vorgeladen)
+        self.evictions = 0              # Entfernte Chunks
+
+        self.requests = queue.Queue()
+        self.results = queue.Queue()
+        self.thread = threading.Thread(target=self.worker, name='ChunkStreamer', daemon=True)
+        self.thread.start()
+
+    def read(self, key):
+        """ Lese den Chunk key aus der Datei (ohne ihn in die Karte einzutragen) """
+        chunk = self.map_file.chunk(key)
+        if chunk is not None and self.remap is not None:
+            chunk = self.tilemap.remap_chunk(chunk, self.remap)
+        return chunk
+
+    def worker(self):
+        """ Hintergrund-Thread: Lese angefragte Chunks aus der Datei """
+        while True:
+            key = self.requests.get()
+            if key is None:
+                break
+            self.results.put((key, self.read(key)))
+
+    def install(self, key, chunk):
+        """ Trage den gelesenen Chunk in die Karte ein """
+        tilemap = self.tilemap
+        if key in tilemap.chunks or chunk is None:
+            return
+        tilemap.chunks[key] = chunk
+        self.lru[key] = None
+
+        # Kacheln aus diesem Chunk können in die Chunks rechts und unterhalb hineinragen -> deren Flächen neu zeichnen
+        tilemap.invalidate_chunk(key)
+
+    def fault(self, key):
+        """
+        Chunk key wird sofort gebraucht, ist aber nicht geladen
+        Gibt den Chunk zurück (None, wenn es ihn in der Datei nicht gibt)
+        """
+        if key not in self.directory or key in self.tilemap.chunks:
+            return self.tilemap.chunks.get(key)
+        self.faults += 1
+        self.install(key, self.read(key))
+        return self.tilemap.chunks[key]
+
+    def pin(self, key):
+        """ Chunk key wurde verändert -> nie aus dem Speicher entfernen """
+        self.pinned.add(key)
+        self.lru.pop(key, None)
+
+    def keys(self):
+        """ Alle Chunks der Karte (in der Datei und neu erzeugte), egal ob geladen oder nicht """
+        return list(self.directory) + [key for key in self.tilemap.chunks if key not in self.directory]
+
+    def chunks_around(self, rect, margin):
+        """ Alle Chunk-Keys, die das Rechteck rect (x, y, w, h in Pixeln) plus margin Chunks berühren """
+        chunk_px = self.tilemap.chunk_px()
+        x0 = int(rect[0] // chunk_px) - margin
+        y0 = int(rect[1] // chunk_px) - margin
+        x1 = int((rect[0] + rect[2]) // chunk_px) + margin
+        y1 = int((rect[1] + rect[3]) // chunk_px) + margin
+        return [(cx, cy) for cx in range(x0, x1 + 1) for cy in range(y0, y1 + 1)]
+
+    def update(self, camera, entities=()):
+        """
+        Einmal pro Frame aufrufen
+        camera: Sichtbarer Bereich (x, y, w, h) in Pixeln
+        entities: Positionen (x, y) aktiver Entitäten, deren Umgebung geladen bleiben muss
+        """
+        tilemap = self.tilemap
+
+        # Fertig gelesene Chunks aus dem Hintergrund-Thread übernehmen
+        while True:
+            try:
+                key, chunk = self.results.get_nowait()
+            except queue.Empty:
+                break
+            self.pending.discard(key)
+            if key not in tilemap.chunks:
+                self.loads += 1
+                self.install(key, chunk)
+
+        # Benötigte Chunks: um die Kamera und um alle aktiven Entitäten
+        visible = self.chunks_around(camera, 0)
+        needed = set(self.chunks_around(camera, self.margin + 1))
+        for pos in entities:
+            needed.update(self.chunks_around((pos[0], pos[1], 0, 0), self.margin))
+
+        for key in needed:
+            if key in self.lru:
+                self.lru.move_to_end(key)
+            elif key in self.directory and key not in tilemap.chunks and key not in self.pending:
+                self.pending.add(key)
+                self.requests.put(key)
+
+        # Speicherbudget einhalten: am längsten nicht benötigte Chunks entfernen
+        while len(self.lru) > self.budget:
+            key = next(iter(self.lru))
+            if key in needed:
+                # Alles Verbleibende wird gebraucht -> Budget vorübergehend überschreiten
+                break
+            del self.lru[key]
+            del tilemap.chunks[key]
+            tilemap.chunk_cache.pop(key, None)
+            self.evictions += 1
+
+        # Vorgerenderte Flächen sind deutlich größer als die Chunks -> nur die sichtbaren behalten, wenn das Budget voll ist
+        if len(tilemap.chunk_cache) > self.cache_budget:
+            keep = set(visible)
+            for key in list(tilemap.chunk_cache):
+                if key not in keep:
+                    del tilemap.chunk_cache[key]
+
+    def close(self):
+        """ Beende den Hintergrund-Thread und schließe die Datei """
+        self.requests.put(None)
+        self.thread.join()
+        self.map_file.close()
@@ -1,8 +1,21 @@
 import json
+import sys
+from array import array
+from collections import deque
 from copy import deepcopy
+from itertools import islice
 
 import pygame
 
+try:
+    import numpy as np
+except ImportError:
+    # NumPy ist optional - ohne NumPy wird beim Autotiling jede Kachel einzeln geprüft
+    np = None
+
+from scripts.mapformat import BINARY_EXTENSION, MapFile, atomic_write, write_map
+from scripts.streaming import ChunkStreamer
+
 # Regeln für die automatische Kachelsetzung
 # Wenn Nachbarn mit Index Key vorhanden sind, dann setze die Kachel mit Value
 # Wemm Es gibt 9 unterschiedliche Gras- und Stein-Kacheln, abhängig von den Nachbarn, die vorhanden sind, soll die entsprechende Kachel automatisch gesetzt werden
@@ -19,17 +32,41 @@ AUTOTILE_MAP = {
 
 }
 
+# Dieselben Regeln als Bitmaske: Jeder Nachbar mit gleichem Typ setzt ein Bit (rechts=1, links=2, oben=4, unten=8)
+# AUTOTILE_TABLE[Bitmaske] = Variante laut AUTOTILE_MAP (-1 = keine Regel, die Kachel bleibt wie sie ist)
+AUTOTILE_BITS = {(1, 0): 1, (-1, 0): 2, (0, -1): 4, (0, 1): 8}
+AUTOTILE_TABLE = [AUTOTILE_MAP.get(tuple(sorted(shift for shift, bit in AUTOTILE_BITS.items() if mask & bit)), -1) for mask in range(16)]
+
+RENDER_LOG_SIZE = 256                   # So viele Änderungen des Aussehens werden für changed_rects aufgezeichnet (ältere -> alles neu zeichnen)
+FLOOD_RADIUS = 512                      # Flood-Fill sucht höchstens so viele Kacheln um die Start-Position (siehe Tilemap.flood_fill)
+
 NEIGHBOR_OFFSET = [(-1, 0), (-1, -1), (0, -1), (1, -1), (1, 0), (0, 0), (-1, -1), (0, 1), (1, 1)] # Positionen aller Nachbarn (8 Richtungen)
 PHYSICS_TILES = {'grass', 'stone'}      # Welche Objekte sollen Physik haben
 AUTOTILE_TYPES = {'grass', 'stone'}    # Welche Objekte können automatisch gesetzt werden
 
+# Bekannte Kachel-Typen in fester Reihenfolge -> Typ-Id = Index + 1 (0 steht für eine leere Kachel)
+# Unbekannte Typen (z.B. aus einer Karten-Datei) werden beim Laden automatisch hinten angehängt
+TILE_TYPES = ['grass', 'stone', 'decor', 'large_decor', 'spawners', 'goal', 'heart']
+
+# Chunks: Die Karte wird in Blöcke von CHUNK_SIZE x CHUNK_SIZE Kacheln eingeteilt
+CHUNK_SHIFT = 4                         # 2^4 = 16
+CHUNK_SIZE = 1 << CHUNK_SHIFT           # Anzahl Kacheln pro Chunk in x- und y-Richtung (Chunk = 16x16 Kacheln)
+CHUNK_MASK = CHUNK_SIZE - 1             # Position einer Kachel innerhalb ihres Chunks (x & CHUNK_MASK)
+CHUNK_CELLS = CHUNK_SIZE * CHUNK_SIZE   # Anzahl Zellen pro Chunk
+
+# Eine Zelle speichert Typ-Id und Variante in einer Zahl: (Typ-Id << 8) | Variante
+VARIANT_BITS = 8
+VARIANT_MASK = (1 << VARIANT_BITS) - 1
+EMPTY_CHUNK = array('H', bytes(2 * CHUNK_CELLS))     # Vorlage für einen leeren Chunk (alle Zellen 0)
+
 class Tilemap:
     """
     Karte in Kacheln
     --> Teilt die Karte in Kacheln der Größe tile_size ein
 
-    Speichert nur die Kacheln, mit Position und Typ (Grass, Stone, etc.) in einem Dictionary die auch ein Element enthalten
-    Leere Kacheln werden nicht als Leer gespeichert (spart Speicherplatz), da diese keine Information enthalten
+    Die Kacheln werden in Chunks von CHUNK_SIZE x CHUNK_SIZE Zellen gespeichert
+    Jeder Chunk ist ein kompaktes Array mit einer Zahl pro Zelle (2 Byte): (Typ-Id << 8) | Variante, 0 = leer
+    Chunks ohne Kacheln werden nicht gespeichert (spart Speicherplatz), da diese keine Information enthalten
     """
     def __init__(self, game, tile_size=16):
         """
@@ -39,143 +76,964 @@ class Tilemap:
         """
         self.game = game                # Referenz zum Spiel
         self.tile_size = tile_size      # Größe der Kacheln
-        self.tilemap = {}               # Speichert alle Kacheln, die Objekte enthalten mit Position und Typ  
+
+        # Typ-Register: Typ-Id <-> Name des Typs
+        self.type_names = [None] + TILE_TYPES
+        self.type_ids = {name: i for i, name in enumerate(self.type_names) if name is not None}
+        # Nachschlagetabelle: solid[Typ-Id] = 1, wenn der Typ Physik hat
+        self.solid = bytearray(1 << (16 - VARIANT_BITS))
+        for name in PHYSICS_TILES:
+            self.solid[self.type_id(name)] = 1
+        # Nachschlagetabelle: autotiled[Typ-Id] = 1, wenn der Typ automatisch gesetzt werden kann
+        self.autotiled = bytearray(len(self.solid))
+        for name in AUTOTILE_TYPES:
+            self.autotiled[self.type_id(name)] = 1
+
+        self.chunks = {}                # (chunk_x, chunk_y) -> array('H') mit CHUNK_CELLS Zellen
+        self.tile_count = 0             # Anzahl aller gesetzten Kacheln
+        self.revision = 0               # Wird bei jeder Änderung der Kacheln erhöht (z.B. für abgeleitete Daten wie in scripts/batch.py)
+        self.edits = None               # (x, y) -> Zellen-Wert aller Änderungen seit take_edits() (None = nicht aufzeichnen)
+        self.index = None               # Zellen-Wert -> {Chunk: None} aller Chunks, die den Wert enthalten (None = noch nicht aufgebaut, siehe find)
+        self.index_order = {}           # Chunk -> laufende Nummer (Reihenfolge der Chunks in der Karte, für die Reihenfolge der Treffer)
+        self.index_next = 0             # Nächste freie laufende Nummer (Nummern gelöschter Chunks werden nicht wieder vergeben)
+        self.edits_revision = 0         # Wird wie revision erhöht, aber nur von Änderungen, die in edits stehen (ungleich = nicht alles aufgezeichnet)
+
+        # Wiederverwendete Rechtecke für physics_rects_around (keine neuen Objekte pro Abfrage)
+        self.scratch_rects = [pygame.Rect(0, 0, tile_size, tile_size) for _ in NEIGHBOR_OFFSET]
+        self.scratch_list = []
+
+        # Streaming (load(..., stream=True)): Nur Chunks in der Nähe von Kamera und Entitäten sind in self.chunks geladen
+        self.streamer = None
+
+        # Jeder Chunk wird einmal auf eine eigene Fläche gezeichnet (gecached) und beim Rendern als Ganzes geblittet
+        self.chunk_cache = {}           # (chunk_x, chunk_y) -> Vorgerenderte Fläche des Chunks
+        self.chunk_tile_counts = {}     # (chunk_x, chunk_y) -> Anzahl Kacheln auf der vorgerenderten Fläche
+        self.render_revision = 0        # Wird erhöht, wenn sich das Aussehen der Karte ändert (z.B. für scripts/redraw.py)
+        self.dirty_chunks = None        # Chunks, deren vorgerenderte Fläche seit take_dirty_chunks() verworfen wurde (None = nicht aufzeichnen)
+        self.render_log = deque(maxlen=RENDER_LOG_SIZE)    # Letzte Änderungen: (x, y, Zellen-Wert) einer Kachel oder (chunk_x, chunk_y, None)
+        self.render_reset = 0           # render_revision beim letzten Ersetzen der ganzen Karte (clear)
+
+        # Zähler für das Profiling (werden vom Spiel pro Frame ausgelesen und zurückgesetzt)
+        self.blits = 0                  # Anzahl geblitteter Chunks
+        self.tiles_drawn = 0            # Anzahl Kacheln in den geblitteten Chunks
+        self.rects_tested = 0           # Anzahl zurückgegebener Kollisions-Rechtecke (physics_rects_around)
+
+    # ================================================================================================
+    # Speicher: Zugriff auf einzelne Zellen
+
+    def type_id(self, tile_type):
+        """ Gibt die Typ-Id des Kachel-Typs tile_type zurück (unbekannte Typen werden registriert) """
+        if tile_type not in self.type_ids:
+            if len(self.type_names) >= len(self.solid):
+                raise ValueError(f"Zu viele Kachel-Typen: {tile_type}")
+            self.type_ids[tile_type] = len(self.type_names)
+            self.type_names.append(tile_type)
+        return self.type_ids[tile_type]
+
+    def chunk_px(self):
+        """ Größe eines Chunks in Pixeln """
+        return CHUNK_SIZE * self.tile_size
+
+    def get_chunk(self, key):
+        """ Gibt die Zellen des Chunks key zurück (None, wenn leer) - beim Streaming wird der Chunk bei Bedarf sofort geladen """
+        chunk = self.chunks.get(key)
+        if chunk is None and self.streamer is not None:
+            chunk = self.streamer.fault(key)
+        return chunk
+
+    def peek_chunk(self, key):
+        """ Wie get_chunk, aber beim Streaming wird ein nicht geladener Chunk nur gelesen und nicht in der Karte behalten """
+        chunk = self.chunks.get(key)
+        if chunk is None and self.streamer is not None and key in self.streamer.directory:
+            chunk = self.streamer.read(key)
+        return chunk
+
+    def chunk_keys(self):
+        """ Alle Chunks der Karte (beim Streaming auch die, die gerade nicht geladen sind) """
+        if self.streamer is not None:
+            return self.streamer.keys()
+        return list(self.chunks)
+
+    def cell(self, x, y):
+        """ Gibt den rohen Zellen-Wert an Kachel-Position (x, y) zurück (0 = leer) """
+        chunk = self.get_chunk((x >> CHUNK_SHIFT, y >> CHUNK_SHIFT))
+        if chunk is None:
+            return 0
+        return chunk[((y & CHUNK_MASK) << CHUNK_SHIFT) | (x & CHUNK_MASK)]
+
+    def get_tile(self, tile_pos):
+        """ Gibt die Kachel an Kachel-Position tile_pos als {'type', 'variant', 'pos'} zurück (None, wenn leer) """
+        value = self.cell(tile_pos[0], tile_pos[1])
+        if not value:
+            return None
+        return {'type': self.type_names[value >> VARIANT_BITS], 'variant': value & VARIANT_MASK, 'pos': [tile_pos[0], tile_pos[1]]}
+
+    def iter_tiles(self):
+        """ Gehe durch alle Kacheln der Karte: liefert (x, y, Typ, Variante) in Kachel-Koordinaten """
+        for cx, cy in self.chunk_keys():
+            for i, value in enumerate(self.peek_chunk((cx, cy))):
+                if value:
+                    yield ((cx << CHUNK_SHIFT) | (i & CHUNK_MASK), (cy << CHUNK_SHIFT) | (i >> CHUNK_SHIFT), self.type_names[value >> VARIANT_BITS], value & VARIANT_MASK)
+
+    def write_cell(self, x, y, value):
+        """
+        Schreibe den rohen Zellen-Wert value an Kachel-Position (x, y) (0 = Kachel löschen)
+        Alle Änderungen an der Karte laufen hier durch, damit Chunks und Caches aktuell bleiben
+        """
+        key = (x >> CHUNK_SHIFT, y >> CHUNK_SHIFT)
+        chunk = self.get_chunk(key)
+        if chunk is None:
+            if not value:
+                return
+            chunk = self.chunks[key] = array('H', EMPTY_CHUNK)
+        if self.streamer is not None:
+            self.streamer.pin(key)
+
+        i = ((y & CHUNK_MASK) << CHUNK_SHIFT) | (x & CHUNK_MASK)
+        old = chunk[i]
+        if old == value:
+            return
+
+        # Alte und neue Kachel können unterschiedlich groß sein -> beide Flächen verwerfen
+        if old:
+            self.invalidate_tile(x, y, old)
+        chunk[i] = value
+        if value:
+            self.invalidate_tile(x, y, value)
+
+        # Index: Chunk austragen, wenn es die alte Kachel darin nicht mehr gibt, und für die neue eintragen
+        index = self.index
+        if index is not None:
+            if old and old not in chunk:
+                chunks = index[old]
+                del chunks[key]
+                if not chunks:
+                    del index[old]
+            if value:
+                chunks = index.get(value)
+                if chunks is None:
+                    index[value] = {key: None}
+                    self.order_chunk(key)
+                elif key not in chunks:
+                    chunks[key] = None
+                    self.order_chunk(key)
+
+        self.tile_count += (value != 0) - (old != 0)
+        self.revision += 1
+        if self.edits is not None:
+            self.edits[(x, y)] = value
+            self.edits_revision += 1
+        # Leere Chunks entfernen (beim Streaming nur, wenn der Chunk nicht in der Datei steht - sonst würde er neu geladen)
+        if not value and chunk == EMPTY_CHUNK and (self.streamer is None or key not in self.streamer.directory):
+            del self.chunks[key]
+            # Wird der Chunk wieder angelegt, steht er in der Karte hinten -> auch im Index
+            self.index_order.pop(key, None)
+
+    def set_tile(self, tile_pos, tile_type, variant, autotile=False):
+        """
+        Setze eine Kachel an Kachel-Position tile_pos und markiere die betroffenen Chunks als veraltet
+        autotile: Variante der Kachel und ihrer Nachbarn automatisch anpassen (siehe autotile_cells)
+        """
+        x, y = tile_pos
+        value = (self.type_id(tile_type) << VARIANT_BITS) | variant
+        if not autotile:
+            self.write_cell(x, y, value)
+            return
+        # Gleich die passende Variante schreiben -> wird dieselbe Kachel mehrmals gesetzt (Maus gedrückt), ändert sich nichts
+        revision = self.revision
+        self.write_cell(x, y, self.autotile_value(x, y, value))
+        if self.revision != revision:
+            self.autotile_cells([tile_pos])
+
+    def remove_tile(self, tile_pos, autotile=False):
+        """
+        Entferne die Kachel an Kachel-Position tile_pos (falls vorhanden)
+        autotile: Variante der Nachbarn automatisch anpassen (siehe autotile_cells)
+        """
+        revision = self.revision
+        self.write_cell(tile_pos[0], tile_pos[1], 0)
+        if autotile and self.revision != revision:
+            self.autotile_cells([tile_pos])
+
+    def take_edits(self):
+        """
+        Gibt alle seit dem letzten Aufruf geänderten Zellen zurück: (x, y) -> Zellen-Wert (für das Journal, siehe scripts/autosave.py)
+        Mehrere Änderungen derselben Zelle werden zusammengefasst (nur der letzte Wert zählt)
+        None, wenn sich die Karte auch anders verändert hat (z.B. restore, autotile mit NumPy, neu geladen) oder noch nicht aufgezeichnet wurde
+        """
+        edits = self.edits if self.edits_revision == self.revision else None
+        self.edits = {}
+        self.edits_revision = self.revision
+        return edits
+
+    # ================================================================================================
+    # Index: In welchen Chunks kommt welcher Zellen-Wert (Typ, Variante) vor?
+    # Suchen (extract, find) prüfen nur diese Chunks statt der ganzen Karte --> Aufwand wächst mit der Anzahl der Treffer
+    # Der Index wird bei der ersten Suche einmal aufgebaut und danach bei jeder Änderung angepasst (write_cell, write_chunks)
+
+    def build_index(self):
+        """ Baue den Index für alle Chunks der Karte auf (einmal, bei der ersten Suche) """
+        index = {}
+        order = {}
+        for key in self.chunk_keys():
+            order[key] = len(order)
+            for value in set(self.peek_chunk(key)):
+                if value:
+                    index.setdefault(value, {})[key] = None
+        self.index = index
+        self.index_order = order
+        self.index_next = len(order)
+
+    def order_chunk(self, key):
+        """ Gib einem neuen Chunk die nächste laufende Nummer (neu angelegte Chunks stehen auch in self.chunks am Ende) """
+        if key not in self.index_order:
+            self.index_order[key] = self.index_next
+            self.index_next += 1
+
+    def index_chunk(self, key, old, new):
+        """ Passe den Index an, wenn der Inhalt von Chunk key von old zu new (array('H')) gewechselt hat """
+        index = self.index
+        if index is None:
+            return
+        old_values = set(old)
+        new_values = set(new)
+        for value in old_values - new_values:
+            if value:
+                chunks = index[value]
+                del chunks[key]
+                if not chunks:
+                    del index[value]
+        for value in new_values - old_values:
+            if value:
+                index.setdefault(value, {})[key] = None
+                self.order_chunk(key)
+
+    def find(self, values):
+        """
+        Suche alle Kacheln mit einem Zellen-Wert aus values: Liste von (x, y, Zellen-Wert) in Kachel-Koordinaten
+        Reihenfolge wie beim Durchsuchen der ganzen Karte (Chunks in der Reihenfolge der Karte, darin Zeile für Zeile)
+        """
+        if self.index is None:
+            self.build_index()
+        keys = {}
+        for value in values:
+            keys.update(self.index.get(value, ()))
+        matches = []
+        for key in sorted(keys, key=self.index_order.__getitem__):
+            chunk = self.peek_chunk(key)
+            found = []
+            for value in values:
+                # array.index springt in C zum nächsten Treffer
+                i = -1
+                while True:
+                    try:
+                        i = chunk.index(value, i + 1)
+                    except ValueError:
+                        break
+                    found.append(i)
+            found.sort()
+            for i in found:
+                matches.append(((key[0] << CHUNK_SHIFT) | (i & CHUNK_MASK), (key[1] << CHUNK_SHIFT) | (i >> CHUNK_SHIFT), chunk[i]))
+        return matches
+
+    # ================================================================================================
+    # Bereiche: Viele Kacheln auf einmal (Editor, Level-Generatoren)
+    # Bereiche sind Rechtecke (x, y, w, h) in Kachel-Koordinaten
+    # Statt einzelner write_cell-Aufrufe werden ganze Chunk-Zeilen kopiert und jeder Chunk nur einmal verworfen
+
+    def write_chunks(self, chunks):
+        """
+        Ersetze ganze Chunks auf einmal: chunks = (chunk_x, chunk_y) -> array('H') mit CHUNK_CELLS Zellen
+        Wie write_cell für viele Zellen: Anzahl der Kacheln, Caches, Streaming und revision werden einmal angepasst
+        Die einzelnen Zellen werden nicht in edits aufgezeichnet (take_edits gibt danach None zurück)
+        """
+        streamer = self.streamer
+        changed = False
+        for key, cells in chunks.items():
+            old = self.get_chunk(key)
+            if old is None:
+                old = EMPTY_CHUNK
+            if old == cells:
+                continue
+            self.tile_count += old.count(0) - cells.count(0)
+            self.index_chunk(key, old, cells)
+            if cells != EMPTY_CHUNK or (streamer is not None and key in streamer.directory):
+                self.chunks[key] = cells
+                if streamer is not None:
+                    streamer.pin(key)
+            else:
+                # Leere Chunks entfernen (wie in write_cell)
+                self.chunks.pop(key, None)
+                self.index_order.pop(key, None)
+            self.invalidate_chunk(key)
+            changed = True
+        if changed:
+            self.revision += 1
+
+    def rect_chunks(self, rect):
+        """
+        Zerlege den Bereich rect in die Teile, die in einzelnen Chunks liegen
+        Liefert (Chunk, x0, y0, x1, y1) - Teil-Rechteck in Kachel-Koordinaten (x1, y1 gehören nicht mehr dazu)
+        """
+        x, y, w, h = rect
+        for cy in range(y >> CHUNK_SHIFT, ((y + h - 1) >> CHUNK_SHIFT) + 1):
+            for cx in range(x >> CHUNK_SHIFT, ((x + w - 1) >> CHUNK_SHIFT) + 1):
+                yield (cx, cy), max(x, cx << CHUNK_SHIFT), max(y, cy << CHUNK_SHIFT), min(x + w, (cx + 1) << CHUNK_SHIFT), min(y + h, (cy + 1) << CHUNK_SHIFT)
+
+    def copy_rect(self, rect):
+        """
+        Kopiere die Kacheln im Bereich rect (z.B. Auswahl im Editor)
+        Gibt {'size': (w, h), 'cells': array('H') Zeile für Zeile, 'type_names'} zurück (kann mit paste in jede Karte eingefügt werden)
+        """
+        x, y, w, h = rect
+        cells = array('H', bytes(2 * w * h))
+        for key, x0, y0, x1, y1 in self.rect_chunks(rect):
+            chunk = self.peek_chunk(key)
+            if chunk is None:
+                continue
+            # Zeile für Zeile ein Stück aus dem Chunk kopieren
+            length = x1 - x0
+            i = ((y0 & CHUNK_MASK) << CHUNK_SHIFT) | (x0 & CHUNK_MASK)
+            start = (y0 - y) * w + x0 - x
+            for _ in range(y1 - y0):
+                cells[start:start + length] = chunk[i:i + length]
+                i += CHUNK_SIZE
+                start += w
+        return {'size': (w, h), 'cells': cells, 'type_names': list(self.type_names)}
+
+    def paste_cells(self, new, cells, rect, transparent=False):
+        """
+        Schreibe cells (Zeile für Zeile, Größe wie rect) in den Bereich rect - in Kopien der Chunks, gesammelt in new
+        Die Karte ändert sich erst mit write_chunks(new) (so landen mehrere Schritte in einem Batch, z.B. move_rect)
+        """
+        x, y, w, h = rect
+        for key, x0, y0, x1, y1 in self.rect_chunks(rect):
+            chunk = new.get(key)
+            if chunk is None:
+                chunk = self.get_chunk(key)
+                chunk = new[key] = array('H', EMPTY_CHUNK if chunk is None else chunk)
+            length = x1 - x0
+            i = ((y0 & CHUNK_MASK) << CHUNK_SHIFT) | (x0 & CHUNK_MASK)
+            start = (y0 - y) * w + x0 - x
+            for _ in range(y1 - y0):
+                if not transparent:
+                    chunk[i:i + length] = cells[start:start + length]
+                else:
+                    for j in range(length):
+                        if cells[start + j]:
+                            chunk[i + j] = cells[start + j]
+                i += CHUNK_SIZE
+                start += w
+
+    def paste(self, region, pos, transparent=False, autotile=False):
+        """
+        Füge einen kopierten Bereich (siehe copy_rect) mit der linken oberen Ecke an Kachel-Position pos ein
+        transparent: Leere Zellen des Bereichs überschreiben nichts (Stempel), sonst wird der Bereich genau übernommen
+        autotile: Varianten im Bereich und am Rand automatisch anpassen (siehe autotile_area)
+        """
+        cells = region['cells']
+        remap = self.type_remap(region['type_names'])
+        if remap is not None:
+            cells = self.remap_chunk(cells, remap)
+        rect = (pos[0], pos[1]) + tuple(region['size'])
+        new = {}
+        self.paste_cells(new, cells, rect, transparent)
+        self.write_chunks(new)
+        if autotile:
+            self.autotile_area(rect)
+
+    def fill_rect(self, rect, tile_type, variant, autotile=False):
+        """ Fülle den Bereich rect mit einer Kachel (tile_type None = Bereich leeren) """
+        value = 0 if tile_type is None else (self.type_id(tile_type) << VARIANT_BITS) | variant
+        new = {}
+        self.paste_cells(new, array('H', [value]) * (rect[2] * rect[3]), rect)
+        self.write_chunks(new)
+        if autotile:
+            self.autotile_area(rect)
+
+    def clear_rect(self, rect, autotile=False):
+        """ Entferne alle Kacheln im Bereich rect """
+        self.fill_rect(rect, None, 0, autotile=autotile)
+
+    def move_rect(self, rect, pos, autotile=False):
+        """ Verschiebe die Kacheln im Bereich rect, sodass die linke obere Ecke an Kachel-Position pos liegt (Ziel wird überschrieben) """
+        cells = self.copy_rect(rect)['cells']
+        target = (pos[0], pos[1], rect[2], rect[3])
+        # Quelle leeren und Ziel schreiben in denselben Chunk-Kopien -> ein Batch
+        new = {}
+        self.paste_cells(new, array('H', bytes(len(cells) * 2)), rect)
+        self.paste_cells(new, cells, target)
+        self.write_chunks(new)
+        if autotile:
+            self.autotile_area(rect)
+            self.autotile_area(target)
+
+    def flood_fill(self, pos, tile_type, variant, limit=100_000, autotile=False):
+        """
+        Fülle die zusammenhängende Fläche (4 Richtungen) um Kachel-Position pos, die denselben Typ hat wie pos, mit einer Kachel
+        Gesucht wird nur innerhalb der Chunks der Karte (leere Flächen wären sonst unendlich groß) und höchstens FLOOD_RADIUS Kacheln um pos
+        limit: Höchstens so viele Kacheln (Schutz vor versehentlich riesigen Flächen)
+        Gibt die Anzahl gefüllter Kacheln zurück
+        """
+        value = (self.type_id(tile_type) << VARIANT_BITS) | variant
+        keys = self.chunk_keys()
+        if not keys:
+            return 0
+        x0 = max(min(key[0] for key in keys) << CHUNK_SHIFT, pos[0] - FLOOD_RADIUS)
+        y0 = max(min(key[1] for key in keys) << CHUNK_SHIFT, pos[1] - FLOOD_RADIUS)
+        x1 = min((max(key[0] for key in keys) + 1) << CHUNK_SHIFT, pos[0] + FLOOD_RADIUS + 1)
+        y1 = min((max(key[1] for key in keys) + 1) << CHUNK_SHIFT, pos[1] + FLOOD_RADIUS + 1)
+        if not (x0 <= pos[0] < x1 and y0 <= pos[1] < y1):
+            return 0
+
+        # Suchbereich als dichtes Gitter kopieren, darin eine Maske: 1 = gleicher Typ wie an pos, noch nicht gefüllt
+        # Typ-Id = oberes Byte jeder Zelle -> Maske entsteht ohne Python-Schleife über die Zellen (bytes.translate)
+        w = x1 - x0
+        region = self.copy_rect((x0, y0, w, y1 - y0))
+        cells = region['cells']
+        size = len(cells)
+        start = (pos[1] - y0) * w + pos[0] - x0
+        target = cells[start] >> VARIANT_BITS
+        types = cells.tobytes()[1::2] if sys.byteorder == 'little' else cells.tobytes()[::2]
+        match = bytearray(types.translate(bytes(int(i == target) for i in range(256))))
+
+        # Scanline-Füllung: Jede Zeile wird als ganzes Stück (span) gefüllt, gesucht wird mit find/rfind (in C)
+        # Pro Stück werden in den Zeilen darüber und darunter neue Startpunkte gesucht (einer pro zusammenhängendem Stück)
+        spans = []
+        count = 0
+        todo = [start]
+        while todo and count < limit:
+            i = todo.pop()
+            if not match[i]:
+                continue
+            row_start = i - i % w
+            left = match.rfind(0, row_start, i) + 1 or row_start
+            right = match.find(0, i, row_start + w)
+            if right < 0:
+                right = row_start + w
+            right = min(right, left + limit - count)
+            match[left:right] = bytes(right - left)
+            spans.append((left, right))
+            count += right - left
+            for next_left in (left - w, left + w):
+                if 0 <= next_left < size:
+                    j = next_left
+                    end = next_left + right - left
+                    while j < end:
+                        j = match.find(1, j, end)
+                        if j < 0:
+                            break
+                        todo.append(j)
+                        j = match.find(0, j, end)
+                        if j < 0:
+                            break
+        fill = array('H', [value])
+        for left, right in spans:
+            cells[left:right] = fill * (right - left)
+
+        # Nur das Rechteck um die gefüllte Fläche zurückschreiben
+        left = min(left % w for left, right in spans)
+        right = max((right - 1) % w for left, right in spans) + 1
+        top = min(left for left, right in spans) // w
+        bottom = max(left for left, right in spans) // w + 1
+        sub = array('H')
+        for row in range(top, bottom):
+            sub += cells[row * w + left:row * w + right]
+        self.paste({'size': (right - left, bottom - top), 'cells': sub, 'type_names': region['type_names']}, (x0 + left, y0 + top), autotile=autotile)
+        return count
+
+    # ================================================================================================
 
     def extract(self, id_pairs, keep=False):
+        """
+        Suche alle Kacheln mit (Typ, Variante) aus id_pairs (über den Index, siehe find)
+        Gibt Kopien der Kacheln mit Pixel-Position zurück und löscht sie aus der Karte, wenn keep=False
+        """
+        values = list(dict.fromkeys((self.type_id(tile_type) << VARIANT_BITS) | variant for tile_type, variant in id_pairs))
         matches = []
-        del_keys = []
-
-        # Gehe durch alle Kacheln
-        for loc in self.tilemap:
-            # Nehme Kachel an Position loc
-            tile = self.tilemap[loc]
-            # Wenn Kachel-Typ und Variante in id_pairs vorhanden sind, dann füge Kachel der Liste hinzu
-            if (tile['type'], tile['variant']) in id_pairs:
-                matches.append(tile.copy())
-                matches[-1]['pos'] = matches[-1]['pos'].copy()
-                matches[-1]['pos'][0] *= self.tile_size
-                matches[-1]['pos'][1] *= self.tile_size
-                # Wenn keep=False, dann lösche Kachel aus tilemap
-                if not keep:
-                    del_keys.append(loc)
-
-        # Lösche Kacheln aus tilemap, wenn keep=False
-        if not keep:
-            for loc in del_keys:
-                del self.tilemap[loc]
+        for x, y, value in self.find(values):
+            matches.append({'type': self.type_names[value >> VARIANT_BITS], 'variant': value & VARIANT_MASK, 'pos': [x * self.tile_size, y * self.tile_size]})
+            # Wenn keep=False, dann lösche Kachel aus der Karte
+            if not keep:
+                self.write_cell(x, y, 0)
 
         return matches
 
+    def invalidate_tile(self, x, y, value):
+        """
+        Verwerfe die vorgerenderten Chunks, die von der Kachel (x, y) mit Zellen-Wert value überdeckt werden
+        Große Kacheln (z.B. Ziel-Flagge, große Dekorationen) können über den Rand ihres Chunks hinausragen
+        """
+        self.render_revision += 1
+        self.render_log.append((x, y, value))
+        dirty = self.dirty_chunks
+        if not self.chunk_cache and dirty is None:
+            return
+
+        chunk_px = CHUNK_SIZE * self.tile_size
+        img = self.game.assets[self.type_names[value >> VARIANT_BITS]][value & VARIANT_MASK]
+        x *= self.tile_size
+        y *= self.tile_size
+        for cx in range(x // chunk_px, (x + img.get_width() - 1) // chunk_px + 1):
+            for cy in range(y // chunk_px, (y + img.get_height() - 1) // chunk_px + 1):
+                self.chunk_cache.pop((cx, cy), None)
+                if dirty is not None:
+                    dirty.add((cx, cy))
+
+    def invalidate_chunk(self, key):
+        """ Verwerfe die vorgerenderten Flächen, auf die Kacheln aus Chunk key gezeichnet werden (er selbst, rechts und unterhalb) """
+        self.render_revision += 1
+        self.render_log.append((key[0], key[1], None))
+        for cx, cy in [key, (key[0] + 1, key[1]), (key[0], key[1] + 1), (key[0] + 1, key[1] + 1)]:
+            self.chunk_cache.pop((cx, cy), None)
+            if self.dirty_chunks is not None:
+                self.dirty_chunks.add((cx, cy))
+
+    def changed_rects(self, since):
+        """
+        Gibt die Bereiche (pygame.Rect in Pixeln) zurück, deren Aussehen sich seit render_revision since geändert hat (z.B. für scripts/redraw.py)
+        None, wenn seitdem die ganze Karte ersetzt wurde oder die Änderungen nicht mehr alle aufgezeichnet sind --> alles neu zeichnen
+        """
+        count = self.render_revision - since
+        if since < self.render_reset or count > len(self.render_log):
+            return None
+        rects = []
+        chunk_px = self.chunk_px()
+        for x, y, value in islice(self.render_log, len(self.render_log) - count, None):
+            if value is None:
+                # Kacheln eines Chunks ragen höchstens in die Chunks rechts und unterhalb (siehe invalidate_chunk)
+                rects.append(pygame.Rect(x * chunk_px, y * chunk_px, 2 * chunk_px, 2 * chunk_px))
+            else:
+                img = self.game.assets[self.type_names[value >> VARIANT_BITS]][value & VARIANT_MASK]
+                rects.append(pygame.Rect(x * self.tile_size, y * self.tile_size, img.get_width(), img.get_height()))
+        return rects
+
+    def take_dirty_chunks(self):
+        """
+        Gibt alle Chunks zurück, deren Aussehen sich seit dem letzten Aufruf geändert hat (für verkleinerte Ansichten, siehe scripts/overview.py)
+        None, wenn die ganze Karte ersetzt wurde (clear, load) oder noch nicht aufgezeichnet wurde --> alles neu zeichnen
+        """
+        dirty = self.dirty_chunks
+        self.dirty_chunks = set()
+        return dirty
+
+    def snapshot(self):
+        """
+        Kopie aller Kacheln (z.B. um ein Level nach dem Tod ohne erneutes Laden zurückzusetzen, siehe scripts/snapshot.py)
+        Beim Streaming werden nur die veränderten Chunks kopiert, alle anderen stehen unverändert in der Datei
+        """
+        keys = self.chunks if self.streamer is None else [key for key in self.streamer.pinned if key in self.chunks]
+        return {'chunks': {key: array('H', self.chunks[key]) for key in keys}, 'tile_count': self.tile_count}
+
+    def restore(self, snapshot):
+        """
+        Setze die Kacheln auf den Stand von snapshot (siehe snapshot()) zurück
+        Nur Chunks, die sich seitdem verändert haben, werden ersetzt und neu gezeichnet
+        """
+        chunks = snapshot['chunks']
+        streamer = self.streamer
+
+        # Chunks, die es im Snapshot nicht gibt, entfernen (beim Streaming: Änderungen verwerfen -> wird neu aus der Datei geladen)
+        for key in list(self.chunks if streamer is None else streamer.pinned):
+            if key not in chunks:
+                if key in self.chunks:
+                    del self.chunks[key]
+                    self.invalidate_chunk(key)
+                if streamer is not None:
+                    streamer.pinned.discard(key)
+
+        for key, cells in chunks.items():
+            if self.chunks.get(key) != cells:
+                # Kopieren, damit der Snapshot mehrfach verwendet werden kann
+                self.chunks[key] = array('H', cells)
+                self.invalidate_chunk(key)
+            if streamer is not None:
+                streamer.pin(key)
+
+        self.tile_count = snapshot['tile_count']
+        self.revision += 1
+        # Chunks wurden direkt ersetzt -> Index bei der nächsten Suche neu aufbauen
+        self.index = None
 
     def tiles_around(self, pos):
         """ Gibt alle Nachbar-Kacheln zurück, die um die Position pos liegen """
         tiles = []
-        
+
         # Wandle Pixel-Position in Kachel-Position um
         tiles_loc = (int(pos[0] // self.tile_size), int(pos[1] // self.tile_size)) # Kachel, in der sich das Objekt an pos befindet
 
         # Prüfe alle Nachbarn (8 Richtungen), ob diese ein Objekt enthalten
         for offset in NEIGHBOR_OFFSET:
-            check_loc = str(tiles_loc[0] + offset[0]) + ';' + str(tiles_loc[1] + offset[1]) # Position des Nachbarn
-            # Wenn Kachel ein Objekt enthält und somit in tilemap vorhanden ist, dann füge es der Liste hinzu
-            if check_loc in self.tilemap:
-                tiles.append(self.tilemap[check_loc])
+            # Wenn Kachel ein Objekt enthält, dann füge es der Liste hinzu
+            tile = self.get_tile((tiles_loc[0] + offset[0], tiles_loc[1] + offset[1]))
+            if tile is not None:
+                tiles.append(tile)
 
         return tiles
-    
-    def save(self, path):
-        """ Speichert die Karte in einer Datei """
-        with open(path, 'w') as f:
-            json.dump({'tilemap': self.tilemap, 'tile_size': self.tile_size}, f)
 
+    def save(self, path):
+        """
+        Speichert die Karte in einer Datei
+        Endung .bmap: Binär-Format (scripts/mapformat.py), sonst JSON (Format: {"x;y": {"type", "variant", "pos"}})
+        """
+        write_tilemap(path, self.tile_size, self.type_names, {key: self.peek_chunk(key) for key in self.chunk_keys()})
         print("Karte gespeichert")
 
-        # Alternative: (Öffnen und Schließen der Datei manuell kümmern)
-        # f = open(path, 'w')
-        # json.dump({'tilemap': self.tilemap, 'tile_size': self.tile_size}, f)
-        # f.close()
+    def clear(self):
+        """ Entferne alle Kacheln und verwerfe alle Caches """
+        if self.streamer is not None:
+            self.streamer.close()
+            self.streamer = None
+        self.chunks = {}
+        self.tile_count = 0
+        self.index = None
+        self.revision += 1
+        self.render_revision += 1
+        self.render_reset = self.render_revision
+        self.render_log.clear()
+        self.chunk_cache = {}
+        self.dirty_chunks = None
+
+    def load(self, path, stream=False):
+        """
+        Lädt die Karte aus einer Datei (Binär-Format bei Endung .bmap, sonst JSON)
+        stream: Karte nicht komplett laden, sondern Chunks bei Bedarf nachladen (nur Binär-Format, siehe scripts/streaming.py)
+                --> update_streaming() muss dann einmal pro Frame aufgerufen werden
+        """
+        if path.endswith(BINARY_EXTENSION):
+            map_file = MapFile(path)
+            if stream:
+                self.clear()
+                self.tile_size = map_file.tile_size
+                self.tile_count = map_file.tile_count()
+                self.streamer = ChunkStreamer(self, map_file, self.type_remap(map_file.type_names))
+            else:
+                with map_file:
+                    self.load_binary(map_file)
+            return
+        if stream:
+            raise ValueError(f"{path}: Streaming ist nur mit Karten im Binär-Format ({BINARY_EXTENSION}) möglich")
 
-    def load(self, path):
-        """ Lädt die Karte aus einer Datei """
         with open(path, 'r') as f:
             data = json.load(f)
-            self.tilemap = data['tilemap']
-            self.tile_size = data['tile_size']
 
-        # Alternative: (Öffnen und Schließen der Datei manuell kümmern)
-        # f = open(path, 'r')
-        # data = json.load(f)
-        # self.tilemap = data['tilemap']
-        # self.tile_size = data['tile_size']
-        # f.close()
+        self.clear()
+        self.tile_size = data['tile_size']
+        for tile in data['tilemap'].values():
+            self.write_cell(tile['pos'][0], tile['pos'][1], (self.type_id(tile['type']) << VARIANT_BITS) | tile['variant'])
+
+    def load_binary(self, map_file):
+        """
+        Übernehme alle Chunks aus der geöffneten Binär-Datei map_file
+        Die Chunk-Daten werden als Ganzes kopiert, es entstehen keine Objekte für einzelne Kacheln
+        """
+        if map_file.chunk_shift != CHUNK_SHIFT:
+            raise ValueError(f"{map_file.path}: Chunk-Größe {1 << map_file.chunk_shift} wird nicht unterstützt")
+
+        self.clear()
+        self.tile_size = map_file.tile_size
+        remap = self.type_remap(map_file.type_names)
+        for key in map_file.directory:
+            chunk = map_file.chunk(key)
+            if remap is not None:
+                chunk = self.remap_chunk(chunk, remap)
+            self.chunks[key] = chunk
+            self.tile_count += map_file.directory[key][1]
+
+    def type_remap(self, type_names):
+        """
+        Übersetzungstabelle von fremden Typ-Ids (z.B. aus einer Datei) auf die Typ-Ids dieser Karte
+        Gibt None zurück, wenn die Typ-Ids übereinstimmen (häufigster Fall, dann muss nichts übersetzt werden)
+        """
+        remap = [0] + [self.type_id(name) for name in type_names[1:]]
+        if remap == list(range(len(remap))):
+            return None
+        return remap
+
+    def remap_chunk(self, chunk, remap):
+        """ Übersetze die Typ-Ids aller Zellen von chunk mit der Tabelle remap (siehe type_remap) """
+        return array('H', [(remap[value >> VARIANT_BITS] << VARIANT_BITS) | (value & VARIANT_MASK) for value in chunk])
+
+    def update_streaming(self, camera, entities=()):
+        """
+        Lade Chunks um die Kamera und die Entitäten nach und entferne entfernte Chunks (nur beim Streaming, sonst ohne Wirkung)
+        camera: Sichtbarer Bereich (x, y, w, h) in Pixeln
+        entities: Positionen (x, y) der aktiven Entitäten
+        """
+        if self.streamer is not None:
+            self.streamer.update(camera, entities)
 
     def solid_check(self, pos):
         """ Prüfe ob Kachel an Position pos fest ist (Boden ist) """
-        tile_loc = str(int(pos[0] // self.tile_size)) + ';' + str(int(pos[1] // self.tile_size))
-        if tile_loc in self.tilemap:
-            if self.tilemap[tile_loc]['type'] in PHYSICS_TILES:
-                return self.tilemap[tile_loc]
-        
+        return self.solid[self.cell(int(pos[0] // self.tile_size), int(pos[1] // self.tile_size)) >> VARIANT_BITS] == 1
 
     def physics_rects_around(self, pos):
         """
         Prüfe, ob Kachel um Position pos Physik besitzt und gebe (falls Physik vorhanden) das Rechteck der Kachel zurück
         Nicht alle Objekte haben Physik (z.B. Dekorationen, etc.)
         Mit diesen Dekorationen kann der Spieler nicht kollidieren (Spieler kann Durchlaufen)
+
+        Liste und Rechtecke werden wiederverwendet -> sind nur bis zum nächsten Aufruf gültig (bei Bedarf kopieren)
         """
-        rects = []
-        # Prüfe alle Nachbarn (8 Richtungen), ob diese ein Objekt enthalten
-        for tile in self.tiles_around(pos):
-            # Wenn type der Kachel in PHYSICS_TILES enthalten ist, dann füge das Rechteck der Kachel der Liste hinzu
-            if tile['type'] in PHYSICS_TILES:
-                rects.append(pygame.Rect(tile['pos'][0]*self.tile_size, tile['pos'][1]*self.tile_size, self.tile_size, self.tile_size))
-                
+        rects = self.scratch_list
+        rects.clear()
+        scratch = self.scratch_rects
+        tile_size = self.tile_size
+        chunks = self.chunks
+        streamer = self.streamer
+        solid = self.solid
+        tile_x = int(pos[0] // tile_size)
+        tile_y = int(pos[1] // tile_size)
+
+        # Prüfe alle Nachbarn (8 Richtungen), ob diese eine Kachel mit Physik enthalten
+        # Direkter Zugriff auf die Chunk-Arrays (ohne Hilfsfunktionen), da dies für jede Entität mehrfach pro Frame aufgerufen wird
+        for offset in NEIGHBOR_OFFSET:
+            x = tile_x + offset[0]
+            y = tile_y + offset[1]
+            chunk = chunks.get((x >> CHUNK_SHIFT, y >> CHUNK_SHIFT))
+            if chunk is None and streamer is not None:
+                # Chunk noch nicht geladen -> sofort laden, damit niemand durch den Boden fällt
+                chunk = streamer.fault((x >> CHUNK_SHIFT, y >> CHUNK_SHIFT))
+            if chunk is not None and solid[chunk[((y & CHUNK_MASK) << CHUNK_SHIFT) | (x & CHUNK_MASK)] >> VARIANT_BITS]:
+                rect = scratch[len(rects)]
+                rect.update(x * tile_size, y * tile_size, tile_size, tile_size)
+                rects.append(rect)
+
+        self.rects_tested += len(rects)
         return rects
-    
-    def autotile(self):
-        """ Fülle Kacheln, automatisch mit passenden Kacheln (z.B. Gras, Steine, etc.) """
-        for loc in self.tilemap:
-            tile = self.tilemap[loc]
-            neighbors = set()
-
-            # Prüfe alle Nachbarn (4 Richtungen), ob diese ein Objekt enthalten
-            for shift in [(1, 0), (-1, 0), (0, -1), (0, 1)]:
-                check_loc = str(tile['pos'][0] + shift[0]) + ';' + str(tile['pos'][1] + shift[1])
-                if check_loc in self.tilemap:
-                    # Autotiling nur wenn Nachbar selben Typ hat wie an der aktuellen Position loc
-                    # Zwischen Stein und Gras macht es kein Sinn zu autotilen
-                    if self.tilemap[check_loc]['type'] == tile['type']:
-                        neighbors.add(shift)
-                
-            # Erzeuge Key für AUTOTILE_MAP Regeln
-            neighbors = tuple(sorted(neighbors)) 
-
-            # Wenn tile ein AUTOTILE_TYPE ist und die Nachbarn in AUTOTILE_MAP vorhanden sind, dann setze die Kachel
-            if (tile['type'] in AUTOTILE_TYPES) and (neighbors in AUTOTILE_MAP):
-                tile['variant'] = AUTOTILE_MAP[neighbors]
-                        
-
-
-    def render(self, surf, offset=(0, 0)):
-        """ Zeichne die Karte (Objekte wie Boden, Steine, Dekorationen, ...) auf das Display """
-        # Gehe durch alle Kacheln in tilemap und zeichne die Kacheln auf die Oberfläche
-        for loc in self.tilemap:
-            tile = self.tilemap[loc]
-            surf.blit(self.game.assets[tile['type']][tile['variant']], (tile['pos'][0]*self.tile_size - offset[0], tile['pos'][1]*self.tile_size - offset[1]))
-    
-        # Optimierte Version, die nur die Kacheln zeichnet, die auf dem Bildschirm auch sichtbar sind
-        # Bei Bewegung des Bildschirms wird nur der sichtbare Bereich neu gezeichnet
-        # for x in range(offset[0] // self.tile_size, (offset[0] + surf.get_width()) // self.tile_size + 1):
-        #     for y in range(offset[1] // self.tile_size, (offset[1] + surf.get_height()) // self.tile_size + 1):
-        #         loc = str(x) + ';' + str(y)
-        #         if loc in self.tilemap:
-        #             tile = self.tilemap[loc]
-        #             surf.blit(self.game.assets[tile['type']][tile['variant']], (x*self.tile_size - offset[0], y*self.tile_size - offset[1]))
+
+    def autotile_value(self, x, y, value):
+        """
+        Gibt den Zellen-Wert value mit der Variante zurück, die das Autotiling an Position (x, y) setzen würde
+        Nur die 4 direkten Nachbarn mit demselben Typ zählen (zwischen Stein und Gras macht es kein Sinn zu autotilen)
+        """
+        type_id = value >> VARIANT_BITS
+        if not self.autotiled[type_id]:
+            return value
+        mask = 0
+        for (dx, dy), bit in AUTOTILE_BITS.items():
+            if self.cell(x + dx, y + dy) >> VARIANT_BITS == type_id:
+                mask |= bit
+        variant = AUTOTILE_TABLE[mask]
+        if variant < 0:
+            return value
+        return (type_id << VARIANT_BITS) | variant
+
+    def autotile_cells(self, cells):
+        """
+        Autotiling nur um veränderte Zellen: cells = [(x, y), ...] in Kachel-Koordinaten
+        Eine Kachel hängt nur von ihren 4 Nachbarn ab -> es reicht, die Zellen selbst und ihre Nachbarn neu zu setzen
+        """
+        dirty = set()
+        for x, y in cells:
+            dirty.add((x, y))
+            for dx, dy in AUTOTILE_BITS:
+                dirty.add((x + dx, y + dy))
+        for x, y in dirty:
+            value = self.cell(x, y)
+            if value:
+                self.write_cell(x, y, self.autotile_value(x, y, value))
+
+    def autotile(self, vectorized=None):
+        """
+        Fülle Kacheln, automatisch mit passenden Kacheln (z.B. Gras, Steine, etc.)
+        Das Autotiling ändert nur Varianten, nie Typen -> die Reihenfolge, in der die Kacheln gesetzt werden, spielt keine Rolle
+        vectorized: Ganze Karte auf einmal mit NumPy prüfen (None = wenn NumPy vorhanden ist, schon ab wenigen hundert Kacheln schneller)
+        """
+        if vectorized is None:
+            vectorized = np is not None
+        if vectorized and self.autotile_vectorized():
+            return
+
+        for cx, cy in self.chunk_keys():
+            cells = self.peek_chunk((cx, cy))
+            for i in range(CHUNK_CELLS):
+                value = cells[i]
+                if value and self.autotiled[value >> VARIANT_BITS]:
+                    x = (cx << CHUNK_SHIFT) | (i & CHUNK_MASK)
+                    y = (cy << CHUNK_SHIFT) | (i >> CHUNK_SHIFT)
+                    self.write_cell(x, y, self.autotile_value(x, y, value))
+
+    def autotile_area(self, rect):
+        """
+        Autotiling nach einer Änderung im Bereich rect (x, y, w, h) in Kachel-Koordinaten (z.B. nach fill_rect)
+        Angepasst werden die Kacheln im Bereich und direkt am Rand (deren Nachbarn haben sich verändert)
+        """
+        if np is None or not self.autotile_vectorized(rect):
+            x, y, w, h = rect
+            self.autotile_cells([(tx, ty) for ty in range(y, y + h) for tx in range(x, x + w)])
+
+    def autotile_vectorized(self, area=None):
+        """
+        Autotiling mit NumPy
+        Alle Chunks werden in ein Gitter kopiert (mit einer leeren Zelle Rand), die Bitmaske aller Zellen
+        wird auf einmal berechnet und nachgeschlagen, veränderte Chunks werden als Ganzes zurückgeschrieben
+        area: Nur die Kacheln im Bereich (x, y, w, h) und direkt am Rand anpassen (None = ganze Karte)
+        Gibt False zurück, wenn die Karte dafür zu verstreut ist (Gitter wäre viel größer als die Chunks)
+        """
+        if area is None:
+            keys = self.chunk_keys()
+            if not keys:
+                return True
+            min_cx = min(key[0] for key in keys)
+            min_cy = min(key[1] for key in keys)
+            cols = max(key[0] for key in keys) - min_cx + 1
+            rows = max(key[1] for key in keys) - min_cy + 1
+            if cols * rows > max(64, 4 * len(keys)):
+                return False
+        else:
+            # Angepasste Kacheln: Bereich + 1, gelesen werden auch deren Nachbarn: Bereich + 2
+            x, y, w, h = area
+            min_cx = (x - 2) >> CHUNK_SHIFT
+            min_cy = (y - 2) >> CHUNK_SHIFT
+            cols = ((x + w + 1) >> CHUNK_SHIFT) - min_cx + 1
+            rows = ((y + h + 1) >> CHUNK_SHIFT) - min_cy + 1
+            keys = [(cx, cy) for cy in range(min_cy, min_cy + rows) for cx in range(min_cx, min_cx + cols) if self.peek_chunk((cx, cy)) is not None]
+
+        grid = np.zeros((rows * CHUNK_SIZE + 2, cols * CHUNK_SIZE + 2), dtype=np.uint16)
+        for key in keys:
+            gx = (key[0] - min_cx) * CHUNK_SIZE + 1
+            gy = (key[1] - min_cy) * CHUNK_SIZE + 1
+            grid[gy:gy + CHUNK_SIZE, gx:gx + CHUNK_SIZE] = np.frombuffer(self.peek_chunk(key), dtype=np.uint16).reshape(CHUNK_SIZE, CHUNK_SIZE)
+
+        # Bitmaske aus den 4 Nachbarn mit gleichem Typ (wie in autotile_value)
+        types = grid >> VARIANT_BITS
+        center = types[1:-1, 1:-1]
+        mask = np.zeros(center.shape, dtype=np.uint8)
+        for (dx, dy), bit in AUTOTILE_BITS.items():
+            mask |= (types[1 + dy:types.shape[0] - 1 + dy, 1 + dx:types.shape[1] - 1 + dx] == center).view(np.uint8) * np.uint8(bit)
+        variants = np.array(AUTOTILE_TABLE, dtype=np.int16)[mask]
+        apply = (np.frombuffer(self.autotiled, dtype=np.uint8)[center] != 0) & (variants >= 0)
+        if area is not None:
+            # Nur Bereich + 1 (Position im Gitter = Kachel-Position - Ecke des ersten Chunks)
+            inside = np.zeros(center.shape, dtype=bool)
+            inside[y - 1 - (min_cy << CHUNK_SHIFT):y + h + 1 - (min_cy << CHUNK_SHIFT), x - 1 - (min_cx << CHUNK_SHIFT):x + w + 1 - (min_cx << CHUNK_SHIFT)] = True
+            apply &= inside
+        cells = np.where(apply, (center << VARIANT_BITS) | variants.astype(np.uint16), grid[1:-1, 1:-1])
+
+        # Nur veränderte Chunks zurückschreiben (die Anzahl der Kacheln bleibt gleich)
+        changed = {}
+        for key in keys:
+            gx = (key[0] - min_cx) * CHUNK_SIZE
+            gy = (key[1] - min_cy) * CHUNK_SIZE
+            chunk = array('H', cells[gy:gy + CHUNK_SIZE, gx:gx + CHUNK_SIZE].tobytes())
+            if chunk != self.peek_chunk(key):
+                changed[key] = chunk
+        self.write_chunks(changed)
+        return True
+
+    def bake_chunk(self, chunk, store=True):
+        """
+        Zeichne alle Kacheln des Chunks chunk einmalig auf eine eigene Fläche
+        Kacheln aus den Chunks links und oberhalb werden mitgezeichnet, falls ihr Bild in diesen Chunk hineinragt
+        Leere Chunks werden als None gespeichert
+        store: Fläche im Cache für render() behalten (False = nur zurückgeben, z.B. für die Übersicht in scripts/overview.py)
+        """
+        chunk_px = CHUNK_SIZE * self.tile_size
+        chunk_x = chunk[0] * chunk_px
+        chunk_y = chunk[1] * chunk_px
+
+        # Sammle alle Kacheln, die (teilweise) in diesem Chunk liegen
+        tiles = []
+        for cx, cy in [(chunk[0] - 1, chunk[1] - 1), (chunk[0], chunk[1] - 1), (chunk[0] - 1, chunk[1]), chunk]:
+            cells = self.get_chunk((cx, cy))
+            if cells is None:
+                continue
+            for i, value in enumerate(cells):
+                if not value:
+                    continue
+                tile_x = (cx << CHUNK_SHIFT) | (i & CHUNK_MASK)
+                tile_y = (cy << CHUNK_SHIFT) | (i >> CHUNK_SHIFT)
+                img = self.game.assets[self.type_names[value >> VARIANT_BITS]][value & VARIANT_MASK]
+                x = tile_x * self.tile_size - chunk_x
+                y = tile_y * self.tile_size - chunk_y
+                if x + img.get_width() > 0 and y + img.get_height() > 0 and x < chunk_px and y < chunk_px:
+                    tiles.append((not self.solid[value >> VARIANT_BITS], tile_y, tile_x, img, x, y))
+
+        if not tiles:
+            if store:
+                self.chunk_cache[chunk] = None
+            return None
+
+        # Zeichne zuerst den Boden (Physik-Kacheln) und danach Dekorationen, damit diese über dem Boden liegen
+        tiles.sort(key=lambda t: t[:3])
+
+        # Schwarz ist, wie bei den Bildern (load_image), die transparente Farbe
+        surf = pygame.Surface((chunk_px, chunk_px))
+        surf.fill((0, 0, 0))
+        surf.set_colorkey((0, 0, 0))
+        for tile in tiles:
+            surf.blit(tile[3], (tile[4], tile[5]))
+
+        if store:
+            self.chunk_cache[chunk] = surf
+            self.chunk_tile_counts[chunk] = len(tiles)
+        return surf
+
+    def render(self, surf, offset=(0, 0), area=None):
+        """
+        Zeichne die Karte (Objekte wie Boden, Steine, Dekorationen, ...) auf das Display
+        Es werden nur die vorgerenderten Chunks gezeichnet, die im sichtbaren Bereich liegen
+        --> Der Aufwand ist unabhängig von der Größe der Karte
+        area: Nur die Chunks zeichnen, die diesen Bereich (x, y, w, h) von surf berühren (None = ganze Fläche)
+              Die Bilder werden trotzdem ganz geblittet -> zum Begrenzen surf.set_clip(area) verwenden
+        """
+        if area is None:
+            area = (0, 0, surf.get_width(), surf.get_height())
+        chunk_px = CHUNK_SIZE * self.tile_size
+        left = offset[0] + area[0]
+        top = offset[1] + area[1]
+        for cx in range(left // chunk_px, (left + area[2]) // chunk_px + 1):
+            for cy in range(top // chunk_px, (top + area[3]) // chunk_px + 1):
+                chunk = (cx, cy)
+                if chunk in self.chunk_cache:
+                    chunk_surf = self.chunk_cache[chunk]
+                else:
+                    chunk_surf = self.bake_chunk(chunk)
+
+                if chunk_surf is not None:
+                    surf.blit(chunk_surf, (cx * chunk_px - offset[0], cy * chunk_px - offset[1]))
+                    self.blits += 1
+                    self.tiles_drawn += self.chunk_tile_counts[chunk]
 
     def check_finished(self):
         """ Prüfe, ob der Spieler das Ziel erreicht hat """
-        for loc in self.tilemap:
-            tile = self.tilemap[loc]
-            if tile['type'] == 'flag':
-                return True
-        return False
+        if 'flag' not in self.type_ids:
+            return False
+        if self.index is None:
+            self.build_index()
+        flag_id = self.type_ids['flag']
+        # Nur die vorhandenen Zellen-Werte prüfen, nicht die Kacheln
+        return any(value >> VARIANT_BITS == flag_id for value in self.index)
+
+
+def write_tilemap(path, tile_size, type_names, chunks, pause=None):
+    """
+    Schreibe Kacheln in eine Datei (Format wie Tilemap.save, über eine temporäre Datei, siehe atomic_write)
+    Braucht keine Tilemap, nur Kopien ihrer Daten --> kann auch in einem Hintergrund-Thread laufen (scripts/autosave.py)
+    chunks: (chunk_x, chunk_y) -> array('H')
+    pause: Wird nach jedem Chunk aufgerufen (z.B. damit ein Hintergrund-Thread den Haupt-Thread nicht aufhält)
+    """
+    if path.endswith(BINARY_EXTENSION):
+        write_map(path, tile_size, CHUNK_SHIFT, type_names, chunks, pause)
+        return
+
+    # Text Chunk für Chunk selbst erzeugen (genau wie json.dump), statt erst ein riesiges dict zu bauen
+    # json.dump würde den ganzen Text in einem Stück erzeugen und dabei den Haupt-Thread blockieren (GIL)
+    names = [None] + [json.dumps(name) for name in type_names[1:]]
+    with atomic_write(path, 'w') as f:
+        f.write('{"tilemap": {')
+        first = True
+        for (cx, cy), cells in chunks.items():
+            entries = []
+            for i, value in enumerate(cells):
+                if value:
+                    x = (cx << CHUNK_SHIFT) | (i & CHUNK_MASK)
+                    y = (cy << CHUNK_SHIFT) | (i >> CHUNK_SHIFT)
+                    entries.append(f'"{x};{y}": {{"type": {names[value >> VARIANT_BITS]}, "variant": {value & VARIANT_MASK}, "pos": [{x}, {y}]}}')
+            if entries:
+                f.write(('' if first else ', ') + ', '.join(entries))
+                first = False
+            if pause is not None:
+                pause()
+        f.write('}, "tile_size": ' + json.dumps(tile_size) + '}')
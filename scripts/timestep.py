@@ -0,0 +1,65 @@
+import time
+
+
+class FixedTimestep:
+    """
+    Feste Zeitschritte für die Simulation, unabhängig von der Bildrate
+
+    Alle Werte der Physik (Schwerkraft +0.1, max. Fallgeschwindigkeit 5, air_time, invulnerable, ...) gelten pro Tick
+    --> Die Simulation läuft immer mit tick_rate Ticks pro Sekunde, gezeichnet wird so oft wie möglich
+    Die vergangene Zeit wird gesammelt (accumulator) und in ganze Ticks umgerechnet
+    Der Rest (alpha, 0..1) gibt an, wie weit das Bild zwischen dem vorletzten und dem letzten Tick liegt (Interpolation)
+
+    Schutz vor der "Todesspirale" (ein langsamer Frame braucht mehr Ticks, die den nächsten Frame noch langsamer machen):
+    - Zeit pro Frame wird auf max_frame_time begrenzt (z.B. nach dem Laden eines Levels oder Verschieben des Fensters)
+    - Pro Frame werden höchstens max_ticks Ticks berechnet, übrige Zeit wird verworfen --> Spiel läuft langsamer statt zu stehen
+    """
+    def __init__(self, tick_rate=60, max_ticks=5, max_frame_time=0.25):
+        """
+        tick_rate: Ticks pro Sekunde
+        max_ticks: Höchstens so viele Ticks pro Frame (frame-skip)
+        max_frame_time: Höchstens so viel Zeit (in Sekunden) wird pro Frame übernommen
+        """
+        self.dt = 1.0 / tick_rate
+        self.max_ticks = max_ticks
+        self.max_frame_time = max_frame_time
+        self.accumulator = 0.0
+        self.last = None
+        self.dropped = 0.0          # Insgesamt verworfene Zeit in Sekunden (Spiel lief langsamer als Echtzeit)
+
+    def reset(self):
+        """ Vergessen, wie viel Zeit vergangen ist (z.B. nach einer Pause) - der nächste Frame berechnet genau einen Tick """
+        self.accumulator = 0.0
+        self.last = None
+
+    def advance(self, now=None):
+        """
+        Übernehme die seit dem letzten Aufruf vergangene Zeit
+        now: Aktuelle Zeit in Sekunden (None = time.perf_counter())
+        Gibt die Anzahl der Ticks zurück, die in diesem Frame berechnet werden müssen (0 bis max_ticks)
+        """
+        if now is None:
+            now = time.perf_counter()
+        if self.last is None:
+            # Erster Frame: genau ein Tick, damit es etwas zu zeichnen gibt
+            self.last = now
+            self.accumulator = self.dt
+        frame_time = now - self.last
+        self.last = now
+        if frame_time > self.max_frame_time:
+            self.dropped += frame_time - self.max_frame_time
+            frame_time = self.max_frame_time
+        self.accumulator += frame_time
+
+        # Ganze Ticks abziehen, der Rest bleibt für den nächsten Frame (und die Interpolation)
+        ticks = int(self.accumulator / self.dt)
+        self.accumulator = max(0.0, self.accumulator - ticks * self.dt)
+        if ticks > self.max_ticks:
+            self.dropped += (ticks - self.max_ticks) * self.dt
+            ticks = self.max_ticks
+        return ticks
+
+    @property
+    def alpha(self):
+        """ Anteil (0..1) des nächsten Ticks, der bereits vergangen ist --> Faktor für die Interpolation beim Zeichnen """
+        return min(self.accumulator / self.dt, 1.0)
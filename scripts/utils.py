@@ -5,7 +5,10 @@ import pygame
 BASE_IMG_PATH = './data/images/'
 
 def load_image(path):
-    """ Lädt ein Bild und setzt die Farbe Schwarz als transparent """
+    """
+    Lädt ein Bild von der Festplatte und setzt die Farbe Schwarz als transparent
+    Im Spiel und Editor werden Bilder über den AssetManager (scripts/assets.py) geladen, der jedes Bild nur einmal lädt und umwandelt
+    """
     img = pygame.image.load(BASE_IMG_PATH + path)
     img.set_colorkey((0, 0, 0)) # Lege Farbe Schwarz (0, 0, 0) als transparent fest
     return img
@@ -24,12 +27,13 @@ def load_images(path):
 
 class Animation:
     """ Animation für ein Sprite """
-    def __init__(self, images, img_duration=5, loop=True):
+    def __init__(self, images, img_duration=5, loop=True, variants=None):
         """
         Initialisiere die Animation
         images: Liste von Bildern
         img_duration: Dauer eines Bildes
         loop: Soll die Animation in einer Schleife ausgeführt werden
+        variants: Vorberechnete Varianten der Bilder (intern, wird von copy() weitergegeben)
         """
         self.images = images
         self.img_duration = img_duration
@@ -37,9 +41,25 @@ class Animation:
         self.done = False
         self.frame = 0
 
+        # Vorberechnete Varianten der Bilder, z.B. gespiegelt (Key True) -> Beim Zeichnen muss nichts mehr umgewandelt werden
+        # Alle Kopien der Animation teilen sich dasselbe Dictionary, die Bilder werden also nur einmal erzeugt
+        if variants is None:
+            variants = {False: images}
+            variants[True] = [pygame.transform.flip(img, True, False) for img in images]
+        self.variants = variants
+
     def copy(self):
-        """ Kopiere die Animation """
-        return Animation(self.images, self.img_duration, self.loop)
+        """ Kopiere die Animation (die Bilder und ihre Varianten werden geteilt) """
+        return Animation(self.images, self.img_duration, self.loop, self.variants)
+
+    def add_variant(self, key, transform):
+        """
+        Berechne eine weitere Variante der Bilder mit der Funktion transform (z.B. gedreht oder eingefärbt)
+        Gibt die Liste der umgewandelten Bilder zurück, abrufbar mit img(key)
+        """
+        if key not in self.variants:
+            self.variants[key] = [transform(img) for img in self.images]
+        return self.variants[key]
     
     def update(self):
         # Wenn Animation mehrere unterschiedliche Bilder enhält, dann wiederhole die Animationen immer wieder
@@ -51,9 +71,12 @@ class Animation:
             if self.frame >= len(self.images) * self.img_duration - 1:
                 self.done = True
     
-    def img(self):
-        """ Gibt das aktuelle Bild der Animation zurück """
-        return self.images[int(self.frame / self.img_duration)]
+    def img(self, variant=False):
+        """
+        Gibt das aktuelle Bild der Animation zurück
+        variant: False = Original, True = horizontal gespiegelt, sonst Key einer Variante aus add_variant()
+        """
+        return self.variants[variant][int(self.frame / self.img_duration)]
     
 class GoalFlag:
     """ 
@@ -61,31 +84,40 @@ class GoalFlag:
     
     Wechsel Flagge im Sieg-Zustand zu einer Flagge mit Fahne
     """
-    def __init__(self, game):
+    def __init__(self, game, tilemap=None):
+        """
+        tilemap: Karte, in der die Flagge gesucht wird (Standard: game.tilemap)
+        """
         self.game = game
-        self.img = load_image('tiles/goal/0.png')
+        # Bilder aus game.assets (schon geladen) -> kann auch im Hintergrund-Thread erzeugt werden (siehe Game.prepare_level)
+        self.img = self.game.assets['goal'][0]
+        self.img_finished = self.game.assets['goal'][1]     # Flagge mit Fahne
         
-        self.pos = self.game.tilemap.extract([('goal', 0)], keep=True)[0]['pos']
+        tilemap = tilemap or self.game.tilemap
+        self.pos = tilemap.extract([('goal', 0)], keep=True)[0]['pos']
         
         self.rect = pygame.Rect(self.pos[0], self.pos[1], self.img.get_width(), self.img.get_height())
 
-    def render(self, surf, offset=(0, 0)):
-        """ Zeichne die Flagge im Sieg-Zustand"""
-        self.img = load_image('tiles/goal/1.png')
-        surf.blit(self.img, (self.pos[0] - offset[0], self.pos[1] - offset[1]))
-
-    def check_finished(self):
-        """ Prüfe, ob das Ziel erreicht wurde """
-        rect = self.rect.copy()
         # Spieler muss durch die Flagge laufen, um das Ziel zu erreichen
+        # --> Verkleinertes Rechteck (halbe Größe), zentriert um die Flagge
         img_width = self.img.get_width()
         img_height = self.img.get_height()
         reduced_width = img_width // 2
         reduced_height = img_height // 2
+        self.trigger_rect = pygame.Rect(self.pos[0] + (img_width - reduced_width) // 2, self.pos[1] + (img_height - reduced_height) // 2, reduced_width, reduced_height)
+
+    def render(self, surf, offset=(0, 0)):
+        """ Zeichne die Flagge im Sieg-Zustand und gibt den gezeichneten Bereich zurück """
+        return surf.blit(self.img_finished, (self.pos[0] - offset[0], self.pos[1] - offset[1]))
 
-        # Zentriere das verkleinerte Rechteck um die Flagge
-        rect = pygame.Rect(self.pos[0] + (img_width - reduced_width) // 2, self.pos[1] + (img_height - reduced_height) // 2, reduced_width, reduced_height)
-        if rect.colliderect(self.game.player.rect()):
+    def check_finished(self, player_rect=None):
+        """
+        Prüfe, ob das Ziel erreicht wurde
+        player_rect: Rechteck des Spielers (wird sonst neu berechnet)
+        """
+        if player_rect is None:
+            player_rect = self.game.player.rect()
+        if self.trigger_rect.colliderect(player_rect):
             return True
         
 
@@ -95,44 +127,48 @@ class LiveHeart:
     """
     def __init__(self, game):
         self.game = game
-        self.img1 = load_image('tiles/life/0.png')
-        self.img2 = load_image('tiles/life/1.png')
-        self.img3 = load_image('tiles/life/2.png')
-        self.img4 = load_image('tiles/life/3.png')
+        self.img1, self.img2, self.img3, self.img4 = self.game.asset_manager.images('tiles/life')
         
     def render(self, surf, offset=(0, 0)):
-        """ Zeichne das Leben des Spielers in die obere linke Ecke """
+        """ Zeichne das Leben des Spielers in die obere linke Ecke und gibt den gezeichneten Bereich zurück """
         if self.game.live == 3:
             # Zeichne 3 Leben
-            surf.blit(self.img1, (0, 0))
+            return surf.blit(self.img1, (0, 0))
         elif self.game.live == 2:
             # Zeichne 2 Leben
-            surf.blit(self.img2, (0, 0))
+            return surf.blit(self.img2, (0, 0))
         elif self.game.live == 1:
             # Zeichne 1 Leben
-            surf.blit(self.img3, (0, 0))
+            return surf.blit(self.img3, (0, 0))
         else:
             # Zeichne 0 Leben
-            surf.blit(self.img4, (0, 0))
+            return surf.blit(self.img4, (0, 0))
 
 class Heart:
     """
     Herzen, um das Leben des Spielers wieder aufzufüllen
     """
+    __slots__ = ('game', 'img', 'pos', 'rect')
+
     def __init__(self, game, pos):
         self.game = game
-        self.img = load_image('tiles/heart/0.png')
+        self.img = self.game.assets['heart'][0]
         self.pos = pos
         self.rect = pygame.Rect(pos[0], pos[1], self.img.get_width(), self.img.get_height())
 
-    def collect(self):
-        """ Prüfe, ob der Spieler das Herz berührt """
-        if self.rect.colliderect(self.game.player.rect()):
+    def collect(self, player_rect=None):
+        """
+        Prüfe, ob der Spieler das Herz berührt
+        player_rect: Rechteck des Spielers (wird sonst neu berechnet)
+        """
+        if player_rect is None:
+            player_rect = self.game.player.rect()
+        if self.rect.colliderect(player_rect):
             self.game.live = min(3, self.game.live + 1)
             return True
         return False
 
     def render(self, surf, offset=(0, 0)):
-        """ Zeichne das Herz """
-        surf.blit(self.img, (self.pos[0] - offset[0], self.pos[1] - offset[1]))
+        """ Zeichne das Herz und gibt den gezeichneten Bereich zurück """
+        return surf.blit(self.img, (self.pos[0] - offset[0], self.pos[1] - offset[1]))
         
\ No newline at end of file